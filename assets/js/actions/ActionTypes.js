@@ -1,2 +1,3 @@
 export const GET_COMMITS_SUCCESS = 'GET_COMMITS_SUCCESS';
 export const CREATE_REPOSITORY_SUCCESS = 'CREATE_REPO_SUCCESS';
+export const REPOSITORY_STATUS_UPDATE = 'REPOSITORY_STATUS_UPDATE';
@@ -5,6 +5,11 @@ export const createRepositorySuccess = (response, successMessage) => ({
   payload: { response, successMessage },
 });
 
+export const repositoryStatusUpdate = (repository) => ({
+  type: types.REPOSITORY_STATUS_UPDATE,
+  payload: repository,
+});
+
 export const getCommitsSuccess = (commits) => ({
   type: types.GET_COMMITS_SUCCESS,
   payload: commits,
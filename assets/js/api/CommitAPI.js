@@ -3,7 +3,7 @@ import { reset } from 'redux-form';
 
 import store from '../store';
 import {
-  createRepositorySuccess, getCommitsSuccess,
+  createRepositorySuccess, getCommitsSuccess, repositoryStatusUpdate,
 } from '../actions/CommitActions';
 
 export const getCommits = (params = {}) => axios.get('/api/commits/', { params })
@@ -13,9 +13,18 @@ export const getCommits = (params = {}) => axios.get('/api/commits/', { params }
 
 export const createRepository = (values, headers, formDispatch) => axios.post('/api/repositories/', values, { headers })
   .then((response) => {
-    store.dispatch(createRepositorySuccess(response.data, true));
+    store.dispatch(createRepositorySuccess(response.data, false));
     formDispatch(reset('repoCreate'));
   }).catch((error) => {
     const err = error.response;
     console.log(err);
   });
+
+export const getRepositoryStatus = (id) => axios.get(`/api/repositories/${id}/status/`)
+  .then((response) => {
+    store.dispatch(repositoryStatusUpdate(response.data));
+  }).catch((error) => {
+    const err = error.response;
+    console.log(err);
+    throw error;
+  });
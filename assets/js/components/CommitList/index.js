@@ -9,6 +9,7 @@ const CommitList = (props) => {
     const updatedSearchParams = new URLSearchParams(searchParams);
     updatedSearchParams.set(paramName, value);
     updatedSearchParams.delete('page');
+    updatedSearchParams.delete('cursor');
 
     return updatedSearchParams.toString();
   };
@@ -3,7 +3,7 @@ import PropTypes from 'prop-types';
 import { Link, useSearchParams } from 'react-router-dom';
 
 const PageItem = ({
-  page, text, active, disabled,
+  page, cursor, text, active, disabled,
 }) => {
   const [searchParams] = useSearchParams();
 
@@ -14,6 +14,8 @@ const PageItem = ({
     return updatedSearchParams.toString();
   };
 
+  const url = cursor ? getUrlWithParam('cursor', cursor) : getUrlWithParam('page', page);
+
   let stateClass = '';
   if (disabled) {
     stateClass = 'disabled';
@@ -23,19 +25,22 @@ const PageItem = ({
 
   return (
     <li className={`page-item ${stateClass}`}>
-      <Link to={!disabled && `/?${getUrlWithParam('page', page)}`} className="page-link">{text || page}</Link>
+      <Link to={!disabled && `/?${url}`} className="page-link">{text || page}</Link>
     </li>
   );
 };
 
 PageItem.propTypes = {
-  page: PropTypes.number.isRequired,
+  page: PropTypes.number,
+  cursor: PropTypes.string,
   text: PropTypes.string,
   active: PropTypes.bool,
   disabled: PropTypes.bool,
 };
 
 PageItem.defaultProps = {
+  page: 0,
+  cursor: null,
   text: '',
   active: false,
   disabled: false,
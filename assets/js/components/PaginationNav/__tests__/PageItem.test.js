@@ -62,4 +62,13 @@ describe('PageItem', () => {
     const link = wrapper.find('Link');
     expect(link.prop('to')).toBe(false);
   });
+
+  it('generate url with cursor instead of page when cursor is provided', () => {
+    const mockSearchParams = new URLSearchParams({ pagination: 'cursor', cursor: 'old' });
+    jest.spyOn(require('react-router-dom'), 'useSearchParams').mockImplementation(() => [mockSearchParams]);
+
+    const wrapper = shallow(<PageItem cursor="new" text="Next" />);
+    const link = wrapper.find('Link');
+    expect(link.prop('to')).toBe('/?pagination=cursor&cursor=new');
+  });
 });
@@ -76,4 +76,30 @@ describe('PaginationNav', () => {
 
     expect(nextButton.prop('disabled')).toBe(true);
   });
+
+  it('renders only previous and next cursor items in cursor mode', () => {
+    const wrapper = shallow(
+      <PaginationNav currentPage={0} totalPages={0} previousCursor="prev" nextCursor="next" />,
+    );
+    const pageItems = wrapper.find(PageItem);
+
+    expect(pageItems).toHaveLength(2);
+    expect(pageItems.first().props()).toMatchObject({
+      cursor: 'prev',
+      text: 'Previous',
+      disabled: false,
+    });
+    expect(pageItems.last().props()).toMatchObject({
+      cursor: 'next',
+      text: 'Next',
+      disabled: false,
+    });
+  });
+
+  it('disables previous button when there is no previous cursor', () => {
+    const wrapper = shallow(<PaginationNav currentPage={0} totalPages={0} nextCursor="next" />);
+    const previousButton = wrapper.find(PageItem).first();
+
+    expect(previousButton.prop('disabled')).toBe(true);
+  });
 });
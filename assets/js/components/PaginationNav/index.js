@@ -4,7 +4,32 @@ import { nanoid } from 'nanoid';
 
 import PageItem from './PageItem';
 
-const PaginationNav = ({ currentPage, totalPages }) => {
+const Pagination = ({ children }) => (
+  <div className="d-flex justify-content-center">
+    <nav aria-label="Page navigation">
+      <ul className="pagination">
+        {children}
+      </ul>
+    </nav>
+  </div>
+);
+
+Pagination.propTypes = {
+  children: PropTypes.node.isRequired,
+};
+
+const PaginationNav = ({
+  currentPage, totalPages, previousCursor, nextCursor,
+}) => {
+  if (previousCursor || nextCursor) {
+    return (
+      <Pagination>
+        <PageItem cursor={previousCursor} text="Previous" disabled={!previousCursor} />
+        <PageItem cursor={nextCursor} text="Next" disabled={!nextCursor} />
+      </Pagination>
+    );
+  }
+
   if (!totalPages || totalPages < 2) return null;
 
   const pageItems = Array.from({ length: totalPages }).map(
@@ -18,21 +43,24 @@ const PaginationNav = ({ currentPage, totalPages }) => {
   );
 
   return (
-    <div className="d-flex justify-content-center">
-      <nav aria-label="Page navigation">
-        <ul className="pagination">
-          <PageItem page={currentPage - 1} text="Previous" disabled={currentPage === 1} />
-          {pageItems}
-          <PageItem page={currentPage + 1} text="Next" disabled={currentPage === totalPages} />
-        </ul>
-      </nav>
-    </div>
+    <Pagination>
+      <PageItem page={currentPage - 1} text="Previous" disabled={currentPage === 1} />
+      {pageItems}
+      <PageItem page={currentPage + 1} text="Next" disabled={currentPage === totalPages} />
+    </Pagination>
   );
 };
 
 PaginationNav.propTypes = {
   currentPage: PropTypes.number.isRequired,
   totalPages: PropTypes.number.isRequired,
+  previousCursor: PropTypes.string,
+  nextCursor: PropTypes.string,
+};
+
+PaginationNav.defaultProps = {
+  previousCursor: null,
+  nextCursor: null,
 };
 
 export default PaginationNav;
@@ -29,9 +29,15 @@ renderField.propTypes = {
   meta: PropTypes.object.isRequired,
 };
 
-const RepoCreateForm = (props) => {
+const STATUS_MESSAGES = {
+  pending: 'is waiting to be checked on Github',
+  validating: 'is being checked on Github',
+  syncing: 'is having its commits fetched',
+};
+
+export const RepoCreateForm = (props) => {
   const {
-    successMessage, handleSubmit, pristine, submitting,
+    successMessage, repository, handleSubmit, pristine, submitting,
   } = props;
   return (
     <div>
@@ -41,6 +47,18 @@ const RepoCreateForm = (props) => {
             Repository added successfully!
           </div>
         )}
+      {repository && STATUS_MESSAGES[repository.status]
+        && (
+          <div className="alert alert-info" role="status">
+            {`Repository ${repository.name} ${STATUS_MESSAGES[repository.status]}...`}
+          </div>
+        )}
+      {repository && repository.status === 'failed'
+        && (
+          <div className="alert alert-danger" role="alert">
+            {`Repository ${repository.name} could not be added. ${repository.status_detail}`}
+          </div>
+        )}
       <form onSubmit={handleSubmit}>
         <div className="form-row">
           <div className="col-10">
@@ -68,6 +86,15 @@ RepoCreateForm.propTypes = {
   pristine: PropTypes.bool.isRequired,
   submitting: PropTypes.bool.isRequired,
   successMessage: PropTypes.bool.isRequired,
+  repository: PropTypes.shape({
+    name: PropTypes.string.isRequired,
+    status: PropTypes.string.isRequired,
+    status_detail: PropTypes.string,
+  }),
+};
+
+RepoCreateForm.defaultProps = {
+  repository: null,
 };
 
 const validate = (values) => {
@@ -0,0 +1,45 @@
+import React from 'react';
+import { shallow } from 'enzyme';
+
+import { RepoCreateForm } from '../RepoCreateForm';
+
+describe('RepoCreateForm', () => {
+  const props = {
+    handleSubmit: jest.fn(),
+    pristine: true,
+    submitting: false,
+    successMessage: false,
+  };
+
+  it.each([
+    ['pending'],
+    ['validating'],
+    ['syncing'],
+  ])('renders the progress of a %s repository', (status) => {
+    const repository = { name: 'user/repo', status };
+    const wrapper = shallow(<RepoCreateForm {...props} repository={repository} />);
+
+    expect(wrapper.find('.alert-info').text()).toContain('user/repo');
+    expect(wrapper.find('.alert-success').exists()).toBe(false);
+  });
+
+  it('renders the reason of a failed repository', () => {
+    const repository = {
+      name: 'user/repo', status: 'failed', status_detail: 'Repository not found on Github.',
+    };
+    const wrapper = shallow(<RepoCreateForm {...props} repository={repository} />);
+
+    expect(wrapper.find('.alert-danger').text()).toContain('Repository not found on Github.');
+    expect(wrapper.find('.alert-info').exists()).toBe(false);
+  });
+
+  it('renders the success message of a ready repository', () => {
+    const repository = { name: 'user/repo', status: 'ready' };
+    const wrapper = shallow(
+      <RepoCreateForm {...props} successMessage repository={repository} />,
+    );
+
+    expect(wrapper.find('.alert-success').exists()).toBe(true);
+    expect(wrapper.find('.alert-info').exists()).toBe(false);
+  });
+});
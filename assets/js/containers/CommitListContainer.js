@@ -7,14 +7,19 @@ import * as commitAPI from '../api/CommitAPI';
 import CommitList from '../components/CommitList';
 import PaginationNav from '../components/PaginationNav';
 
-const CommitListContainer = ({ commits, totalPages, currentPage }) => {
+const CommitListContainer = ({
+  commits, totalPages, currentPage, previousCursor, nextCursor,
+}) => {
   const [searchParams] = useSearchParams();
   const searchParamsString = searchParams.toString();
   const filters = {
     author: searchParams.get('author'),
     repository: searchParams.get('repository'),
     page: searchParams.get('page'),
+    pagination: searchParams.get('pagination'),
+    cursor: searchParams.get('cursor'),
   };
+  const cursorMode = filters.pagination === 'cursor';
 
   useEffect(() => {
     commitAPI.getCommits(filters);
@@ -26,6 +31,8 @@ const CommitListContainer = ({ commits, totalPages, currentPage }) => {
       <PaginationNav
         totalPages={totalPages}
         currentPage={currentPage}
+        previousCursor={cursorMode ? previousCursor : null}
+        nextCursor={cursorMode ? nextCursor : null}
         searchParams={searchParamsString}
       />
     </div>
@@ -42,12 +49,21 @@ CommitListContainer.propTypes = {
   })).isRequired,
   totalPages: PropTypes.number.isRequired,
   currentPage: PropTypes.number.isRequired,
+  previousCursor: PropTypes.string,
+  nextCursor: PropTypes.string,
+};
+
+CommitListContainer.defaultProps = {
+  previousCursor: null,
+  nextCursor: null,
 };
 
 const mapStateToProps = (store) => ({
   commits: store.commitState.commits,
   totalPages: store.commitState.totalPages,
   currentPage: store.commitState.currentPage,
+  previousCursor: store.commitState.previousCursor,
+  nextCursor: store.commitState.nextCursor,
 });
 
 export default connect(mapStateToProps)(CommitListContainer);
@@ -4,24 +4,58 @@ import { connect } from 'react-redux';
 import * as commitAPI from '../api/CommitAPI';
 import Form from '../components/RepoCreateForm';
 
+const POLL_INTERVAL = 2000;
+const IN_PROGRESS_STATUSES = ['pending', 'validating', 'syncing'];
+
 class RepoCreateContainer extends React.Component {
+  componentDidUpdate() {
+    this.schedulePoll();
+  }
+
+  componentWillUnmount() {
+    clearTimeout(this.pollTimeout);
+  }
+
+  schedulePoll = () => {
+    const { repository } = this.props;
+    clearTimeout(this.pollTimeout);
+    if (repository && IN_PROGRESS_STATUSES.includes(repository.status)) {
+      this.pollTimeout = setTimeout(
+        // Failed polls don't update the repository, so they're scheduled again here
+        () => commitAPI.getRepositoryStatus(repository.id).catch(this.schedulePoll),
+        POLL_INTERVAL,
+      );
+    }
+  };
+
   submit = (values, dispatch) => {
     const token = document.getElementById('main').dataset.csrftoken;
     return commitAPI.createRepository(values, { 'X-CSRFToken': token }, dispatch);
   };
 
   render() {
-    const { successMessage } = this.props;
-    return <Form onSubmit={this.submit} successMessage={successMessage} />;
+    const { successMessage, repository } = this.props;
+    return <Form onSubmit={this.submit} successMessage={successMessage} repository={repository} />;
   }
 }
 
 RepoCreateContainer.propTypes = {
   successMessage: PropTypes.bool.isRequired,
+  repository: PropTypes.shape({
+    id: PropTypes.number.isRequired,
+    name: PropTypes.string.isRequired,
+    status: PropTypes.string.isRequired,
+    status_detail: PropTypes.string,
+  }),
+};
+
+RepoCreateContainer.defaultProps = {
+  repository: null,
 };
 
 const mapStateToProps = (store) => ({
   successMessage: store.commitState.successMessage,
+  repository: store.commitState.repository,
 });
 
 export default connect(mapStateToProps)(RepoCreateContainer);
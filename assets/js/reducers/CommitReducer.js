@@ -3,22 +3,39 @@ import * as types from '../actions/ActionTypes';
 const initialState = {
   commits: [],
   successMessage: false,
+  repository: null,
   totalPages: 0,
   currentPage: 0,
+  previousCursor: null,
+  nextCursor: null,
 };
 
+const getCursor = (url) => (url ? new URL(url).searchParams.get('cursor') : null);
+
 const commitReducer = (state = initialState, action) => {
   switch (action.type) {
     case types.GET_COMMITS_SUCCESS:
       return {
         ...state,
         commits: Object.values(action.payload.results),
-        totalPages: action.payload.total_pages,
-        currentPage: action.payload.page,
+        totalPages: action.payload.total_pages || 0,
+        currentPage: action.payload.page || 0,
+        previousCursor: getCursor(action.payload.previous),
+        nextCursor: getCursor(action.payload.next),
       };
     case types.CREATE_REPOSITORY_SUCCESS: {
-      return { ...state, successMessage: action.payload.successMessage };
+      return {
+        ...state,
+        successMessage: action.payload.successMessage,
+        repository: action.payload.response,
+      };
     }
+    case types.REPOSITORY_STATUS_UPDATE:
+      return {
+        ...state,
+        successMessage: action.payload.status === 'ready',
+        repository: action.payload,
+      };
     default:
       return state;
   }
@@ -1,5 +1,13 @@
+from celery.signals import before_task_publish, task_prerun
 from django.apps import AppConfig
 
+from common.signals import record_queue_latency, stamp_published_at
+
 
 class CommonConfig(AppConfig):
     name = 'common'
+
+    def ready(self):
+        # Api and workers both load the apps, so publish and start of tasks are measured
+        before_task_publish.connect(stamp_published_at)
+        task_prerun.connect(record_queue_latency)
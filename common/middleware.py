@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+class QueryMetrics:
+    """Database execute wrapper counting queries and the time spent on them."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, *args):
+        # Django calls wrappers with execute, sql, params, many and context
+        start = time.perf_counter()
+        try:
+            return execute(*args)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryInstrumentationMiddleware:
+    """Report the SQL queries made by each request in the response headers.
+
+    Only enabled with QUERY_INSTRUMENTATION setting, meant for debug and staging.
+    """
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = QueryMetrics()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+
+        response['X-DB-Query-Count'] = str(metrics.count)
+        response['X-DB-Query-Time'] = f'{metrics.duration * 1000:.2f}ms'
+        return response
@@ -0,0 +1,63 @@
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class QueueLatency:
+    """Counters of how long tasks wait on each Celery queue before they start.
+
+    Counters are kept on the cache shared by api and workers, so they can be read by
+    StatsView.
+    """
+    def __init__(self, cache_alias: str = 'default') -> None:
+        self.cache = caches[cache_alias]
+
+    @staticmethod
+    def queues() -> List[str]:
+        """Get the names of the queues tasks are routed to.
+
+        :return: Queues names.
+        :rtype: List[str]
+        """
+        routed = {route['queue'] for route in settings.CELERY_TASK_ROUTES.values()}
+        return sorted({settings.CELERY_TASK_DEFAULT_QUEUE, *routed})
+
+    def _count(self, queue: str, name: str, value: int = 1) -> None:
+        key = f'queues:stats:{queue}:{name}'
+        if not self.cache.add(key, value, timeout=None):
+            self.cache.incr(key, value)
+
+    def record(self, queue: str, latency: float) -> None:
+        """Record a task start.
+
+        :param queue: Queue the task was consumed from.
+        :type queue: str
+        :param latency: Seconds the task waited on the queue.
+        :type latency: float
+        """
+        latency_us = int(latency * 1_000_000)
+        self._count(queue, 'tasks')
+        self._count(queue, 'latency_us', latency_us)
+        self.cache.set(f'queues:stats:{queue}:last_latency_us', latency_us, timeout=None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get the tasks started and their latency, by queue.
+
+        :return: Tasks started, their average latency and the last task latency, in
+            milliseconds, by queue.
+        :rtype: Dict[str, Dict[str, float]]
+        """
+        stats = {}
+        for queue in self.queues():
+            names = ('tasks', 'latency_us', 'last_latency_us')
+            counters = self.cache.get_many([f'queues:stats:{queue}:{name}' for name in names])
+            tasks, latency_us, last_latency_us = (
+                counters.get(f'queues:stats:{queue}:{name}', 0) for name in names
+            )
+            stats[queue] = {
+                'tasks': tasks,
+                'average_latency_ms': round(latency_us / tasks / 1000, 2) if tasks else 0,
+                'last_latency_ms': round(last_latency_us / 1000, 2),
+            }
+        return stats
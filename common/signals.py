@@ -0,0 +1,28 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+from common.queue_metrics import QueueLatency
+
+
+def stamp_published_at(headers=None, **kwargs):
+    """Stamp tasks messages with their publish time, to measure how long they wait queued."""
+    headers['published_at'] = time.time()
+
+
+def record_queue_latency(task=None, **kwargs):
+    """Record how long the task waited on its queue, from publish, or eta, to start."""
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is None:
+        # Run eagerly, without a broker
+        return
+
+    queued_since = published_at
+    if task.request.eta:
+        queued_since = max(queued_since, datetime.fromisoformat(task.request.eta).timestamp())
+
+    queue = (task.request.delivery_info or {}).get('routing_key')
+    QueueLatency().record(
+        queue or settings.CELERY_TASK_DEFAULT_QUEUE, max(time.time() - queued_since, 0)
+    )
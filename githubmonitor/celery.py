@@ -9,6 +9,11 @@ from django.apps import apps
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'githubmonitor.settings')
 
+# Queues, routed by CELERY_TASK_ROUTES setting
+INTERACTIVE_QUEUE = 'interactive'
+REFRESH_QUEUE = 'refresh'
+BACKFILL_QUEUE = 'backfill'
+
 app = Celery('githubmonitor_tasks')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks(lambda: [n.name for n in apps.get_app_configs()])
@@ -31,6 +31,9 @@ DEBUG = config('DEBUG', cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=Csv())
 
+# Report SQL queries count and time of each request in response headers
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', cast=bool, default=DEBUG)
+
 
 # Application definition
 
@@ -41,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'social_django',
@@ -50,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,10 +95,37 @@ WSGI_APPLICATION = 'githubmonitor.wsgi.application'
 DATABASES = {
     'default': config('DATABASE_URL', cast=db_url)
 }
-if 'test' in sys.argv:
+# Tests run on sqlite, unless Postgres only features are tested, e.g. full-text search
+TEST_ON_POSTGRES = config('TEST_ON_POSTGRES', cast=bool, default=False)
+if 'test' in sys.argv and not TEST_ON_POSTGRES:
     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
     DATABASES['default']['NAME'] = 'databasename.db3'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_URL', default='redis://redis:6379/2'),
+    },
+    # Github responses revalidated with ETags, evicted by the maxmemory policy of their own
+    # Redis instance, so broker and results are never evicted
+    'github': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('GITHUB_CACHE_URL', default='redis://redis-github-cache:6379/0'),
+        'TIMEOUT': 60 * 60 * 24 * 7,
+    },
+}
+if 'test' in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'github': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'github',
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        },
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -160,6 +192,49 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_BROKER_URL = config('BROKER_URL')
 CELERY_RESULT_BACKEND = config('RESULT_URL')
+CELERY_BEAT_SCHEDULE = {
+    'refresh-repositories': {
+        'task': 'repositories.tasks.refresh_repositories',
+        'schedule': config('REPOSITORIES_REFRESH_INTERVAL', cast=int, default=60 * 15),
+    },
+}
+# Repositories just added are synced on the interactive queue, periodic refreshes and bulk
+# backfills on their own queues, so long jobs don't delay the short ones. Each queue is
+# consumed by its own worker, see docker-compose.yml.
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_ROUTES = {
+    'repositories.tasks.refresh_repositories': {'queue': 'refresh', 'priority': 0},
+    'repositories.tasks.refresh_repositories_history': {'queue': 'refresh'},
+    'repositories.tasks.get_repo_commits_slice': {'queue': 'backfill'},
+}
+# With Redis, 0 is the highest priority
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
+# Workers reserve one task at a time, so a long task doesn't hold others behind it
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+COMMITS_INGESTION_BATCH_SIZE = config('COMMITS_INGESTION_BATCH_SIZE', cast=int, default=500)
+COMMITS_FETCH_CONCURRENCY = config('COMMITS_FETCH_CONCURRENCY', cast=int, default=4)
+# Backfills longer than this are split into slices of this many days, fetched in parallel
+COMMITS_BACKFILL_SLICE_DAYS = config('COMMITS_BACKFILL_SLICE_DAYS', cast=int, default=30)
+# Syncs failing on network or Github server errors are retried with exponential backoff,
+# from SYNC_RETRY_BACKOFF up to SYNC_RETRY_BACKOFF_MAX seconds
+SYNC_MAX_RETRIES = config('SYNC_MAX_RETRIES', cast=int, default=5)
+SYNC_RETRY_BACKOFF = config('SYNC_RETRY_BACKOFF', cast=int, default=30)
+SYNC_RETRY_BACKOFF_MAX = config('SYNC_RETRY_BACKOFF_MAX', cast=int, default=60 * 10)
+# Seconds a repository sync holds its lock without a heartbeat, renewed on each page
+REPOSITORY_SYNC_LOCK_TIMEOUT = config('REPOSITORY_SYNC_LOCK_TIMEOUT', cast=int, default=60 * 5)
+# Repositories refreshed by a single GraphQL refresh task
+REPOSITORIES_PER_REFRESH_TASK = config('REPOSITORIES_PER_REFRESH_TASK', cast=int, default=50)
+REPOSITORIES_VALIDATION_CONCURRENCY = config(
+    'REPOSITORIES_VALIDATION_CONCURRENCY', cast=int, default=10
+)
+# Cached commits lists are invalidated on ingestion, this only bounds stale entries lifetime
+COMMITS_CACHE_TIMEOUT = config('COMMITS_CACHE_TIMEOUT', cast=int, default=60 * 10)
 
 SOCIAL_AUTH_GITHUB_KEY = config('SOCIAL_AUTH_GITHUB_KEY')
 SOCIAL_AUTH_GITHUB_SECRET = config('SOCIAL_AUTH_GITHUB_SECRET')
@@ -168,6 +243,13 @@ SOCIAL_AUTH_GITHUB_SCOPE = [
     'write:repo_hook'
 ]
 
+# Push webhooks are only registered, and their deliveries accepted, if a secret is set
+GITHUB_WEBHOOK_SECRET = config('GITHUB_WEBHOOK_SECRET', default='')
+# Public url of the push webhook endpoint, built from the request host if empty
+GITHUB_WEBHOOK_URL = config('GITHUB_WEBHOOK_URL', default='')
+# Api used to refresh repositories: `rest` (one sync per repository) or `graphql` (batched)
+GITHUB_API_BACKEND = config('GITHUB_API_BACKEND', default='rest')
+
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.github.GithubOAuth2',
     'django.contrib.auth.backends.ModelBackend'
@@ -0,0 +1,131 @@
+import hashlib
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from django.core.cache import caches
+
+CACHE_ALIAS = 'github'
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Link', 'Content-Type')
+
+
+def token_fingerprint(access_token: str) -> str:
+    """Identify an access token without storing it.
+
+    :param access_token: Github access token.
+    :type access_token: str
+    :return: Short hash of the access token.
+    :rtype: str
+    """
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+class ConditionalRequestCache:
+    """Store Github responses bodies with their validators, so they can be revalidated.
+
+    Github answers a request carrying a still valid `If-None-Match`/`If-Modified-Since`
+    with `304 Not Modified`, which doesn't count against the rate limit. Entries expire
+    after `timeout` seconds and are evicted by the cache backend when it is full.
+    """
+    def __init__(self, cache_alias: str = CACHE_ALIAS, timeout: int = CACHE_TIMEOUT) -> None:
+        self.cache = caches[cache_alias]
+        self.timeout = timeout
+
+    @staticmethod
+    def make_key(access_token: str, url: str, params: Optional[dict] = None) -> str:
+        """Build the cache key for a request.
+
+        Responses may differ between users (e.g. private repositories), so the access
+        token is part of the key.
+
+        :param access_token: Github access token used on the request.
+        :type access_token: str
+        :param url: Absolute request url.
+        :type url: str
+        :param params: Request query params, defaults to None
+        :type params: Optional[dict], optional
+        :return: Cache key.
+        :rtype: str
+        """
+        query = urlencode(sorted((params or {}).items()))
+        digest = hashlib.sha256(f'{url}?{query}'.encode()).hexdigest()
+        return f'github:etag:{token_fingerprint(access_token)}:{digest}'
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get a cached response.
+
+        :param key: Cache key.
+        :type key: str
+        :return: Cached response headers and body, if any.
+        :rtype: Optional[dict]
+        """
+        return self.cache.get(key)
+
+    def set(self, key: str, response: requests.Response) -> None:
+        """Cache a response, if it carries any validator.
+
+        :param key: Cache key.
+        :type key: str
+        :param response: Successful response from Github api.
+        :type response: requests.Response
+        """
+        headers = {
+            name: response.headers[name] for name in CACHED_HEADERS if name in response.headers
+        }
+        if 'ETag' in headers or 'Last-Modified' in headers:
+            self.cache.set(key, {'headers': headers, 'body': response.content}, self.timeout)
+
+    @staticmethod
+    def conditional_headers(cached: dict) -> Dict[str, str]:
+        """Build the headers to revalidate a cached response.
+
+        :param cached: Cached response.
+        :type cached: dict
+        :return: Conditional request headers.
+        :rtype: Dict[str, str]
+        """
+        headers = {}
+        if 'ETag' in cached['headers']:
+            headers['If-None-Match'] = cached['headers']['ETag']
+        if 'Last-Modified' in cached['headers']:
+            headers['If-Modified-Since'] = cached['headers']['Last-Modified']
+        return headers
+
+    @staticmethod
+    def to_response(cached: dict, response: requests.Response) -> requests.Response:
+        """Turn a `304 Not Modified` response into the cached one.
+
+        :param cached: Cached response.
+        :type cached: dict
+        :param response: `304 Not Modified` response from Github api.
+        :type response: requests.Response
+        :return: Response with the cached status, body and headers.
+        :rtype: requests.Response
+        """
+        response.status_code = 200
+        response.headers.update(cached['headers'])
+        response._content = cached['body']  # pylint: disable=protected-access
+        return response
+
+    def record(self, hit: bool) -> None:
+        """Count a cache hit or miss.
+
+        :param hit: If the cached response was still valid.
+        :type hit: bool
+        """
+        key = 'github:etag:stats:hits' if hit else 'github:etag:stats:misses'
+        if not self.cache.add(key, 1, timeout=None):
+            self.cache.incr(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the hit/miss counters, shared between all processes.
+
+        :return: Number of hits and misses.
+        :rtype: Dict[str, int]
+        """
+        counters = self.cache.get_many(['github:etag:stats:hits', 'github:etag:stats:misses'])
+        return {
+            'hits': counters.get('github:etag:stats:hits', 0),
+            'misses': counters.get('github:etag:stats:misses', 0),
+        }
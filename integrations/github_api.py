@@ -1,10 +1,38 @@
-from datetime import datetime
-from typing import Any, Optional
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+import requests
+from django.core.cache import caches
 from github import Github
 from github.Commit import Commit
+from github.GithubException import (BadCredentialsException, GithubException,
+                                    UnknownObjectException)
 from github.PaginatedList import PaginatedList
 from github.Repository import Repository
+from requests.adapters import HTTPAdapter
+
+from integrations.etag_cache import (CACHE_ALIAS, ConditionalRequestCache,
+                                     token_fingerprint)
+from integrations.rate_limit import (RateLimitBudget,
+                                     RateLimitExhaustedException)
+
+GITHUB_API_URL = 'https://api.github.com'
+COMMITS_PER_PAGE = 100
+REQUEST_TIMEOUT = 15
+# Upper bound of concurrent page requests, which is also the connection pool size
+MAX_CONCURRENCY = 10
+# Repositories metadata barely changes, so it's reused for a while without asking Github
+REPOSITORY_CACHE_TIMEOUT = 60 * 10
+# Clients kept by each process, so their connections are reused between tasks and requests
+CLIENTS_CACHE_SIZE = 64
+# Users access tokens are reused for a while without reading them from database
+TOKENS_CACHE_SIZE = 1024
+TOKENS_CACHE_TIMEOUT = 60
 
 
 class InvalidRequestUserException(Exception):
@@ -13,24 +41,215 @@ class InvalidRequestUserException(Exception):
         super().__init__("Request user is invalid or doesn't contain github credentials.")
 
 
+class LRUCache:
+    """Thread safe, process level cache which evicts the least recently used entries.
+
+    Used for values which can't or shouldn't leave the process, like http connections
+    and access tokens.
+    """
+    def __init__(self, maxsize: int, timeout: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Get a cached value, creating and caching it if missing or expired.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :param factory: Function which creates the value.
+        :type factory: Callable[[], Any]
+        :return: Cached or created value.
+        :rtype: Any
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        value = factory()
+        expires_at = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+clients_cache = LRUCache(CLIENTS_CACHE_SIZE)
+tokens_cache = LRUCache(TOKENS_CACHE_SIZE, timeout=TOKENS_CACHE_TIMEOUT)
+
+
 class GithubAPIClient:
     """Class responsible for all actions related to Github."""
-    def __init__(self, access_token: str) -> None:
+    def __init__(
+            self,
+            access_token: str,
+            base_url: str = GITHUB_API_URL,
+            etag_cache: Optional[ConditionalRequestCache] = None,
+            rate_limit: Optional[RateLimitBudget] = None
+    ) -> None:
         self.access_token = access_token
-        self.client = Github(access_token)
+        # REST and GraphQL apis have separate rate limits
+        self.rate_limit_key = access_token
+        self.base_url = base_url.rstrip('/')
+        self.client = Github(access_token, base_url=self.base_url)
+        self.etag_cache = etag_cache or ConditionalRequestCache()
+        self.rate_limit = rate_limit or RateLimitBudget()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'token {access_token}',
+            'Accept': 'application/vnd.github+json',
+        })
+        # Concurrent page requests reuse connections from a single pool
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to Github REST api.
+
+        GET responses are cached with their validators and revalidated on the next
+        requests, so unchanged resources are served from cache without using rate limit.
+        Every request is taken from the access token rate limit budget, shared by all workers.
+
+        :param method: HTTP method.
+        :type method: str
+        :param url: Absolute url or path relative to the api base url.
+        :type url: str
+        :raises RateLimitExhaustedException: Raised if the rate limit budget is exhausted
+        :raises GithubException: Raised if Github answers with an error status
+        :return: Response object
+        :rtype: requests.Response
+        """
+        self.rate_limit.acquire(self.rate_limit_key)
 
-    def get_repository(self, repo_fullname: str) -> Repository:
+        if not url.startswith(('http://', 'https://')):
+            url = f'{self.base_url}{url}'
+
+        cache_key = cached = None
+        if method == 'GET':
+            cache_key = self.etag_cache.make_key(self.access_token, url, kwargs.get('params'))
+            cached = self.etag_cache.get(cache_key)
+            if cached:
+                kwargs['headers'] = {
+                    **kwargs.get('headers', {}), **self.etag_cache.conditional_headers(cached)
+                }
+
+        response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+        self.rate_limit.update(self.rate_limit_key, response.headers)
+        if response.status_code >= 400:
+            raise self._build_exception(response)
+
+        if cache_key:
+            self.etag_cache.record(hit=response.status_code == 304)
+            if response.status_code == 304:
+                return self.etag_cache.to_response(cached, response)
+            self.etag_cache.set(cache_key, response)
+
+        return response
+
+    @staticmethod
+    def _build_exception(response: requests.Response) -> Exception:
+        """Build the same exception PyGithub would raise for an error response.
+
+        Rate limit errors are turned into RateLimitExhaustedException, which carries
+        when the request can be retried.
+
+        :param response: Error response from Github api.
+        :type response: requests.Response
+        :return: Exception matching the response status.
+        :rtype: Exception
+        """
+        if response.status_code in (403, 429):
+            if 'Retry-After' in response.headers:
+                return RateLimitExhaustedException(
+                    time.time() + int(response.headers['Retry-After'])
+                )
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                return RateLimitExhaustedException(int(response.headers['X-RateLimit-Reset']))
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = response.text
+
+        exception_class = GithubException
+        if response.status_code == 401:
+            exception_class = BadCredentialsException
+        elif response.status_code == 404:
+            exception_class = UnknownObjectException
+
+        return exception_class(response.status_code, data, dict(response.headers))
+
+    def get_repository(self, repo_fullname: str, lazy: bool = False) -> Repository:
         """Fetch a repository from Github given a provided full name.
 
+        Repositories metadata is cached for REPOSITORY_CACHE_TIMEOUT seconds, per access
+        token. A lazy repository is only a handle to its endpoints, e.g. to list its
+        commits, and doesn't make any request.
+
         :param repo_fullname: Repository full name (owner/repository_name)
         :type repo_fullname: str
+        :param lazy: Return a repository handle without fetching it, defaults to False
+        :type lazy: bool, optional
         :raises UnknownObjectException: Raised if a repository with the given name is not found
         :raises BadCredentialsException: Raised if invalid credentials were provided to client
         :return: Repository object
         :rtype: Repository
         """
+        if lazy:
+            return self.client.get_repo(repo_fullname, lazy=True)
+
+        cache_key = (
+            f'github:repository:{token_fingerprint(self.access_token)}:{repo_fullname.lower()}'
+        )
+        repository_cache = caches[CACHE_ALIAS]
+        cached = repository_cache.get(cache_key)
+        if cached is None:
+            response = self._request('GET', f'/repos/{repo_fullname}')
+            cached = {'data': response.json(), 'headers': dict(response.headers)}
+            repository_cache.set(cache_key, cached, REPOSITORY_CACHE_TIMEOUT)
 
-        return self.client.get_repo(repo_fullname)
+        return self.client.create_from_raw_data(Repository, cached['data'], cached['headers'])
+
+    def create_push_webhook(self, repo_fullname: str, url: str, secret: str) -> dict:
+        """Register a webhook on a Github repository to be notified of pushes.
+
+        :param repo_fullname: Repository full name (owner/repository_name)
+        :type repo_fullname: str
+        :param url: Url which will receive the push payloads.
+        :type url: str
+        :param secret: Secret used by Github to sign the payloads.
+        :type secret: str
+        :raises UnknownObjectException: Raised if the repository is not found or the user
+            can't manage its webhooks
+        :raises BadCredentialsException: Raised if invalid credentials were provided to client
+        :return: Created webhook raw data
+        :rtype: dict
+        """
+        response = self._request('POST', f'/repos/{repo_fullname}/hooks', json={
+            'name': 'web',
+            'active': True,
+            'events': ['push'],
+            'config': {
+                'url': url,
+                'content_type': 'json',
+                'secret': secret,
+                'insecure_ssl': '0',
+            },
+        })
+
+        return response.json()
 
     def get_commits_from_repository(
             self,
@@ -49,15 +268,120 @@ class GithubAPIClient:
         :return: PaginatedList object (iterable) to access the commits from the repository
         :rtype: PaginatedList[Commit]
         """
-        repo = self.get_repository(repo_fullname)
+        # Commits are listed straight from the commits endpoint, the repository isn't needed
+        repo = self.get_repository(repo_fullname, lazy=True)
 
         args = {'since': since} if since else {}
         return repo.get_commits(**args)
 
+    def get_commit_pages(
+            self,
+            repo_fullname: str,
+            since: Optional[datetime] = None,
+            concurrency: int = 1,
+            until: Optional[datetime] = None
+    ) -> Iterator[List[dict]]:
+        """
+        Fetch commits raw data from a Github repository one page at a time.
+        Only a single page is kept in memory, so huge histories can be consumed incrementally.
+        Pages are requested straight from the commits endpoint, so it costs one request per
+        page, without the extra requests PyGithub does to complete each commit object.
+
+        With concurrency greater than 1, the pages after the first one are requested
+        concurrently, up to `concurrency` at a time, and still returned in order.
+
+        :param repo_fullname: Repository full name (owner/repository_name)
+        :type repo_fullname: str
+        :param since: Date to fetch commits between it and now, defaults to None
+        :type since: Optional[datetime], optional
+        :param concurrency: Maximum number of pages requested at the same time, defaults to 1
+        :type concurrency: int, optional
+        :param until: Date to fetch commits before it, defaults to None
+        :type until: Optional[datetime], optional
+        :raises UnknownObjectException: Raised if a repository with the given name is not found
+        :raises BadCredentialsException: Raised if invalid credentials were provided to client
+        :return: Iterator over the pages, each one a list of commits raw data
+        :rtype: Iterator[List[dict]]
+        """
+        params = {'per_page': COMMITS_PER_PAGE}
+        if since:
+            params['since'] = since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        if until:
+            params['until'] = until.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        response = self._request('GET', f'/repos/{repo_fullname}/commits', params=params)
+        yield response.json()
+
+        if concurrency > 1 and 'last' in response.links:
+            yield from self._get_pages_concurrently(response.links['last']['url'], concurrency)
+            return
+
+        # Next page link already carries all the query params
+        while url := response.links.get('next', {}).get('url'):
+            response = self._request('GET', url)
+            yield response.json()
+
+    def _get_pages_concurrently(self, last_page_url: str, concurrency: int) -> Iterator[Any]:
+        """Fetch from the second to the last page of a listing concurrently, in order.
+
+        At most `concurrency` pages are requested or waiting to be consumed at a time, so
+        memory usage is bounded and pages left unconsumed aren't requested. Each request
+        is still taken from the shared rate limit budget.
+
+        :param last_page_url: Url of the last page, from the `Link` header.
+        :type last_page_url: str
+        :param concurrency: Maximum number of pages requested at the same time.
+        :type concurrency: int
+        :return: Iterator over the pages raw data.
+        :rtype: Iterator[Any]
+        """
+        parts = urlsplit(last_page_url)
+        query = dict(parse_qsl(parts.query))
+        urls = (
+            urlunsplit(parts._replace(query=urlencode({**query, 'page': page})))
+            for page in range(2, int(query['page']) + 1)
+        )
+
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, MAX_CONCURRENCY))
+        pending = deque()
+        try:
+            for url in urls:
+                pending.append(executor.submit(self._request, 'GET', url))
+                if len(pending) >= concurrency:
+                    yield pending.popleft().result().json()
+            while pending:
+                yield pending.popleft().result().json()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @classmethod
+    def for_token(cls, access_token: str, blocking: bool = True) -> "GithubAPIClient":
+        """Get the client of this process for a access token, creating it if needed.
+
+        Clients are reused, so requests made with the same access token share warm
+        connections instead of opening new ones.
+
+        :param access_token: Github access token.
+        :type access_token: str
+        :param blocking: If requests wait when the rate limit budget is low, otherwise
+            RateLimitExhaustedException is raised, defaults to True
+        :type blocking: bool, optional
+        :return: client with the access token
+        :rtype: GithubAPIClient
+        """
+        return clients_cache.get_or_create(
+            (cls, access_token, blocking),
+            lambda: cls(access_token, rate_limit=RateLimitBudget(blocking=blocking))
+        )
+
     @classmethod
     def from_request_user(cls, request_user: Any) -> "GithubAPIClient":
         """Create a GithubAPIClient from a provided Django request user.
 
+        The user access token is cached for TOKENS_CACHE_TIMEOUT seconds, so it isn't read
+        from database on every call. Request users clients are used by web requests, so they
+        raise RateLimitExhaustedException instead of waiting when the budget is low.
+
         :param request_user: Django request user
         :type request_user: Any
         :raises InvalidRequestUserException: User invalid/doesn't contain credentials
@@ -65,9 +389,11 @@ class GithubAPIClient:
         :rtype: GithubAPIClient
         """
         try:
-            social = request_user.social_auth.get(provider='github')
-            access_token = social.extra_data['access_token']
+            access_token = tokens_cache.get_or_create(
+                request_user.pk,
+                lambda: request_user.social_auth.get(provider='github').extra_data['access_token']
+            )
 
-            return cls(access_token)
+            return cls.for_token(access_token, blocking=False)
         except Exception as e:
             raise InvalidRequestUserException() from e
@@ -0,0 +1,157 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from github.GithubException import GithubException
+
+from integrations.github_api import COMMITS_PER_PAGE, GithubAPIClient
+
+# Repositories histories requested on each query
+REPOSITORIES_PER_QUERY = 10
+
+COMMIT_FIELDS = '''
+fragment CommitFields on Commit {
+  oid
+  message
+  authoredDate
+  author {
+    name
+    user {
+      avatarUrl
+    }
+  }
+}
+'''
+
+HISTORY_FIELD = '''
+  {alias}: repository(owner: $owner{index}, name: $name{index}) {{
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(first: {per_page}, since: $since{index}, after: $after{index}) {{
+            pageInfo {{
+              hasNextPage
+              endCursor
+            }}
+            nodes {{
+              ...CommitFields
+            }}
+          }}
+        }}
+      }}
+    }}
+  }}
+'''
+
+
+class GithubGraphQLClient(GithubAPIClient):
+    """Github client fetching commits from several repositories with a single request.
+
+    Each GraphQL query asks for the default branch history of up to `REPOSITORIES_PER_QUERY`
+    repositories, with only the fields needed by GraphQLCommitAdapter.
+    """
+    def __init__(self, access_token: str, **kwargs) -> None:
+        super().__init__(access_token, **kwargs)
+        self.rate_limit_key = f'{access_token}:graphql'
+
+    @staticmethod
+    def build_history_query(count: int) -> str:
+        """Build a query for the commits history of `count` repositories.
+
+        Each repository is aliased by its position (r0, r1...) and takes its own variables.
+
+        :param count: Number of repositories on the query.
+        :type count: int
+        :return: GraphQL query.
+        :rtype: str
+        """
+        variables = ', '.join(
+            f'$owner{i}: String!, $name{i}: String!, $since{i}: GitTimestamp, $after{i}: String'
+            for i in range(count)
+        )
+        fields = ''.join(
+            HISTORY_FIELD.format(alias=f'r{i}', index=i, per_page=COMMITS_PER_PAGE)
+            for i in range(count)
+        )
+        return f'query({variables}) {{{fields}}}\n{COMMIT_FIELDS}'
+
+    def query(self, query: str, variables: dict) -> dict:
+        """Run a GraphQL query.
+
+        :param query: GraphQL query.
+        :type query: str
+        :param variables: Query variables.
+        :type variables: dict
+        :raises GithubException: Raised if the query fails without returning any data
+        :return: Query result data. Fields which failed, e.g. repositories not found, are None.
+        :rtype: dict
+        """
+        response = self._request(
+            'POST', f'{self.base_url}/graphql', json={'query': query, 'variables': variables}
+        )
+        result = response.json()
+
+        if result.get('errors'):
+            if not result.get('data'):
+                raise GithubException(response.status_code, result, dict(response.headers))
+            logging.warning("Github GraphQL query partially failed: %s", result['errors'])
+
+        return result['data']
+
+    def get_commits_history(
+            self,
+            repositories_since: Dict[str, Optional[datetime]]
+    ) -> Iterator[Tuple[str, List[dict]]]:
+        """Fetch commits raw data from the default branch of several repositories.
+
+        Repositories are batched on each query and the ones with more commits are queried
+        again for their next pages, so a refresh of many repositories costs one request
+        per batch, plus one for each extra page round.
+
+        :param repositories_since: Date to fetch commits since, by repository full name
+            (owner/repository_name).
+        :type repositories_since: Dict[str, Optional[datetime]]
+        :raises BadCredentialsException: Raised if invalid credentials were provided to client
+        :return: Iterator over repository full name and a page of its commits raw data.
+            Repositories without new commits have a single empty page, and repositories not
+            found don't have any page.
+        :rtype: Iterator[Tuple[str, List[dict]]]
+        """
+        cursors = {name: None for name in repositories_since}
+
+        while cursors:
+            batch = list(cursors.items())[:REPOSITORIES_PER_QUERY]
+            variables = {}
+            for i, (name, cursor) in enumerate(batch):
+                since = repositories_since[name]
+                owner, _, repo = name.partition('/')
+                variables.update({
+                    f'owner{i}': owner,
+                    f'name{i}': repo,
+                    f'since{i}': since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    if since else None,
+                    f'after{i}': cursor,
+                })
+
+            data = self.query(self.build_history_query(len(batch)), variables)
+
+            for i, (name, cursor) in enumerate(batch):
+                repository = data.get(f'r{i}')
+                history = self._find_history(repository)
+                if history and history['pageInfo']['hasNextPage']:
+                    cursors[name] = history['pageInfo']['endCursor']
+                else:
+                    del cursors[name]
+
+                if history and history['nodes']:
+                    yield name, history['nodes']
+                elif repository is not None and cursor is None:
+                    yield name, []
+
+    @staticmethod
+    def _find_history(repository: Optional[dict]) -> Optional[dict]:
+        try:
+            return repository['defaultBranchRef']['target']['history']
+        except (KeyError, TypeError):
+            # Repository not found or without commits
+            return None
@@ -0,0 +1,147 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+from django.core.cache import caches
+
+from integrations.etag_cache import CACHE_ALIAS, token_fingerprint
+
+# Requests left unused by every caller, so workers racing between two responses, whose
+# decrements aren't synced with Github counter yet, don't overshoot the real limit
+RESERVE = 50
+# Below this remaining budget, requests are spread until the budget resets
+SLOWDOWN_THRESHOLD = 500
+MAX_DELAY = 5
+# Access tokens seen are kept in numbered slots, so concurrent workers don't overwrite
+# each other's, up to the count kept in TOKENS_COUNT_KEY
+TOKENS_KEY = 'github:ratelimit:tokens:{}'
+TOKENS_COUNT_KEY = 'github:ratelimit:tokens'
+
+
+class RateLimitExhaustedException(Exception):
+    """Represent an exception when an access token doesn't have rate limit budget left."""
+    def __init__(self, reset_at: float) -> None:
+        self.reset_at = reset_at
+        reset_date = datetime.fromtimestamp(reset_at, tz=timezone.utc)
+        super().__init__(f"Github rate limit budget exhausted until {reset_date.isoformat()}.")
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until the rate limit budget is reset."""
+        return max(int(self.reset_at - time.time()) + 1, 1)
+
+
+class RateLimitBudget:
+    """Rate limit budget of Github access tokens, shared between all workers.
+
+    The budget is updated with the `X-RateLimit-*` headers of every response and
+    decremented before every request, so concurrent workers don't overshoot it
+    between two responses. Budgets which don't block, e.g. on web requests, raise
+    RateLimitExhaustedException instead of waiting when the budget is low.
+    """
+    def __init__(
+            self,
+            cache_alias: str = CACHE_ALIAS,
+            reserve: int = RESERVE,
+            slowdown_threshold: int = SLOWDOWN_THRESHOLD,
+            blocking: bool = True
+    ) -> None:
+        self.cache = caches[cache_alias]
+        self.reserve = reserve
+        self.slowdown_threshold = slowdown_threshold
+        self.blocking = blocking
+        self._known_tokens = set()
+
+    @staticmethod
+    def _key(fingerprint: str, name: str) -> str:
+        return f'github:ratelimit:{fingerprint}:{name}'
+
+    def update(self, access_token: str, headers: Mapping[str, str]) -> None:
+        """Update the budget of an access token with the rate limit headers of a response.
+
+        :param access_token: Github access token used on the request.
+        :type access_token: str
+        :param headers: Response headers.
+        :type headers: Mapping[str, str]
+        """
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            limit = int(headers['X-RateLimit-Limit'])
+            reset = int(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+
+        fingerprint = token_fingerprint(access_token)
+        timeout = max(reset - int(time.time()), 1)
+        self.cache.set_many({
+            self._key(fingerprint, 'remaining'): remaining,
+            self._key(fingerprint, 'limit'): limit,
+            self._key(fingerprint, 'reset'): reset,
+        }, timeout)
+
+        if fingerprint not in self._known_tokens:
+            if self.cache.add(self._key(fingerprint, 'seen'), True, timeout=None):
+                self.cache.add(TOKENS_COUNT_KEY, 0, timeout=None)
+                slot = self.cache.incr(TOKENS_COUNT_KEY)
+                self.cache.set(TOKENS_KEY.format(slot), fingerprint, timeout=None)
+            self._known_tokens.add(fingerprint)
+
+    def acquire(self, access_token: str) -> None:
+        """Take one request from the budget of an access token.
+
+        When the budget is low, waits to spread the remaining requests until the reset,
+        unless the budget doesn't block.
+
+        :param access_token: Github access token to be used on the request.
+        :type access_token: str
+        :raises RateLimitExhaustedException: Raised if only the reserved budget is left, or
+            if the budget is low and doesn't block
+        """
+        fingerprint = token_fingerprint(access_token)
+        try:
+            remaining = self.cache.decr(self._key(fingerprint, 'remaining'))
+        except ValueError:
+            # Budget unknown or already reset
+            return
+
+        reset = self.cache.get(self._key(fingerprint, 'reset'))
+        if reset is None:
+            return
+
+        if remaining < self.reserve or (remaining < self.slowdown_threshold and not self.blocking):
+            raise RateLimitExhaustedException(reset)
+
+        if remaining < self.slowdown_threshold:
+            time.sleep(min(max(reset - time.time(), 0) / max(remaining, 1), MAX_DELAY))
+
+    def get(self, access_token: str) -> Optional[Dict[str, int]]:
+        """Get the budget of an access token.
+
+        :param access_token: Github access token.
+        :type access_token: str
+        :return: Remaining requests, limit and reset timestamp, if known.
+        :rtype: Optional[Dict[str, int]]
+        """
+        return self._get(token_fingerprint(access_token))
+
+    def _get(self, fingerprint: str) -> Optional[Dict[str, int]]:
+        names = ('remaining', 'limit', 'reset')
+        values = self.cache.get_many([self._key(fingerprint, name) for name in names])
+        if not values:
+            return None
+        return {name: values.get(self._key(fingerprint, name)) for name in names}
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Get the budget of every access token seen, identified by their fingerprints.
+
+        :return: Budget by access token fingerprint.
+        :rtype: Dict[str, Dict[str, int]]
+        """
+        count = self.cache.get(TOKENS_COUNT_KEY, 0)
+        slots = self.cache.get_many([TOKENS_KEY.format(slot) for slot in range(1, count + 1)])
+        snapshot = {}
+        for fingerprint in slots.values():
+            budget = self._get(fingerprint)
+            if budget:
+                snapshot[fingerprint] = budget
+        return snapshot
@@ -1,55 +1,129 @@
-from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
 
+Getter = Callable[[Any], Any]
+
+
+def compile_path(path: str, default: Any = None) -> Getter:
+    """Build a function which finds a element inside data using a provided path.
+
+    The path is split once, so the returned getter only walks the data.
+
+    :param path: Path to element, with keys separated by dots.
+    :type path: str
+    :param default: Return if value is not found, defaults to None
+    :type default: Any, optional
+    :return: Getter of the value found on provided path.
+    :rtype: Getter
+    """
+    keys = tuple(path.split('.'))
+
+    def getter(data):
+        try:
+            for key in keys:
+                data = data[key]
+            return data
+        except (KeyError, IndexError, TypeError):
+            return default
+
+    return getter
+
+
+class BaseAdapter:
+    """Base adapter class.
+
+    Subclasses map each output key to a path inside the raw data on `fields`, which is
+    compiled into getters once, when the subclass is defined.
+    """
+    fields: Dict[str, str] = {}
+    _getters: Tuple[Tuple[str, Getter], ...] = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._getters = tuple((key, compile_path(path)) for key, path in cls.fields.items())
 
-class BaseAdapter(ABC):
-    """Base adapter class."""
     @staticmethod
-    def find(path: str, data: dict, default: Any = None):
+    def find(path: str, data: dict, default: Any = None) -> Any:
         """Find a element inside data using a provided path.
 
-        :param element: Path to element.
-        :type element: str
+        Meant for one-off lookups, so the path is walked directly instead of compiled.
+
+        :param path: Path to element, with keys separated by dots.
+        :type path: str
         :param data: Data to search into.
         :type data: dict
         :param default: Return if value is not found, defaults to None
         :type default: Any, optional
         :return: Value found on provided path.
-        :rtype: _type_
+        :rtype: Any
         """
-        keys = path.split('.')
-        rv = data
         try:
-            for key in keys:
-                rv = rv[key]
-            return rv
-        except TypeError:
+            for key in path.split('.'):
+                data = data[key]
+            return data
+        except (KeyError, IndexError, TypeError):
             return default
 
     @classmethod
-    @abstractmethod
-    def from_data(cls, data: Any):
-        """Parse provided data."""
+    def from_data(cls, data: Any) -> dict:
+        """Parse provided data to dict with only the adapter fields.
 
+        :param data: Raw data.
+        :type data: Any
+        :return: Dict containing the value found for each field, or None if missing.
+        :rtype: dict
+        """
+        return {key: getter(data) for key, getter in cls._getters}
 
-class CommitAdapter(BaseAdapter):
-    """Adapter for Github commit raw data"""
     @classmethod
-    def from_data(cls, data: dict) -> dict:
-        """Parse commit raw data from Github api response to dict with only required fields.
+    def from_many(cls, iterable: Iterable[Any]) -> Iterator[dict]:
+        """Parse many raw data items, lazily.
 
-        :param data: Commit raw data from Github api
-        :type data: dict
-        :return: Dict containing only required data from commit.
-        :rtype: dict
+        :param iterable: Raw data items.
+        :type iterable: Iterable[Any]
+        :return: Iterator over dicts containing only the adapter fields.
+        :rtype: Iterator[dict]
         """
-        fields = {
-            "message": "commit.message",
-            "sha": "sha",
-            "author": "commit.author.name",
-            "url": "url",
-            "date": "commit.author.date",
-            "avatar": "author.avatar_url"
-        }
-
-        return {key: cls.find(path, data) for key, path in fields.items()}
+        getters = cls._getters
+        for data in iterable:
+            yield {key: getter(data) for key, getter in getters}
+
+
+class CommitAdapter(BaseAdapter):
+    """Adapter for Github commit raw data"""
+    fields = {
+        "message": "commit.message",
+        "sha": "sha",
+        "author": "commit.author.name",
+        "url": "url",
+        "date": "commit.author.date",
+        "avatar": "author.avatar_url"
+    }
+
+
+class PushCommitAdapter(BaseAdapter):
+    """Adapter for commits from Github push webhook payload.
+
+    Push payload commits have neither the api url nor the author avatar, so url is left
+    to be filled by the caller and avatar is only known when the author made the push.
+    """
+    fields = {
+        "message": "message",
+        "sha": "id",
+        "author": "author.name",
+        "date": "timestamp",
+    }
+
+
+class GraphQLCommitAdapter(BaseAdapter):
+    """Adapter for Github commit raw data from GraphQL api.
+
+    GraphQL commits only have the html url, so the api url is left to be filled by the
+    caller, like the REST api and push webhook commits have.
+    """
+    fields = {
+        "message": "message",
+        "sha": "oid",
+        "author": "author.name",
+        "date": "authoredDate",
+        "avatar": "author.user.avatarUrl",
+    }
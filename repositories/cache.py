@@ -0,0 +1,127 @@
+import hashlib
+import time
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+GLOBAL_SCOPE = '*'
+# Filters compared ignoring case, so their values are lowercased on the cache key
+CASE_INSENSITIVE_PARAMS = ('author', 'repository')
+
+
+class CommitListCache:
+    """Cache of commits list responses, invalidated by generation counters.
+
+    Each repository has a generation counter, plus a global one for lists not filtered
+    by repository. Cache keys carry the current generation, so bumping a counter after
+    saving commits makes every cached list of that repository unreachable at once,
+    without looking for their keys. Unreachable entries expire by themselves.
+    """
+    def __init__(self, cache_alias: str = 'default', timeout: Optional[int] = None) -> None:
+        self.cache = caches[cache_alias]
+        self.timeout = settings.COMMITS_CACHE_TIMEOUT if timeout is None else timeout
+
+    @staticmethod
+    def _generation_key(scope: str) -> str:
+        return f'commits:generation:{scope}'
+
+    def generation(self, scope: str) -> int:
+        """Get the current generation of a scope (repository name or global).
+
+        Counters start from the current time, so a counter lost by the cache doesn't
+        restart from a generation that may still have cached entries.
+
+        :param scope: Lowercase repository name or GLOBAL_SCOPE.
+        :type scope: str
+        :return: Current generation.
+        :rtype: int
+        """
+        key = self._generation_key(scope)
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, time.time_ns() // 1000, timeout=None)
+            generation = self.cache.get(key)
+        return generation
+
+    def bump(self, repository_name: str) -> None:
+        """Invalidate the cached lists including commits of a repository.
+
+        :param repository_name: Repository which had commits saved.
+        :type repository_name: str
+        """
+        for scope in (repository_name.lower(), GLOBAL_SCOPE):
+            try:
+                self.cache.incr(self._generation_key(scope))
+            except ValueError:
+                # No generation yet, so nothing was cached for this scope
+                pass
+
+    def make_key(self, query_params: Mapping[str, str]) -> str:
+        """Build the cache key of a commits list request.
+
+        :param query_params: Request query params.
+        :type query_params: Mapping[str, str]
+        :return: Cache key.
+        :rtype: str
+        """
+        params = {
+            name: value.lower() if name in CASE_INSENSITIVE_PARAMS else value
+            for name, value in query_params.items() if value
+        }
+        scope = params.get('repository', GLOBAL_SCOPE)
+        digest = hashlib.sha256(urlencode(sorted(params.items())).encode()).hexdigest()
+        return f'commits:list:{self.generation(scope)}:{digest}'
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached commits list, counting the hit or miss.
+
+        :param key: Cache key.
+        :type key: str
+        :return: Cached response data, if any.
+        :rtype: Optional[Any]
+        """
+        data = self.cache.get(key)
+        self._count('hits' if data is not None else 'misses')
+        return data
+
+    def set(self, key: str, data: Any, elapsed: float) -> None:
+        """Cache a commits list.
+
+        :param key: Cache key.
+        :type key: str
+        :param data: Response data.
+        :type data: Any
+        :param elapsed: Seconds spent building the response, which hits will save.
+        :type elapsed: float
+        """
+        self.cache.set(key, data, self.timeout)
+        self._count('miss_time_us', int(elapsed * 1_000_000))
+
+    def _count(self, name: str, value: int = 1) -> None:
+        key = f'commits:stats:{name}'
+        if not self.cache.add(key, value, timeout=None):
+            self.cache.incr(key, value)
+
+    def stats(self) -> Dict[str, float]:
+        """Get the hit ratio and the estimated time saved by hits.
+
+        :return: Hits, misses, hit ratio, average miss time and time saved, in milliseconds.
+        :rtype: Dict[str, float]
+        """
+        counters = self.cache.get_many(
+            [f'commits:stats:{name}' for name in ('hits', 'misses', 'miss_time_us')]
+        )
+        hits = counters.get('commits:stats:hits', 0)
+        misses = counters.get('commits:stats:misses', 0)
+        miss_time_ms = counters.get('commits:stats:miss_time_us', 0) / 1000
+        average_miss_ms = miss_time_ms / misses if misses else 0
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0,
+            'average_miss_ms': round(average_miss_ms, 2),
+            'saved_ms': round(hits * average_miss_ms, 2),
+        }
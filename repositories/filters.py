@@ -1,12 +1,59 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q, QuerySet, Value
+from django.db.models.functions import Upper
 from django_filters import rest_framework as filters
 
-from .models import Commit
+from .models import COMMIT_SEARCH_CONFIG, Commit, Repository
 
 
 class CommitFilter(filters.FilterSet):
-    author = filters.CharFilter(field_name='author', lookup_expr='iexact')
-    repository = filters.CharFilter(field_name='repository__name', lookup_expr='iexact')
+    """Case insensitive filters written so they can use the Commit indexes."""
+    author = filters.CharFilter(method='filter_author')
+    repository = filters.CharFilter(method='filter_repository')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Commit
-        fields = ('author', 'repository')
+        fields = ('author', 'repository', 'search')
+
+    @staticmethod
+    def filter_author(queryset: QuerySet, _name: str, value: str) -> QuerySet:
+        """Filter by author, comparing the same UPPER(author) expression that is indexed.
+
+        `iexact` lookup casts the column on some databases, so it can't use the index.
+        """
+        return queryset.alias(author_upper=Upper('author')).filter(
+            author_upper=Upper(Value(value))
+        )
+
+    @staticmethod
+    def filter_repository(queryset: QuerySet, _name: str, value: str) -> QuerySet:
+        """Filter by repository name, looking up the repositories ids first.
+
+        Filtering commits by the repository id instead of joining the repositories table
+        lets the database read them straight from the (repository, date) index.
+        """
+        repository_ids = list(
+            Repository.objects.filter(name__iexact=value).values_list('pk', flat=True)
+        )
+        return queryset.filter(repository_id__in=repository_ids)
+
+    @staticmethod
+    def filter_search(queryset: QuerySet, _name: str, value: str) -> QuerySet:
+        """Search commits messages, from the most relevant to the least on Postgres.
+
+        Words are matched on any of their forms by the full-text index, e.g. `reverting`
+        matches `revert`, and partial tokens, like ticket keys, by the UPPER(message) trigram
+        index, which `icontains` lookup uses. Other databases fall back to `icontains` only.
+        Cursor pagination keeps its own ordering, by date.
+        """
+        if connection.vendor != 'postgresql':
+            return queryset.filter(message__icontains=value)
+
+        query = SearchQuery(value, config=COMMIT_SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(
+            Q(search_vector=query) | Q(message__icontains=value)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-date', 'id')
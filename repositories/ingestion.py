@@ -0,0 +1,131 @@
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, transaction
+
+from repositories.adapters import PushCommitAdapter
+from repositories.cache import CommitListCache
+from repositories.models import COMMIT_SEARCH_CONFIG, Commit, Repository
+from repositories.serializers import CommitSerializer
+
+COMMIT_UPDATE_FIELDS = ('message', 'author', 'url', 'date', 'avatar')
+# Github lists at most this number of commits on a push webhook payload
+PUSH_PAYLOAD_COMMITS_LIMIT = 2048
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most `size` elements.
+
+    :param iterable: Iterable to be split.
+    :type iterable: Iterable
+    :param size: Maximum number of elements on each chunk.
+    :type size: int
+    :return: Iterator over the chunks.
+    :rtype: Iterator[List]
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def save_commits(
+        repository: Repository,
+        commits_data: Iterable[dict],
+        batch_size: Optional[int] = None
+) -> int:
+    """Validate and upsert commits data of a repository in batches.
+
+    Commits are unique per repository and sha, so saving the same commits again
+    updates the existing rows instead of duplicating them. On Postgres, their messages
+    search vectors are updated too. Once saved, cached commits lists of the repository
+    are invalidated.
+
+    :param repository: Repository which the commits belong to.
+    :type repository: Repository
+    :param commits_data: Commits data, as returned by CommitAdapter.
+    :type commits_data: Iterable[dict]
+    :param batch_size: Number of commits validated and written per statement,
+        defaults to COMMITS_INGESTION_BATCH_SIZE setting.
+    :type batch_size: Optional[int], optional
+    :raises ValidationError: Raised if any of the commits data is invalid.
+    :return: Number of commits saved.
+    :rtype: int
+    """
+    batch_size = batch_size or settings.COMMITS_INGESTION_BATCH_SIZE
+    saved = 0
+
+    with transaction.atomic():
+        for batch in chunked(commits_data, batch_size):
+            serializer = CommitSerializer(data=batch, many=True)
+            serializer.is_valid(raise_exception=True)
+
+            # A single upsert statement can't touch the same row twice
+            commits_by_sha = {data['sha']: data for data in serializer.validated_data}
+            commits = [
+                Commit(repository=repository, **data) for data in commits_by_sha.values()
+            ]
+
+            Commit.objects.bulk_create(
+                commits,
+                update_conflicts=True,
+                unique_fields=('repository', 'sha'),
+                update_fields=COMMIT_UPDATE_FIELDS,
+            )
+            if connection.vendor == 'postgresql':
+                Commit.objects.filter(repository=repository, sha__in=commits_by_sha).update(
+                    search_vector=SearchVector('message', config=COMMIT_SEARCH_CONFIG)
+                )
+            saved += len(commits)
+
+        if saved:
+            transaction.on_commit(lambda: CommitListCache().bump(repository.name))
+
+    return saved
+
+
+def update_sync_cursor(repository: Repository, synced_at: datetime) -> Repository:
+    """Point the repository sync cursor to its newest saved commit.
+
+    :param repository: Repository that was synced.
+    :type repository: Repository
+    :param synced_at: Date when the sync finished successfully.
+    :type synced_at: datetime
+    :return: Updated repository.
+    :rtype: Repository
+    """
+    last_commit = repository.commit_set.order_by('-date').only('sha', 'date').first()
+    if last_commit:
+        repository.last_commit_sha = last_commit.sha
+        repository.last_commit_date = last_commit.date
+    repository.last_synced_at = synced_at
+
+    repository.save(update_fields=('last_commit_sha', 'last_commit_date', 'last_synced_at'))
+    return repository
+
+
+def save_push_event(repository: Repository, payload: dict) -> Tuple[int, bool]:
+    """Save the commits from a Github push webhook payload.
+
+    :param repository: Repository which received the push.
+    :type repository: Repository
+    :param payload: Push webhook payload.
+    :type payload: dict
+    :return: Number of commits saved and if the payload commits list was truncated.
+    :rtype: Tuple[int, bool]
+    """
+    commits_url = payload['repository']['commits_url']
+    sender = payload.get('sender') or {}
+
+    commits_data = []
+    for commit in payload['commits']:
+        commit_data = PushCommitAdapter.from_data(commit)
+        commit_data['url'] = commits_url.replace('{/sha}', f"/{commit_data['sha']}")
+        if (commit.get('author') or {}).get('username') == sender.get('login'):
+            commit_data['avatar'] = sender.get('avatar_url')
+        commits_data.append(commit_data)
+
+    saved = save_commits(repository, commits_data)
+    return saved, len(payload['commits']) >= PUSH_PAYLOAD_COMMITS_LIMIT
@@ -0,0 +1,185 @@
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Sequence
+
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from repositories.cache import CommitListCache
+from repositories.models import COMMIT_SEARCH_CONFIG, Commit, Repository
+
+WORDS = (
+    'add', 'fix', 'remove', 'update', 'refactor', 'bump', 'merge', 'revert', 'handle', 'support',
+    'cache', 'commits', 'repository', 'webhook', 'pagination', 'serializer', 'view', 'task',
+    'migration', 'index', 'query', 'filter', 'author', 'date', 'test', 'docs', 'error', 'retry',
+    'token', 'client', 'worker', 'queue', 'page', 'limit', 'config', 'settings', 'api', 'model',
+    'when', 'missing', 'empty', 'invalid', 'slow', 'duplicated', 'new', 'old', 'for', 'on', 'the',
+)
+FIRST_NAMES = (
+    'Ana', 'Bruno', 'Carla', 'Diego', 'Elena', 'Felipe', 'Gabi', 'Hugo', 'Iris', 'João',
+    'Kim', 'Lucas', 'Maya', 'Noah', 'Olga', 'Pedro', 'Quinn', 'Rosa', 'Sam', 'Tomás',
+)
+LAST_NAMES = (
+    'Silva', 'Santos', 'Smith', 'Lee', 'Garcia', 'Müller', 'Rossi', 'Kowalski', 'Tanaka', 'Costa',
+)
+# Distinct messages generated up front, sampling them is much cheaper than building each one
+MESSAGES_POOL_SIZE = 10_000
+COMMIT_COLUMNS = ('message', 'sha', 'author', 'url', 'date', 'avatar', 'repository_id')
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of a Zipf distribution, where the k-th item weights 1 / k^exponent.
+
+    :param count: Number of items.
+    :type count: int
+    :param exponent: Skew of the distribution, higher values concentrate more on the first items.
+    :type exponent: float
+    :return: Cumulative weights, for random.choices.
+    :rtype: List[float]
+    """
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class CommitsGenerator:
+    """Generate synthetic commits rows, with values in COMMIT_COLUMNS order.
+
+    Commits come in bursts: each burst belongs to a repository and an author, drawn from
+    Zipf distributions, and its commits are minutes apart. Bursts are more frequent on
+    recent dates.
+    """
+    def __init__(self, repositories: Sequence[tuple], options: dict) -> None:
+        self.random = random.Random(options['seed'])
+        self.days = options['days']
+        self.repositories = repositories
+        self.repositories_weights = zipf_cum_weights(len(repositories), options['skew'])
+        self.authors = self.build_authors(options['authors'])
+        self.authors_weights = zipf_cum_weights(len(self.authors), options['skew'])
+        self.messages = [self.build_message() for _ in range(MESSAGES_POOL_SIZE)]
+
+    def build_authors(self, count: int) -> List[tuple]:
+        authors = []
+        for i in range(count):
+            name = f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)} {i}'
+            # Commits by emails not linked to a Github user have no avatar
+            avatar = f'https://avatars.githubusercontent.com/u/{i}' if i % 10 else None
+            authors.append((name, avatar))
+        return authors
+
+    def build_message(self) -> str:
+        summary = ' '.join(self.random.choices(WORDS, k=self.random.randint(3, 10))).capitalize()
+        paragraphs = [
+            ' '.join(self.random.choices(WORDS, k=self.random.randint(10, 60))).capitalize() + '.'
+            for _ in range(int(self.random.expovariate(1)))
+        ]
+        return '\n\n'.join([summary, *paragraphs])
+
+    def generate(self, count: int) -> Iterator[tuple]:
+        now = datetime.now(tz=timezone.utc)
+        rand = self.random
+
+        generated = 0
+        while generated < count:
+            (repository_id, name), = rand.choices(
+                self.repositories, cum_weights=self.repositories_weights
+            )
+            (author, avatar), = rand.choices(self.authors, cum_weights=self.authors_weights)
+            date = now - timedelta(days=self.days * rand.random() ** 2)
+
+            for _ in range(min(1 + int(rand.expovariate(1 / 4)), count - generated)):
+                sha = f'{rand.getrandbits(160):040x}'
+                yield (
+                    rand.choice(self.messages),
+                    sha,
+                    author,
+                    f'https://api.github.com/repos/{name}/commits/{sha}',
+                    date,
+                    avatar,
+                    repository_id,
+                )
+                date -= timedelta(minutes=rand.expovariate(1 / 20))
+                generated += 1
+
+
+class Command(BaseCommand):
+    help = "Seed the database with synthetic repositories and commits, for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repositories', type=int, default=1_000)
+        parser.add_argument('--commits', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=5_000)
+        parser.add_argument('--days', type=int, default=365, help="Age of the oldest commits.")
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help="Zipf exponent of commits per repository and per author."
+        )
+        parser.add_argument('--chunk-size', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, help="Random seed, for reproducible datasets.")
+
+    def handle(self, *args, **options):
+        if options['repositories'] < 1 or options['authors'] < 1:
+            raise CommandError("--repositories and --authors must be at least 1.")
+        start = time.perf_counter()
+
+        repositories = self.create_repositories(options['repositories'])
+        commits = CommitsGenerator(repositories, options).generate(options['commits'])
+        load = self.copy_commits if connection.vendor == 'postgresql' else self.insert_commits
+
+        saved = 0
+        chunks = iter(lambda: list(itertools.islice(commits, options['chunk_size'])), [])
+        for chunk in chunks:
+            with transaction.atomic():
+                load(chunk)
+            saved += len(chunk)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{saved:,} commits, {saved / elapsed:,.0f} commits/s")
+
+        # COPY skips save_commits, so messages search vectors are filled in a single pass
+        if connection.vendor == 'postgresql':
+            Commit.objects.filter(search_vector__isnull=True).update(
+                search_vector=SearchVector('message', config=COMMIT_SEARCH_CONFIG)
+            )
+
+        # Lists cached before the seed would hide the new commits
+        commits_cache = CommitListCache()
+        for _, name in repositories:
+            commits_cache.bump(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {saved:,} commits on {len(repositories):,} repositories "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
+
+    def create_repositories(self, count: int) -> List[tuple]:
+        names = [f'seed-owner-{i % 100}/seed-repo-{i}' for i in range(count)]
+        Repository.objects.bulk_create(
+            [Repository(name=name, status=Repository.Status.READY) for name in names],
+            batch_size=1_000,
+            ignore_conflicts=True,
+        )
+        return list(
+            Repository.objects.filter(name__in=names).order_by('id').values_list('id', 'name')
+        )
+
+    def insert_commits(self, rows: List[tuple]) -> None:
+        Commit.objects.bulk_create(
+            [Commit(**dict(zip(COMMIT_COLUMNS, row))) for row in rows],
+            batch_size=1_000,
+            ignore_conflicts=True,
+        )
+
+    def copy_commits(self, rows: List[tuple]) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Commit._meta.db_table} ({', '.join(COMMIT_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
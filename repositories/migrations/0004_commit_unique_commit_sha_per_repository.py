@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicated_commits(apps, schema_editor):
+    """Keep only the most recently inserted commit for each (repository, sha) pair."""
+    Commit = apps.get_model('repositories', 'Commit')
+
+    duplicates = (
+        Commit.objects.values('repository', 'sha')
+        .annotate(last_id=Max('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        Commit.objects.filter(
+            repository=duplicate['repository'],
+            sha=duplicate['sha'],
+        ).exclude(id=duplicate['last_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0003_alter_commit_avatar'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_commits, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='commit',
+            constraint=models.UniqueConstraint(
+                fields=('repository', 'sha'),
+                name='unique_commit_sha_per_repository',
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0004_commit_unique_commit_sha_per_repository'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='last_commit_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_commit_sha',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('repositories', '0005_repository_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='repositories', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='webhook_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0006_repository_created_by_webhook_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['-date', 'id'], name='commit_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['repository', '-date'], name='commit_repository_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(django.db.models.functions.text.Upper('author'), models.OrderBy(models.F('date'), descending=True), name='commit_upper_author_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='commit',
+            name='repository',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='repositories.repository'),
+        ),
+    ]
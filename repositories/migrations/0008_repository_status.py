@@ -0,0 +1,29 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0007_commit_indexes'),
+    ]
+
+    operations = [
+        # Repositories created before were already validated and synced
+        migrations.AddField(
+            model_name='repository',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('validating', 'Validating'), ('syncing', 'Syncing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='repository',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('validating', 'Validating'), ('syncing', 'Syncing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='status_detail',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
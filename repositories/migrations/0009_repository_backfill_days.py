@@ -0,0 +1,19 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:01
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0008_repository_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='backfill_days',
+            field=models.PositiveIntegerField(default=30, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1825)]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0009_repository_backfill_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='sync_checkpoint',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_SEARCH_INDEXES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "UPDATE repositories_commit SET search_vector = to_tsvector('english', message)",
+    'CREATE INDEX commit_search_vector_idx ON repositories_commit USING gin (search_vector)',
+    # icontains lookup compares UPPER(message) on Postgres
+    'CREATE INDEX commit_upper_message_trgm_idx ON repositories_commit '
+    'USING gin (UPPER(message) gin_trgm_ops)',
+)
+DROP_SEARCH_INDEXES = (
+    'DROP INDEX IF EXISTS commit_upper_message_trgm_idx',
+    'DROP INDEX IF EXISTS commit_search_vector_idx',
+)
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0010_repository_sync_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgres(CREATE_SEARCH_INDEXES), run_on_postgres(DROP_SEARCH_INDEXES)
+        ),
+    ]
@@ -1,12 +1,66 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+
+# Longest history fetched on a repository first sync
+MAX_BACKFILL_DAYS = 365 * 5
+# Text search configuration of commits messages
+COMMIT_SEARCH_CONFIG = 'english'
 
 
 class Repository(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        VALIDATING = 'validating'
+        SYNCING = 'syncing'
+        READY = 'ready'
+        FAILED = 'failed'
+
     name = models.CharField(max_length=100, unique=True)
 
+    # Registration pipeline state: pending -> validating -> syncing -> ready/failed
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    status_detail = models.CharField(max_length=255, blank=True, default='')
+
+    # Sync cursor, used to fetch only commits newer than the ones already saved
+    last_commit_sha = models.CharField(max_length=100, blank=True, default='')
+    last_commit_date = models.DateTimeField(blank=True, null=True)
+    last_synced_at = models.DateTimeField(blank=True, null=True)
+    # Commit date of the oldest page saved by an unfinished sync, which resumes from it
+    sync_checkpoint = models.DateTimeField(blank=True, null=True)
+    # Days of history fetched on the first sync
+    backfill_days = models.PositiveIntegerField(
+        default=30, validators=(MinValueValidator(1), MaxValueValidator(MAX_BACKFILL_DAYS))
+    )
+
+    # User whose Github credentials are used on background syncs
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='repositories',
+    )
+    webhook_id = models.BigIntegerField(blank=True, null=True)
+
     def __str__(self):
         return self.name
 
+    def set_status(self, status: str, detail: str = '') -> None:
+        """Move the repository to a registration pipeline state.
+
+        :param status: New state, one of Repository.Status.
+        :type status: str
+        :param detail: Reason of the state, e.g. why it failed, defaults to ''
+        :type detail: str, optional
+        """
+        self.status = status
+        self.status_detail = detail[:self._meta.get_field('status_detail').max_length]
+        self.save(update_fields=('status', 'status_detail'))
+
     class Meta:
         verbose_name_plural = 'Repositories'
 
@@ -18,11 +72,28 @@ class Commit(models.Model):
     url = models.URLField(max_length=200)
     date = models.DateTimeField()
     avatar = models.URLField(max_length=200, blank=False, null=True)
+    # Message lexemes, filled on ingestion on Postgres only
+    search_vector = SearchVectorField(null=True, editable=False)
 
-    repository = models.ForeignKey(Repository, on_delete=models.CASCADE)
+    # Indexed as the prefix of commit_repository_date_idx
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE, db_index=False)
 
     def __str__(self):
         return self.message
 
     class Meta:
         ordering = ('-date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('repository', 'sha'),
+                name='unique_commit_sha_per_repository',
+            ),
+        )
+        # Match CommitsView ordering, with and without CommitFilter lookups
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='commit_date_id_idx'),
+            models.Index(fields=('repository', '-date'), name='commit_repository_date_idx'),
+            models.Index(Upper('author'), F('date').desc(), name='commit_upper_author_date_idx'),
+        )
+        # search_vector GIN and UPPER(message) trigram indexes are Postgres only, so they're
+        # created by migration 0011 instead
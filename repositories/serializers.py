@@ -2,11 +2,30 @@ from rest_framework import serializers
 
 from .models import Commit, Repository
 
+# Repositories registered on a single bulk request
+MAX_BULK_REPOSITORIES = 1000
+
 
 class RepositorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Repository
-        fields = ('name',)
+        fields = ('name', 'backfill_days')
+
+
+class RepositoryStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Repository
+        fields = ('id', 'name', 'status', 'status_detail', 'backfill_days', 'last_synced_at')
+        read_only_fields = fields
+
+
+# Only validates the names, the repositories are created by RepositoriesBulkView
+class BulkRepositorySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=Repository._meta.get_field('name').max_length),
+        allow_empty=False,
+        max_length=MAX_BULK_REPOSITORIES,
+    )
 
 
 class CommitSerializer(serializers.ModelSerializer):
@@ -0,0 +1,74 @@
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class RepositorySyncLock:
+    """Lease on a repository sync, so a single sync of each repository runs at a time.
+
+    The lease expires if its holder stops renewing it, e.g. if its worker dies. Syncs
+    started while the repository is locked leave a flag for the holder to run again once
+    it finishes, instead of running at the same time.
+    """
+    def __init__(
+            self,
+            repository_id: int,
+            token: Optional[str] = None,
+            cache_alias: str = 'default',
+            timeout: Optional[int] = None
+    ) -> None:
+        self.key = f'repositories:sync_lock:{repository_id}'
+        self.rerun_key = f'{self.key}:rerun'
+        self.token = token or uuid.uuid4().hex
+        self.cache = caches[cache_alias]
+        self.timeout = timeout or settings.REPOSITORY_SYNC_LOCK_TIMEOUT
+
+    def acquire(self) -> bool:
+        """Take the lease, if nobody else holds it.
+
+        A lease held with the same token is taken again, e.g. by a task redelivered after
+        its worker was lost. Reruns requested before are dropped, as the new holder syncs
+        from scratch anyway.
+
+        :return: True if the lease was taken.
+        :rtype: bool
+        """
+        if not self.cache.add(self.key, self.token, self.timeout) and not self.heartbeat():
+            return False
+        self.cache.delete(self.rerun_key)
+        return True
+
+    def heartbeat(self, timeout: Optional[int] = None) -> bool:
+        """Renew the lease, if it's still held.
+
+        :param timeout: Seconds until the lease expires, defaults to the lock timeout.
+        :type timeout: Optional[int], optional
+        :return: True if the lease is still held and was renewed.
+        :rtype: bool
+        """
+        if self.cache.get(self.key) != self.token:
+            return False
+        return self.cache.touch(self.key, timeout or self.timeout)
+
+    def release(self) -> bool:
+        """Give the lease up, if it's still held.
+
+        :return: True if a rerun was requested while the lease was held.
+        :rtype: bool
+        """
+        if self.cache.get(self.key) == self.token:
+            self.cache.delete(self.key)
+        # Read after the lease is given up, so reruns requested later can take it instead
+        rerun = self.cache.get(self.rerun_key, False)
+        self.cache.delete(self.rerun_key)
+        return rerun
+
+    def request_rerun(self) -> None:
+        """Ask the lease holder to sync again once it finishes.
+
+        It's requested before trying to acquire the lease, so a holder releasing it meanwhile
+        either reruns, or leaves the lease to be taken.
+        """
+        self.cache.set(self.rerun_key, True, self.timeout)
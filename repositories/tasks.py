@@ -1,40 +1,677 @@
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from celery import shared_task
-from django.db import transaction
+import requests
+from celery import chord, shared_task
+from celery.exceptions import Retry
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from github.GithubException import (BadCredentialsException, GithubException,
+                                    UnknownObjectException)
 
-from githubmonitor.celery import app  # noqa: F401
-from integrations.github_api import GithubAPIClient
-from repositories.adapters import CommitAdapter
+from githubmonitor.celery import REFRESH_QUEUE, app  # noqa: F401
+from integrations.github_api import (GITHUB_API_URL, GithubAPIClient,
+                                     InvalidRequestUserException)
+from integrations.github_graphql import GithubGraphQLClient
+from integrations.rate_limit import RateLimitExhaustedException
+from repositories.adapters import (BaseAdapter, CommitAdapter,
+                                   GraphQLCommitAdapter)
+from repositories.ingestion import chunked, save_commits, update_sync_cursor
 from repositories.models import Repository
-from repositories.serializers import CommitSerializer
+from repositories.sync_lock import RepositorySyncLock
+
+
+def until_known_commit(pages: Iterable[List[dict]], known_sha: str) -> Iterator[List[dict]]:
+    """Stop consuming commits pages once a commit with the known sha is found.
+
+    Pages are ordered from the newest to the oldest commit, so everything after the
+    known commit was already saved on a previous sync.
+
+    :param pages: Pages of commits raw data.
+    :type pages: Iterable[List[dict]]
+    :param known_sha: Sha of the newest commit already saved.
+    :type known_sha: str
+    :return: Iterator over the pages, with the known commit and older ones left out.
+    :rtype: Iterator[List[dict]]
+    """
+    for page in pages:
+        shas = [commit_data.get('sha') for commit_data in page]
+        if known_sha and known_sha in shas:
+            yield page[:shas.index(known_sha)]
+            return
+        yield page
+
+
+def register_push_webhook(
+        gh_client: GithubAPIClient,
+        repository: Repository,
+        webhook_url: str
+) -> None:
+    """Register a push webhook on the repository, so new commits are pushed to us.
+
+    Users without admin rights on the repository can't create webhooks, neither can be
+    created without GITHUB_WEBHOOK_SECRET setting, in which case its commits are only
+    fetched by polling.
+
+    :param gh_client: Github client with the credentials of who added the repository.
+    :type gh_client: GithubAPIClient
+    :param repository: Repository to be watched.
+    :type repository: Repository
+    :param webhook_url: Url which will receive the push payloads.
+    :type webhook_url: str
+    """
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        logging.info("No webhook secret set, skipping push webhook on %s.", repository.name)
+        return
+
+    try:
+        webhook = gh_client.create_push_webhook(
+            repository.name, webhook_url, settings.GITHUB_WEBHOOK_SECRET
+        )
+    except (GithubException, RateLimitExhaustedException):
+        logging.warning("Could not register push webhook on %s.", repository.name, exc_info=True)
+        return
+
+    repository.webhook_id = webhook['id']
+    repository.save(update_fields=('webhook_id',))
 
 
 @shared_task
-def get_last_30_days_repo_commits(github_access_token: str, repository_id: int):
-    """Fetch last 30 days commits of a repository and save them to database.
+def register_push_webhooks(github_access_token: str, repository_ids: List[int], webhook_url: str):
+    """Register push webhooks on several repositories.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_ids: Repositories ids (pk) from database.
+    :type repository_ids: List[int]
+    :param webhook_url: Url which will receive the push payloads.
+    :type webhook_url: str
+    """
+    gh_client = GithubAPIClient.for_token(github_access_token)
+    for repository in Repository.objects.filter(pk__in=repository_ids, webhook_id__isnull=True):
+        register_push_webhook(gh_client, repository, webhook_url)
+
+
+@shared_task(bind=True)
+def validate_repository(self, github_access_token: str, repository_id: int, webhook_url: str):
+    """Check if a newly created repository exists on Github and start its sync.
+
+    Repositories found get a push webhook registered and their commits backfilled.
+    Otherwise, they are marked as failed with the reason. On network or Github server
+    errors, the check is retried with exponential backoff, up to SYNC_MAX_RETRIES times.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    :param webhook_url: Url which will receive the push payloads.
+    :type webhook_url: str
+    """
+    gh_client = GithubAPIClient.for_token(github_access_token)
+    repository = Repository.objects.get(pk=repository_id)
+    repository.set_status(Repository.Status.VALIDATING)
+
+    try:
+        gh_client.get_repository(repository.name)
+    except UnknownObjectException:
+        repository.set_status(Repository.Status.FAILED, "Repository not found on Github.")
+        return
+    except BadCredentialsException:
+        repository.set_status(Repository.Status.FAILED, "Github credentials are invalid.")
+        return
+    except RateLimitExhaustedException as e:
+        logging.warning("%s Deferring %s validation.", e, repository.name)
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+    except Exception as e:
+        if is_transient_error(e) and self.request.retries < settings.SYNC_MAX_RETRIES:
+            countdown = retry_backoff(self.request.retries)
+            logging.warning(
+                "Could not validate %s: %s. Retrying in %ss.", repository.name, e, countdown
+            )
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        repository.set_status(Repository.Status.FAILED, f"Could not validate repository: {e}")
+        raise
+
+    register_push_webhook(gh_client, repository, webhook_url)
+    get_last_30_days_repo_commits.delay(github_access_token, repository.id)
+
+
+def sync_since(repository: Repository, now: Optional[datetime] = None) -> datetime:
+    """Get the date to fetch commits of a repository since.
+
+    :param repository: Repository to be synced.
+    :type repository: Repository
+    :param now: Backfill window end, defaults to now.
+    :type now: Optional[datetime], optional
+    :return: Its sync cursor date, if it's within its backfill window, or the window start,
+        at midnight so requests stay the same, and keep their ETags, for the whole day.
+    :rtype: datetime
+    """
+    now = now or datetime.now(tz=timezone.utc)
+    since = (now - timedelta(days=repository.backfill_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if repository.last_commit_date and repository.last_commit_date > since:
+        since = repository.last_commit_date
+    return since
+
+
+def backfill_slices(since: datetime, until: datetime, days: int) -> List[Tuple[datetime, datetime]]:
+    """Split a backfill window into slices of `days` days, newest first.
+
+    A remainder shorter than a day, left by the window start truncated to midnight, is
+    fetched by the oldest slice.
+
+    :param since: Window start.
+    :type since: datetime
+    :param until: Window end.
+    :type until: datetime
+    :param days: Slices length, in days.
+    :type days: int
+    :return: Slices start and end dates.
+    :rtype: List[Tuple[datetime, datetime]]
+    """
+    slices = []
+    while until > since:
+        start = until - timedelta(days=days)
+        if start - since < timedelta(days=1):
+            start = since
+        slices.append((start, until))
+        until = start
+    return slices
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Check if an error fetching commits is likely to go away if retried.
+
+    :param error: Error raised while fetching commits.
+    :type error: Exception
+    :return: True for network errors and Github server errors.
+    :rtype: bool
+    """
+    if isinstance(error, requests.RequestException):
+        return True
+    return isinstance(error, GithubException) and error.status >= 500
+
+
+def retry_backoff(retries: int) -> int:
+    """Get the seconds to wait before retrying a task which failed on a transient error.
+
+    :param retries: Number of times the task was retried so far.
+    :type retries: int
+    :return: Exponential backoff with full jitter, from SYNC_RETRY_BACKOFF up to
+        SYNC_RETRY_BACKOFF_MAX seconds.
+    :rtype: int
+    """
+    return get_exponential_backoff_interval(
+        settings.SYNC_RETRY_BACKOFF, retries, settings.SYNC_RETRY_BACKOFF_MAX, full_jitter=True
+    )
+
+
+def page_checkpoint(page: List[dict]) -> Optional[datetime]:
+    """Get the commit date of the oldest commit of a page, to resume a sync from it.
+
+    Github lists commits by their commit date, which may be newer than the author date
+    of rebased commits.
+
+    :param page: Page of commits raw data, from the newest to the oldest commit.
+    :type page: List[dict]
+    :return: Commit date of the oldest commit, or None if the page is empty.
+    :rtype: Optional[datetime]
+    """
+    if not page:
+        return None
+    date = (
+        BaseAdapter.find('commit.committer.date', page[-1])
+        or BaseAdapter.find('commit.author.date', page[-1])
+    )
+    return parse_datetime(date) if date else None
+
+
+# Redelivered if the worker is lost, e.g. on deploys, and resumed from the checkpoint
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def get_last_30_days_repo_commits(self, github_access_token: str, repository_id: int):
+    """Fetch commits of a repository within its backfill window and save them to database.
+
+    Commits are fetched, adapted and saved one page at a time, so memory usage doesn't grow
+    with the repository activity and already saved pages are kept if the task fails.
+
+    If the repository was synced before, only commits newer than its sync cursor are fetched,
+    one page at a time. Otherwise, pages are fetched concurrently to speed up the backfill,
+    and windows longer than COMMITS_BACKFILL_SLICE_DAYS are split into slices fetched by
+    their own tasks, finished by finish_repository_sync.
+    If the Github rate limit budget runs out, the task is retried once the budget is reset.
+    On network or Github server errors, it's retried with exponential backoff, up to
+    SYNC_MAX_RETRIES times. Either way, the sync resumes from the oldest page saved.
+    The repository is syncing meanwhile, and then ready or failed.
+
+    A single sync of each repository runs at a time. Syncs started meanwhile are collapsed
+    into a single sync, started once the running one finishes.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    """
+    # Retries and redeliveries keep the task id, so they take the same lock again
+    lock = RepositorySyncLock(repository_id, token=self.request.id)
+    lock.request_rerun()
+    if not lock.acquire():
+        logging.info("Repository %s is already syncing, it will sync again after.", repository_id)
+        return
+
+    try:
+        handed_over = sync_repository(self, github_access_token, repository_id, lock)
+    except Retry:
+        # Retries keep the task id, so they take the lock again, unless it expired meanwhile
+        raise
+    except Exception:
+        release_sync_lock(github_access_token, repository_id, lock)
+        raise
+
+    if not handed_over:
+        release_sync_lock(github_access_token, repository_id, lock)
+
+
+def sync_repository(
+        task,
+        github_access_token: str,
+        repository_id: int,
+        lock: RepositorySyncLock
+) -> bool:
+    """Sync a repository commits, on behalf of get_last_30_days_repo_commits.
+
+    :param task: Bound task, retried if the Github rate limit budget runs out.
+    :type task: celery.Task
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    :param lock: Sync lock held for the repository.
+    :type lock: RepositorySyncLock
+    :return: True if the sync was split into slices, which release the lock once finished.
+    :rtype: bool
+    """
+    repository = Repository.objects.get(pk=repository_id)
+    repository.set_status(Repository.Status.SYNCING)
+    now = datetime.now(tz=timezone.utc)
+    since = sync_since(repository, now)
+
+    until = repository.sync_checkpoint
+    if until:
+        logging.info("Resuming %s sync from %s.", repository.name, until)
+    elif not repository.last_commit_sha:
+        slices = backfill_slices(since, now, settings.COMMITS_BACKFILL_SLICE_DAYS)
+        if len(slices) > 1:
+            logging.info(
+                "Backfilling %s since %s in %s slices.", repository.name, since, len(slices)
+            )
+            # Slices don't renew the lock, so it's held long enough for all of them, unless
+            # released earlier if any of them fails
+            lock.heartbeat(timeout=settings.REPOSITORY_SYNC_LOCK_TIMEOUT * len(slices))
+            lock_args = (repository.id, github_access_token, lock.token)
+            callback = finish_repository_sync.si(*lock_args)
+            callback.on_error(abort_repository_sync.si(*lock_args))
+            # Newest slices first, and ahead of older slices of other repositories backfills
+            chord([
+                get_repo_commits_slice.si(
+                    github_access_token, repository.id, (start.isoformat(), end.isoformat())
+                ).set(priority=min(index, 9)) for index, (start, end) in enumerate(slices)
+            ])(callback)
+            return True
+
+    logging.info("Fetching commits for %s since: %s", repository.name, since)
+
+    # Incremental syncs usually stop on the first page, so extra pages would be wasted
+    concurrency = 1 if repository.last_commit_sha else settings.COMMITS_FETCH_CONCURRENCY
+    saved = fetch_commits(
+        task,
+        github_access_token,
+        repository,
+        lock=lock,
+        persist_checkpoint=True,
+        since=since,
+        until=until,
+        concurrency=concurrency,
+    )
+    if saved is None:
+        return False
+
+    finish_repository_sync(repository.id)
+    logging.info("Saved %s commits from %s.", saved, repository.name)
+    return False
+
+
+def release_sync_lock(
+        github_access_token: str,
+        repository_id: int,
+        lock: RepositorySyncLock
+) -> None:
+    """Release a repository sync lock, syncing it again if requested meanwhile.
 
     :param github_access_token: Github access token.
     :type github_access_token: str
     :param repository_id: Repository id (pk) from database.
     :type repository_id: int
+    :param lock: Sync lock held for the repository.
+    :type lock: RepositorySyncLock
     """
-    gh_client = GithubAPIClient(github_access_token)
-    last_thirty_days = datetime.now(tz=timezone.utc) - timedelta(days=30)
+    if lock.release():
+        logging.info("Syncing repository %s again, as requested while it synced.", repository_id)
+        get_last_30_days_repo_commits.delay(github_access_token, repository_id)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def get_repo_commits_slice(
+        self,
+        github_access_token: str,
+        repository_id: int,
+        window: Tuple[str, str],
+        checkpoint: Optional[str] = None
+):
+    """Fetch a slice of a repository backfill window and save its commits to database.
 
+    Retries carry the slice checkpoint, so they resume from the oldest page saved.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    :param window: Slice start and end, in ISO 8601 format.
+    :type window: Tuple[str, str]
+    :param checkpoint: Commit date to resume the slice from, in ISO 8601 format,
+        defaults to None
+    :type checkpoint: Optional[str], optional
+    """
+    since, until = window
     repository = Repository.objects.get(pk=repository_id)
+    saved = fetch_commits(
+        self,
+        github_access_token,
+        repository,
+        since=datetime.fromisoformat(since),
+        until=datetime.fromisoformat(checkpoint or until),
+        concurrency=settings.COMMITS_FETCH_CONCURRENCY,
+    )
+    logging.info(
+        "Saved %s commits from %s between %s and %s.", saved, repository.name, since, until
+    )
+
+
+def fetch_commits(
+        task,
+        github_access_token: str,
+        repository: Repository,
+        lock: Optional[RepositorySyncLock] = None,
+        persist_checkpoint: bool = False,
+        **kwargs
+) -> Optional[int]:
+    """Fetch commits pages of a repository and save them, on behalf of a bound task.
+
+    Each page is committed on its own, and the commit date of its oldest commit kept as
+    checkpoint. The task is retried from the checkpoint if the rate limit budget runs out,
+    or on transient errors, with exponential backoff. Repositories not found, or failing
+    otherwise, are marked as failed. Failures other than not found are raised again.
 
-    logging.info("Fetching commits for %s since: %s", repository.name, last_thirty_days)
-    commits = gh_client.get_commits_from_repository(repository.name, since=last_thirty_days)
+    :param task: Bound task, retried if the Github rate limit budget runs out.
+    :type task: celery.Task
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository: Repository to be synced.
+    :type repository: Repository
+    :param lock: Sync lock held for the repository, renewed on each page, defaults to None
+    :type lock: Optional[RepositorySyncLock], optional
+    :param persist_checkpoint: If the checkpoint is saved on the repository, otherwise it's
+        passed to the task retry as `checkpoint` argument, defaults to False
+    :type persist_checkpoint: bool, optional
+    :param kwargs: Arguments of GithubAPIClient.get_commit_pages, e.g. since and until.
+    :return: Number of commits saved, or None if the repository wasn't found.
+    :rtype: Optional[int]
+    """
+    gh_client = GithubAPIClient.for_token(github_access_token)
+
+    saved = 0
+    checkpoint = None
+    try:
+        pages = until_known_commit(
+            gh_client.get_commit_pages(repository.name, **kwargs), repository.last_commit_sha
+        )
+        for page_number, page in enumerate(pages, start=1):
+            commits_data_list = list(CommitAdapter.from_many(page))
+            saved += save_commits(repository, commits_data_list)
+
+            checkpoint = page_checkpoint(page) or checkpoint
+            if persist_checkpoint and checkpoint:
+                repository.sync_checkpoint = checkpoint
+                repository.save(update_fields=('sync_checkpoint',))
+
+            logging.info(
+                "Saved page %s (%s commits) from %s, %s commits so far.",
+                page_number, len(commits_data_list), repository.name, saved
+            )
+            if task.request.id:
+                task.update_state(state='PROGRESS', meta={'page': page_number, 'commits': saved})
+            if lock and not lock.heartbeat():
+                logging.warning("Sync lock of %s expired while it synced.", repository.name)
+    except UnknownObjectException:
+        repository.set_status(Repository.Status.FAILED, "Repository not found on Github.")
+        return None
+    except Exception as e:
+        retry_fetch(task, repository, e, checkpoint=None if persist_checkpoint else checkpoint)
+        repository.set_status(Repository.Status.FAILED, f"Could not fetch commits: {e}")
+        raise
+
+    return saved
+
+
+def retry_fetch(
+        task,
+        repository: Repository,
+        error: Exception,
+        checkpoint: Optional[datetime] = None
+) -> None:
+    """Retry a task which failed to fetch commits, if the error is worth a retry.
 
-    commits_data_list = [CommitAdapter.from_data(commit.raw_data) for commit in commits]
-    logging.info("Retrieved %s commits from Github.", len(commits_data_list))
+    Tasks are deferred until the rate limit budget is reset, if it runs out. On transient
+    errors, they're retried with exponential backoff, up to SYNC_MAX_RETRIES times.
+    Otherwise, nothing is done and the error is left to the caller.
+
+    :param task: Bound task which failed.
+    :type task: celery.Task
+    :param repository: Repository being synced.
+    :type repository: Repository
+    :param error: Error raised while fetching commits.
+    :type error: Exception
+    :param checkpoint: Commit date to resume from, passed to the retry as `checkpoint`
+        argument, defaults to None
+    :type checkpoint: Optional[datetime], optional
+    :raises Retry: If the task is retried.
+    """
+    retry_kwargs = task.request.kwargs or {}
+    if checkpoint:
+        retry_kwargs = {**retry_kwargs, 'checkpoint': checkpoint.isoformat()}
+
+    if isinstance(error, RateLimitExhaustedException):
+        logging.warning("%s Deferring %s sync.", error, repository.name)
+        raise task.retry(
+            exc=error, countdown=error.retry_after, max_retries=None, kwargs=retry_kwargs
+        )
+    if is_transient_error(error) and task.request.retries < settings.SYNC_MAX_RETRIES:
+        countdown = retry_backoff(task.request.retries)
+        logging.warning(
+            "Could not fetch commits of %s: %s. Resuming in %ss.", repository.name, error, countdown
+        )
+        raise task.retry(exc=error, countdown=countdown, max_retries=None, kwargs=retry_kwargs)
+
+
+@shared_task
+def finish_repository_sync(
+        repository_id: int,
+        github_access_token: Optional[str] = None,
+        lock_token: Optional[str] = None
+):
+    """Point the repository sync cursor to its newest commit and mark it as ready.
+
+    Repositories marked as failed while syncing are left as they are. Syncs split into
+    slices hand their lock over, to be released here.
+
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    :param github_access_token: Github access token, to sync again if requested meanwhile,
+        defaults to None
+    :type github_access_token: Optional[str], optional
+    :param lock_token: Token of the sync lock to be released, defaults to None
+    :type lock_token: Optional[str], optional
+    """
+    repository = Repository.objects.get(pk=repository_id)
+    if repository.status != Repository.Status.FAILED:
+        update_sync_cursor(repository, synced_at=datetime.now(tz=timezone.utc))
+        repository.sync_checkpoint = None
+        repository.status = Repository.Status.READY
+        repository.status_detail = ''
+        repository.save(update_fields=('sync_checkpoint', 'status', 'status_detail'))
+
+    if lock_token:
+        release_sync_lock(
+            github_access_token, repository_id, RepositorySyncLock(repository_id, lock_token)
+        )
+
+
+@shared_task
+def abort_repository_sync(repository_id: int, github_access_token: str, lock_token: str):
+    """Release the lock of a sync split into slices, if any of them failed.
+
+    Chords don't run their callback if any of their tasks fails, so finish_repository_sync
+    would never release it.
+
+    :param repository_id: Repository id (pk) from database.
+    :type repository_id: int
+    :param github_access_token: Github access token, to sync again if requested meanwhile.
+    :type github_access_token: str
+    :param lock_token: Token of the sync lock to be released.
+    :type lock_token: str
+    """
+    logging.warning("Sync of repository %s failed on a slice.", repository_id)
+    release_sync_lock(
+        github_access_token, repository_id, RepositorySyncLock(repository_id, lock_token)
+    )
+
+
+@shared_task
+def refresh_repositories():
+    """Fetch new commits of all repositories, using the access token of who added them.
+
+    With GITHUB_API_BACKEND set to `graphql`, repositories added by the same user are
+    refreshed together with batched GraphQL queries, up to REPOSITORIES_PER_REFRESH_TASK
+    per task. Otherwise, each repository is refreshed by its own task with the REST api.
+    Either way, tasks go to the refresh queue. Repositories still being registered, or
+    which never synced, are left out.
+    """
+    repositories_by_user = defaultdict(list)
+    repositories = Repository.objects.filter(created_by__isnull=False).exclude(
+        status__in=(Repository.Status.PENDING, Repository.Status.VALIDATING)
+    ).exclude(
+        # Never synced, e.g. not found on Github
+        status=Repository.Status.FAILED, last_synced_at__isnull=True
+    ).select_related('created_by')
+    for repository in repositories:
+        repositories_by_user[repository.created_by].append(repository.id)
+
+    for user, repository_ids in repositories_by_user.items():
+        try:
+            access_token = GithubAPIClient.from_request_user(user).access_token
+        except InvalidRequestUserException:
+            logging.warning("Skipping refresh of %s repositories without a Github token.", user)
+            continue
+
+        if settings.GITHUB_API_BACKEND == 'graphql':
+            for repository_ids_chunk in chunked(
+                    repository_ids, settings.REPOSITORIES_PER_REFRESH_TASK
+            ):
+                refresh_repositories_history.delay(access_token, repository_ids_chunk)
+        else:
+            for repository_id in repository_ids:
+                get_last_30_days_repo_commits.apply_async(
+                    (access_token, repository_id), queue=REFRESH_QUEUE
+                )
+
+
+@shared_task(bind=True)
+def refresh_repositories_history(self, github_access_token: str, repository_ids: List[int]):
+    """Fetch new commits of several repositories with batched GraphQL queries and save them.
+
+    Each repository sync lock is held meanwhile. Repositories already syncing are refreshed
+    by get_last_30_days_repo_commits instead, which syncs them again once they finish.
+    Repositories not found on Github are marked as failed, without moving their cursor.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repository_ids: Repositories ids (pk) from database.
+    :type repository_ids: List[int]
+    """
+    repositories = {}
+    locks = {}
+    for repository in Repository.objects.filter(pk__in=repository_ids):
+        # Retries keep the task id, so they take the same locks again
+        lock = RepositorySyncLock(repository.id, token=self.request.id)
+        if not lock.acquire():
+            get_last_30_days_repo_commits.apply_async(
+                (github_access_token, repository.id), queue=REFRESH_QUEUE
+            )
+            continue
+        repository.set_status(Repository.Status.SYNCING)
+        repositories[repository.name] = repository
+        locks[repository.name] = lock
+
+    try:
+        found = save_commits_history(github_access_token, repositories)
+    except RateLimitExhaustedException as e:
+        logging.warning("%s Deferring %s repositories refresh.", e, len(repositories))
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+    except Exception as e:
+        for name, repository in repositories.items():
+            repository.set_status(Repository.Status.FAILED, f"Could not fetch commits: {e}")
+            release_sync_lock(github_access_token, repository.id, locks[name])
+        raise
+
+    for name, repository in repositories.items():
+        if name in found:
+            finish_repository_sync(repository.id)
+        else:
+            repository.set_status(Repository.Status.FAILED, "Repository not found on Github.")
+        release_sync_lock(github_access_token, repository.id, locks[name])
+
+
+def save_commits_history(github_access_token: str, repositories: Dict[str, Repository]) -> Set[str]:
+    """Fetch new commits of repositories with batched GraphQL queries and save them.
+
+    :param github_access_token: Github access token.
+    :type github_access_token: str
+    :param repositories: Repositories to be refreshed, by name.
+    :type repositories: Dict[str, Repository]
+    :return: Names of the repositories found on Github.
+    :rtype: Set[str]
+    """
+    gh_client = GithubGraphQLClient.for_token(github_access_token)
+    history = gh_client.get_commits_history({
+        name: sync_since(repository) for name, repository in repositories.items()
+    })
 
-    with transaction.atomic():
+    found = set()
+    saved = 0
+    for name, page in history:
+        found.add(name)
+        repository = repositories[name]
+        commits_data_list = list(GraphQLCommitAdapter.from_many(page))
         for commit_data in commits_data_list:
-            serializer = CommitSerializer(data=commit_data)
-            serializer.is_valid(raise_exception=True)
+            commit_data['url'] = f"{GITHUB_API_URL}/repos/{name}/commits/{commit_data['sha']}"
+        for commits_data_page in until_known_commit(
+                [commits_data_list], repository.last_commit_sha
+        ):
+            saved += save_commits(repository, commits_data_page)
 
-            serializer.validated_data['repository'] = repository
-            serializer.save()
+    logging.info("Saved %s commits from %s repositories.", saved, len(found))
+    return found
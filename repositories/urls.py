@@ -1,10 +1,23 @@
 from django.urls import path
 
-from .views import CommitsView, RepositoriesView
+from .views import (CommitsView, GithubWebhookView, RepositoriesBulkView,
+                    RepositoriesJobView, RepositoriesView,
+                    RepositoryStatusView, StatsView)
 
 app_name = 'repositories'
 
 urlpatterns = [
     path('api/commits/', CommitsView.as_view(), name='commits-list'),
     path('api/repositories/', RepositoriesView.as_view(), name='repositories-create'),
+    path('api/repositories/bulk/', RepositoriesBulkView.as_view(), name='repositories-bulk'),
+    path(
+        'api/repositories/<int:pk>/status/', RepositoryStatusView.as_view(),
+        name='repository-status'
+    ),
+    path(
+        'api/repositories/jobs/<str:job_id>/', RepositoriesJobView.as_view(),
+        name='repositories-job'
+    ),
+    path('api/stats/', StatsView.as_view(), name='stats'),
+    path('api/webhooks/github/', GithubWebhookView.as_view(), name='github-webhook'),
 ]
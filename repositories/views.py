@@ -1,18 +1,61 @@
+import hashlib
+import hmac
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Any, List
+
+from celery import group
+from celery.result import GroupResult
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import reverse
 from django_filters import rest_framework as filters
-from github.GithubException import UnknownObjectException
+from github.GithubException import GithubException, UnknownObjectException
 from rest_framework import status
-from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import (GenericAPIView, ListAPIView,
+                                     RetrieveAPIView)
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from integrations.github_api import GithubAPIClient
+from common.queue_metrics import QueueLatency
+from githubmonitor.celery import BACKFILL_QUEUE, app
+from integrations.etag_cache import ConditionalRequestCache
+from integrations.github_api import (GithubAPIClient,
+                                     InvalidRequestUserException)
+from integrations.rate_limit import (RateLimitBudget,
+                                     RateLimitExhaustedException)
 
+from .cache import CommitListCache
 from .filters import CommitFilter
+from .ingestion import save_push_event, update_sync_cursor
 from .models import Commit, Repository
-from .serializers import CommitSerializer, RepositorySerializer
-from .tasks import get_last_30_days_repo_commits
+from .serializers import (BulkRepositorySerializer, CommitSerializer,
+                          RepositorySerializer, RepositoryStatusSerializer)
+from .tasks import (get_last_30_days_repo_commits, register_push_webhooks,
+                    validate_repository)
+
+# User who started a bulk registration job, kept as long as the job results
+BULK_JOB_OWNER_KEY = 'repositories:bulk_job:{}:owner'
+
+
+def get_webhook_url(request: Request) -> str:
+    """Get the url which will receive Github push webhook payloads.
+
+    :param request: Request object.
+    :type request: Request
+    :return: GITHUB_WEBHOOK_URL setting or the webhook endpoint url on the request host.
+    :rtype: str
+    """
+    return settings.GITHUB_WEBHOOK_URL or request.build_absolute_uri(
+        reverse('repositories:github-webhook')
+    )
 
 
 class CustomPagination(PageNumberPagination):
@@ -25,24 +68,72 @@ class CustomPagination(PageNumberPagination):
         return response
 
 
+class CommitCursorPagination(CursorPagination):
+    """Keyset pagination, which fetches any page in constant time regardless of its depth."""
+    ordering = ('-date', 'id')
+
+
+class CommitPagination(CustomPagination):
+    """Pagination by page number, or by cursor when requested with `pagination=cursor`.
+
+    Cursor mode doesn't count the commits, so the response has no `count` nor `total_pages`,
+    only the opaque `next` and `previous` links.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.cursor_paginator = CommitCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+
 class CommitsView(ListAPIView):
     """View for endpoints related to Commits."""
-    queryset = Commit.objects.all()
+    queryset = Commit.objects.select_related('repository')
     serializer_class = CommitSerializer
     permission_classes = (IsAuthenticated,)
-    pagination_class = CustomPagination
+    pagination_class = CommitPagination
     filter_backs = (filters.DjangoFilterBackend,)
     filterset_class = CommitFilter
 
     def get(self, request: Request, *args, **kwargs) -> Response:
         """List all commits.
 
+        Responses are cached until commits of the listed repositories are saved.
+
         :param request: Request object.
         :type request: Request
         :return: Response object containing serialized data for all commits.
         :rtype: Response
         """
-        return self.list(request, *args, **kwargs)
+        response_cache = CommitListCache()
+        cache_key = response_cache.make_key(request.query_params)
+
+        data = response_cache.get(cache_key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        start = time.perf_counter()
+        response = self.list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(cache_key, response.data, time.perf_counter() - start)
+
+        response['X-Cache'] = 'MISS'
+        return response
 
 
 class RepositoriesView(GenericAPIView):
@@ -54,25 +145,294 @@ class RepositoriesView(GenericAPIView):
     def post(self, request: Request) -> Response:
         """Create a repository using provided data.
 
-        Also, create a async task to fetch the last 30 days commits from this repository.
+        The repository is checked on Github, gets a push webhook registered and has its
+        last 30 days commits fetched by async tasks, so the response doesn't wait for
+        Github. Its progress can be polled on the repository status endpoint.
+
+        A repository which failed, e.g. not found or with invalid credentials, is checked
+        again instead, with the credentials of who sent it this time.
 
         :param request: Request object.
         :type request: Request
-        :return: Response object containg serialized data of created repository.
+        :return: Response object containing the created repository status.
         :rtype: Response
         """
-        serializer = self.serializer_class(data=request.data)
+        name = request.data.get('name', '') if isinstance(request.data, dict) else ''
+        failed = Repository.objects.filter(name=name, status=Repository.Status.FAILED).first()
+        serializer = self.serializer_class(failed, data=request.data)
         serializer.is_valid(raise_exception=True)
-        repo_fullname = serializer.validated_data['name']
 
+        gh_client = GithubAPIClient.from_request_user(request.user)
+        repository = serializer.save(
+            created_by=request.user, status=Repository.Status.PENDING, status_detail=''
+        )
+        validate_repository.delay(gh_client.access_token, repository.id, get_webhook_url(request))
+
+        return Response(
+            RepositoryStatusSerializer(repository).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('repositories:repository-status', args=(repository.id,))},
+        )
+
+
+class RepositoryStatusView(RetrieveAPIView):
+    """View for the registration progress of a repository."""
+    queryset = Repository.objects.only(*RepositoryStatusSerializer.Meta.fields)
+    serializer_class = RepositoryStatusSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class RepositoriesBulkView(GenericAPIView):
+    """View for registering many repositories at once."""
+    serializer_class = BulkRepositorySerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request: Request) -> Response:
+        """Create the repositories, from a list of names, which exist on Github.
+
+        Names are checked on Github concurrently and the repositories found are created
+        with a single statement. Push webhooks are registered by a async task and the last
+        30 days commits of each repository are fetched by a group of async tasks, whose
+        progress can be polled by the returned job id.
+
+        :param request: Request object.
+        :type request: Request
+        :return: Response object containing the names by outcome (created, existing,
+            not_found, rate_limited or failed) and the commits fetching job id.
+        :rtype: Response
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = list(dict.fromkeys(serializer.validated_data['names']))
+
+        existing = set(Repository.objects.filter(name__in=names).values_list('name', flat=True))
+        results = {
+            'created': [],
+            'existing': [name for name in names if name in existing],
+            'not_found': [],
+            'rate_limited': [],
+            'failed': [],
+        }
+
+        gh_client = GithubAPIClient.from_request_user(request.user)
+        new_names = [name for name in names if name not in existing]
+        with ThreadPoolExecutor(settings.REPOSITORIES_VALIDATION_CONCURRENCY) as executor:
+            outcomes = executor.map(self.check_repository, repeat(gh_client), new_names)
+            for name, outcome in zip(new_names, outcomes):
+                results[outcome].append(name)
+
+        # Repositories registered meanwhile by other requests are left untouched
+        repository_ids = self.create_repositories(results['created'], request.user)
+
+        job_id = None
+        if repository_ids:
+            register_push_webhooks.delay(
+                gh_client.access_token, repository_ids, get_webhook_url(request)
+            )
+            job_id = self.start_job(request, gh_client, repository_ids)
+
+        return Response(
+            {**results, 'job_id': job_id},
+            status=status.HTTP_201_CREATED if repository_ids else status.HTTP_200_OK
+        )
+
+    @staticmethod
+    def create_repositories(names: List[str], user: Any) -> List[int]:
+        """Create the repositories of the names, leaving the ones which already exist untouched.
+
+        :param names: Names of the repositories.
+        :type names: List[str]
+        :param user: User creating the repositories.
+        :type user: Any
+        :return: Ids (pk) of the repositories created by the user.
+        :rtype: List[int]
+        """
+        Repository.objects.bulk_create(
+            [
+                Repository(name=name, created_by=user, status=Repository.Status.SYNCING)
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+        return list(
+            Repository.objects.filter(name__in=names, created_by=user).values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def start_job(request: Request, gh_client: GithubAPIClient, repository_ids: List[int]) -> str:
+        """Fetch the commits of the repositories by a group of async tasks.
+
+        :param request: Request object, whose user owns the job.
+        :type request: Request
+        :param gh_client: Github client with the request user credentials.
+        :type gh_client: GithubAPIClient
+        :param repository_ids: Repositories ids (pk) from database.
+        :type repository_ids: List[int]
+        :return: Job id, to poll its progress.
+        :rtype: str
+        """
+        job = group(
+            get_last_30_days_repo_commits.si(
+                gh_client.access_token, repository_id
+            ).set(queue=BACKFILL_QUEUE)
+            for repository_id in repository_ids
+        ).apply_async()
+        job.save()
+        caches['default'].set(
+            BULK_JOB_OWNER_KEY.format(job.id),
+            request.user.id,
+            app.conf.result_expires.total_seconds()
+        )
+        return job.id
+
+    @staticmethod
+    def check_repository(gh_client: GithubAPIClient, repo_fullname: str) -> str:
+        """Check if a repository exists on Github.
+
+        :param gh_client: Github client with the request user credentials.
+        :type gh_client: GithubAPIClient
+        :param repo_fullname: Repository full name (owner/repository_name)
+        :type repo_fullname: str
+        :return: Outcome of the check: created, not_found, rate_limited or failed.
+        :rtype: str
+        """
         try:
-            gh_client = GithubAPIClient.from_request_user(request.user)
             gh_client.get_repository(repo_fullname)
         except UnknownObjectException:
+            return 'not_found'
+        except RateLimitExhaustedException:
+            return 'rate_limited'
+        except GithubException:
+            logging.warning("Could not check repository %s.", repo_fullname, exc_info=True)
+            return 'failed'
+        return 'created'
+
+
+class RepositoriesJobView(APIView):
+    """View for the progress of commits fetching jobs of bulk registered repositories."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request, job_id: str) -> Response:
+        """Show how many repositories of a job had their commits fetched.
+
+        Jobs are only shown to who started them.
+
+        :param request: Request object.
+        :type request: Request
+        :param job_id: Job id returned on bulk registration.
+        :type job_id: str
+        :return: Response object containing the number of tasks by state.
+        :rtype: Response
+        """
+        if caches['default'].get(BULK_JOB_OWNER_KEY.format(job_id)) != request.user.id:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        job = GroupResult.restore(job_id, app=app)
+        if job is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        states = Counter(result.state for result in job.results)
+        return Response({
+            'id': job.id,
+            'total': len(job.results),
+            'completed': states['SUCCESS'],
+            'failed': states['FAILURE'],
+            'in_progress': states['PROGRESS'] + states['STARTED'] + states['RETRY'],
+            'ready': states['SUCCESS'] + states['FAILURE'] == len(job.results),
+        })
+
+
+class GithubWebhookView(APIView):
+    """View for Github webhooks deliveries."""
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def post(self, request: Request) -> Response:
+        """Save the commits from a push webhook payload.
+
+        Payloads must be signed with GITHUB_WEBHOOK_SECRET, all of them are rejected if it
+        isn't set. Only pushes to the repository default branch are saved, like the commits
+        fetched from Github api. If the payload commits list was truncated, the missing
+        commits are fetched by a async task.
+
+        :param request: Request object.
+        :type request: Request
+        :return: Response object containing the number of commits saved.
+        :rtype: Response
+        """
+        if not settings.GITHUB_WEBHOOK_SECRET:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        expected_signature = 'sha256=' + hmac.new(
+            settings.GITHUB_WEBHOOK_SECRET.encode(), request.body, hashlib.sha256
+        ).hexdigest()
+        signature = request.headers.get('X-Hub-Signature-256', '')
+        if not hmac.compare_digest(signature, expected_signature):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        if request.headers.get('X-GitHub-Event') != 'push':
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        payload = request.data
+        repository = Repository.objects.filter(
+            name__iexact=payload['repository']['full_name']
+        ).first()
+        if not repository:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        repository = serializer.save()
+        default_ref = f"refs/heads/{payload['repository']['default_branch']}"
+        if payload.get('deleted') or payload['ref'] != default_ref:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        # Compared before saving, as saving changes which commit is the newest one
+        continues_last_sync = (
+            repository.last_synced_at is not None
+            and payload.get('before') == repository.last_commit_sha
+        )
+        saved, truncated = save_push_event(repository, payload)
+        logging.info("Saved %s commits pushed to %s.", saved, repository.name)
+
+        if truncated:
+            self.schedule_backfill(repository)
+        elif continues_last_sync:
+            # Without gaps since last sync, next syncs can start from the pushed commits
+            update_sync_cursor(repository, synced_at=datetime.now(tz=timezone.utc))
+
+        return Response({'saved': saved})
+
+    @staticmethod
+    def schedule_backfill(repository: Repository) -> None:
+        """Fetch the commits missing from a truncated push payload.
+
+        :param repository: Repository which received the push.
+        :type repository: Repository
+        """
+        try:
+            gh_client = GithubAPIClient.from_request_user(repository.created_by)
+        except InvalidRequestUserException:
+            logging.warning("No Github credentials to backfill %s.", repository.name)
+            return
 
         get_last_30_days_repo_commits.delay(gh_client.access_token, repository.id)
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class StatsView(APIView):
+    """View for monitoring caches and Github api usage."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request: Request) -> Response:
+        """Show caches counters, Github rate limit budgets and tasks queues latency.
+
+        :param request: Request object.
+        :type request: Request
+        :return: Response object containing the commits list cache and Github conditional
+            requests cache counters, the remaining rate limit budget of each access
+            token, identified by its fingerprint, and the latency of each tasks queue.
+        :rtype: Response
+        """
+        return Response({
+            'commits_cache': CommitListCache().stats(),
+            'conditional_cache': ConditionalRequestCache().stats(),
+            'rate_limit': RateLimitBudget().snapshot(),
+            'queues': QueueLatency().stats(),
+        })
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+
+class TestQueryInstrumentationMiddleware(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='test_user', password='test')
+        self.client.force_login(self.user)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_query_headers(self):
+        """Check if the number of queries and their time are returned in response headers."""
+        with self.assertNumQueries(3) as context:
+            response = self.client.get('/api/commits/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-DB-Query-Count'], str(len(context.captured_queries)))
+        self.assertRegex(response.headers['X-DB-Query-Time'], r'^\d+\.\d{2}ms$')
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_query_headers_disabled(self):
+        """Check if no headers are added when instrumentation is disabled."""
+        response = self.client.get('/api/commits/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-DB-Query-Count', response.headers)
+        self.assertNotIn('X-DB-Query-Time', response.headers)
+
+    def tearDown(self):
+        self.user.delete()
@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from common.queue_metrics import QueueLatency
+from common.signals import record_queue_latency, stamp_published_at
+
+
+class TestQueueLatency(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.latency = QueueLatency()
+
+    def task(self, **request):
+        request = {'eta': None, 'delivery_info': {'routing_key': 'refresh'}, **request}
+        return SimpleNamespace(request=SimpleNamespace(**request))
+
+    def test_stats(self):
+        """Check if tasks started and their latency are counted by queue."""
+        self.latency.record('refresh', 0.2)
+        self.latency.record('refresh', 0.4)
+
+        stats = self.latency.stats()
+
+        self.assertEqual(stats['refresh'], {
+            'tasks': 2, 'average_latency_ms': 300.0, 'last_latency_ms': 400.0
+        })
+        self.assertEqual(stats['backfill'], {
+            'tasks': 0, 'average_latency_ms': 0, 'last_latency_ms': 0
+        })
+
+    def test_stamp_published_at(self):
+        """Check if tasks messages are stamped with their publish time."""
+        headers = {}
+
+        with patch('common.signals.time.time', return_value=100.0):
+            stamp_published_at(headers=headers)
+
+        self.assertEqual(headers, {'published_at': 100.0})
+
+    def test_record_queue_latency(self):
+        """Check if the time from publish to start is recorded for the task queue."""
+        task = self.task(published_at=time.time() - 2)
+
+        record_queue_latency(task=task)
+
+        stats = self.latency.stats()['refresh']
+        self.assertEqual(stats['tasks'], 1)
+        self.assertAlmostEqual(stats['last_latency_ms'], 2000, delta=500)
+
+    def test_record_queue_latency_eta(self):
+        """Check if tasks scheduled for later are measured from their eta."""
+        eta = time.time() - 1
+        task = self.task(
+            published_at=eta - 60,
+            eta=time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(eta)),
+        )
+
+        record_queue_latency(task=task)
+
+        self.assertLess(self.latency.stats()['refresh']['last_latency_ms'], 3000)
+
+    def test_record_queue_latency_eager(self):
+        """Check if tasks run without a broker aren't recorded."""
+        record_queue_latency(task=self.task())
+
+        self.assertEqual(self.latency.stats()['refresh']['tasks'], 0)
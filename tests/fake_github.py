@@ -0,0 +1,154 @@
+import json
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+def fake_commits(repository: str, count: int, until: Optional[datetime] = None) -> List[dict]:
+    """Build Github commits raw data, newest first, one minute apart.
+
+    :param repository: Repository full name (owner/repository_name).
+    :type repository: str
+    :param count: Number of commits.
+    :type count: int
+    :param until: Date of the newest commit, defaults to now.
+    :type until: Optional[datetime], optional
+    :return: Commits raw data, as listed by the Github api.
+    :rtype: List[dict]
+    """
+    until = until or datetime.now(tz=timezone.utc)
+    commits = []
+    for i in range(count):
+        sha = f'{zlib.crc32(repository.encode()):08x}{count - i:032x}'
+        commits.append({
+            'sha': sha,
+            'url': f'https://api.github.com/repos/{repository}/commits/{sha}',
+            'commit': {
+                'message': f'Commit {count - i} of {repository}',
+                'author': {
+                    'name': f'Author {i % 20}',
+                    'date': (until - timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                },
+            },
+            # Commits by emails not linked to a Github user have no author
+            'author': {'avatar_url': f'https://example.com/{i % 20}.png'} if i % 10 else None,
+        })
+    return commits
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """Serve the commits listing of the server repositories like the Github REST api does."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.remaining -= 1
+            remaining = server.remaining
+        time.sleep(server.latency)
+
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        rate_limit_headers = {
+            'X-RateLimit-Remaining': str(max(remaining, 0)),
+            'X-RateLimit-Limit': str(server.rate_limit),
+            'X-RateLimit-Reset': str(server.rate_limit_reset),
+        }
+
+        if self.headers.get('Authorization') != f'token {server.access_token}':
+            return self.send_json(401, {'message': 'Bad credentials'})
+        if remaining < 0:
+            return self.send_json(403, {'message': 'API rate limit exceeded'}, rate_limit_headers)
+
+        owner, _, rest = url.path.removeprefix('/repos/').partition('/')
+        name, _, resource = rest.partition('/')
+        commits = server.repositories.get(f'{owner}/{name}')
+        if resource != 'commits' or commits is None:
+            return self.send_json(404, {'message': 'Not Found'})
+
+        if 'since' in query:
+            commits = [
+                commit for commit in commits if commit['commit']['author']['date'] >= query['since']
+            ]
+        if 'until' in query:
+            commits = [
+                commit for commit in commits if commit['commit']['author']['date'] <= query['until']
+            ]
+
+        per_page = int(query.get('per_page', 30))
+        page = int(query.get('page', 1))
+        last_page = max(-(-len(commits) // per_page), 1)
+        start = (page - 1) * per_page
+
+        headers = {**rate_limit_headers, 'ETag': f'"{name}-{page}-{per_page}-{len(commits)}"'}
+        if self.headers.get('If-None-Match') == headers['ETag']:
+            return self.send_json(304, None, headers)
+        if page < last_page:
+            link = f'{server.url}{url.path}?'
+            headers['Link'] = (
+                f'<{link}{urlencode({**query, "page": page + 1})}>; rel="next", '
+                f'<{link}{urlencode({**query, "page": last_page})}>; rel="last"'
+            )
+        return self.send_json(200, commits[start:start + per_page], headers)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeGithubServer(ThreadingHTTPServer):
+    """In-process stand-in for the Github REST api, for tests and benchmarks run offline.
+
+    Lists commits of its repositories with pagination, Link, ETag and rate limit headers,
+    answering each request after `latency` seconds.
+
+    Usage::
+
+        with FakeGithubServer({'user/repo': fake_commits('user/repo', 500)}) as server:
+            client = GithubAPIClient(server.access_token, base_url=server.url)
+    """
+    daemon_threads = True
+
+    def __init__(
+            self,
+            repositories: Dict[str, List[dict]],
+            latency: float = 0,
+            rate_limit: int = 5000,
+            access_token: str = 'access-token'
+    ) -> None:
+        super().__init__(('127.0.0.1', 0), FakeGithubHandler)
+        self.repositories = repositories
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_reset = int(time.time()) + 3600
+        self.access_token = access_token
+        self.remaining = rate_limit
+        self.requests = []
+        self.lock = Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'FakeGithubServer':
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+import requests
+from django.core.cache import caches
+
+from integrations.etag_cache import ConditionalRequestCache
+
+
+class TestConditionalRequestCache(TestCase):
+    def setUp(self) -> None:
+        caches['github'].clear()
+        self.etag_cache = ConditionalRequestCache()
+        self.url = 'https://api.github.com/repos/user/repo/commits'
+
+    @staticmethod
+    def build_response(status_code: int, headers: dict, content: bytes = b'') -> requests.Response:
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = content  # pylint: disable=protected-access
+        return response
+
+    def test_make_key(self):
+        """Check if keys differ by access token, url and params, but not by params order."""
+        key = self.etag_cache.make_key('token', self.url, {'page': 2, 'per_page': 100})
+
+        self.assertEqual(key, self.etag_cache.make_key('token', self.url, {'per_page': 100, 'page': 2}))
+        self.assertNotEqual(key, self.etag_cache.make_key('other-token', self.url, {'page': 2, 'per_page': 100}))
+        self.assertNotEqual(key, self.etag_cache.make_key('token', self.url, {'page': 3, 'per_page': 100}))
+        self.assertNotIn('token', key.split(':'))
+
+    def test_set_and_revalidate(self):
+        """Check if a cached response is revalidated and restored on 304."""
+        key = self.etag_cache.make_key('token', self.url)
+        self.etag_cache.set(key, self.build_response(200, {'ETag': '"abc"', 'Link': '<next>; rel="next"'}, b'[1]'))
+
+        cached = self.etag_cache.get(key)
+        response = self.etag_cache.to_response(cached, self.build_response(304, {'ETag': '"abc"'}))
+
+        self.assertEqual(self.etag_cache.conditional_headers(cached), {'If-None-Match': '"abc"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [1])
+        self.assertEqual(response.links['next']['url'], 'next')
+
+    def test_set_without_validators(self):
+        """Check if responses without ETag or Last-Modified are not cached."""
+        key = self.etag_cache.make_key('token', self.url)
+        self.etag_cache.set(key, self.build_response(200, {}, b'[1]'))
+
+        self.assertIsNone(self.etag_cache.get(key))
+
+    def test_stats(self):
+        """Check if hits and misses are counted."""
+        self.assertEqual(self.etag_cache.stats(), {'hits': 0, 'misses': 0})
+
+        self.etag_cache.record(hit=False)
+        self.etag_cache.record(hit=True)
+        self.etag_cache.record(hit=True)
+
+        self.assertEqual(self.etag_cache.stats(), {'hits': 2, 'misses': 1})
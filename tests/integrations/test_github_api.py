@@ -1,13 +1,100 @@
-from datetime import datetime
+import json
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlencode, urlparse
 
-from integrations.github_api import (GithubAPIClient,
-                                     InvalidRequestUserException)
+from django.core.cache import caches
+from github.GithubException import (BadCredentialsException,
+                                    UnknownObjectException)
+
+from integrations.github_api import (GITHUB_API_URL, GithubAPIClient,
+                                     InvalidRequestUserException, LRUCache,
+                                     clients_cache, tokens_cache)
+from integrations.github_graphql import GithubGraphQLClient
+from integrations.rate_limit import RateLimitExhaustedException
+
+
+class StubCommitsHandler(BaseHTTPRequestHandler):
+    """Serve a paginated commits listing for `user/repo`, recording every request."""
+    total_commits = 250
+
+    def do_GET(self):  # noqa: N802
+        with self.server.lock:
+            self.server.requests.append(self)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            time.sleep(self.server.delay)
+            self.handle_commits()
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def handle_commits(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if self.headers.get('Authorization') != 'token access-token':
+            return self.send_json(401, {'message': 'Bad credentials'})
+        if url.path == '/repos/user/limited/commits':
+            return self.send_json(403, {'message': 'API rate limit exceeded'}, {
+                'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Limit': '5000',
+                'X-RateLimit-Reset': str(self.server.rate_limit_reset),
+            })
+        if url.path != '/repos/user/repo/commits':
+            return self.send_json(404, {'message': 'Not Found'})
+
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        last_page = -(-self.total_commits // per_page)
+        start = (page - 1) * per_page
+        commits = [
+            {'sha': str(i)} for i in range(start, min(start + per_page, self.total_commits))
+        ]
+
+        etag = f'"{page}-{per_page}-{self.total_commits}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_json(304, None, {'ETag': etag})
+
+        headers = {
+            'ETag': etag,
+            'X-RateLimit-Remaining': str(5000 - len(self.server.requests)),
+            'X-RateLimit-Limit': '5000',
+            'X-RateLimit-Reset': str(self.server.rate_limit_reset),
+        }
+        if page < last_page:
+            host = f'http://{self.server.server_address[0]}:{self.server.server_address[1]}'
+            link_query = {name: values[0] for name, values in query.items()}
+            headers['Link'] = (
+                f'<{host}{url.path}?{urlencode({**link_query, "page": page + 1})}>; rel="next", '
+                f'<{host}{url.path}?{urlencode({**link_query, "page": last_page})}>; rel="last"'
+            )
+        return self.send_json(200, commits, headers)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
 
 
 class TestGithubAPIClient(TestCase):
     def setUp(self) -> None:
+        caches['github'].clear()
+        clients_cache.clear()
+        tokens_cache.clear()
         self.access_token = 'access-token'
         self.gh_client = GithubAPIClient(self.access_token)
 
@@ -18,7 +105,7 @@ class TestGithubAPIClient(TestCase):
         client = GithubAPIClient(access_token)
 
         assert client
-        github_client_mock.assert_called_once_with(access_token)
+        github_client_mock.assert_called_once_with(access_token, base_url=GITHUB_API_URL)
 
     @patch('integrations.github_api.Github')
     def test_from_request_user(self, github_client_mock):
@@ -33,8 +120,9 @@ class TestGithubAPIClient(TestCase):
         client = GithubAPIClient.from_request_user(request_user)
 
         assert client
-        github_client_mock.assert_called_once_with(access_token)
+        github_client_mock.assert_called_once_with(access_token, base_url=GITHUB_API_URL)
         request_user.social_auth.get.assert_called_once_with(provider="github")
+        self.assertFalse(client.rate_limit.blocking)
 
     def test_from_invalid_request_user(self):
         """Check if InvalidRequestUserException is raised if a invalid request user is provided."""
@@ -47,35 +135,121 @@ class TestGithubAPIClient(TestCase):
         ):
             GithubAPIClient.from_request_user(request_user)
 
-    @patch('github.Github.get_repo')
-    def test_get_repository(self, get_repo_mock):
+    def test_for_token(self):
+        """Check if the same client is reused for a access token and kept apart by class."""
+        client = GithubAPIClient.for_token('token')
+
+        self.assertIs(GithubAPIClient.for_token('token'), client)
+        self.assertIsNot(GithubAPIClient.for_token('other-token'), client)
+        self.assertIsInstance(GithubGraphQLClient.for_token('token'), GithubGraphQLClient)
+        self.assertTrue(client.rate_limit.blocking)
+        self.assertIsNot(GithubAPIClient.for_token('token', blocking=False), client)
+
+    @patch('integrations.github_api.clients_cache', LRUCache(2))
+    def test_for_token_eviction(self):
+        """Check if the least recently used client is dropped once the cache is full."""
+        first = GithubAPIClient.for_token('first')
+        second = GithubAPIClient.for_token('second')
+        GithubAPIClient.for_token('first')
+        GithubAPIClient.for_token('third')
+
+        self.assertIs(GithubAPIClient.for_token('first'), first)
+        self.assertIsNot(GithubAPIClient.for_token('second'), second)
+
+    def test_from_request_user_cached_token(self):
+        """Check if the user access token is read from database once while cached."""
+        request_user = MagicMock(pk=1)
+        request_user.social_auth.get.return_value.extra_data = {"access_token": 'token'}
+
+        client = GithubAPIClient.from_request_user(request_user)
+
+        self.assertIs(GithubAPIClient.from_request_user(request_user), client)
+        request_user.social_auth.get.assert_called_once_with(provider="github")
+
+    @patch('integrations.github_api.tokens_cache', LRUCache(10, timeout=60))
+    def test_from_request_user_expired_token(self):
+        """Check if the user access token is read again from database once expired."""
+        request_user = MagicMock(pk=1)
+        request_user.social_auth.get.return_value.extra_data = {"access_token": 'token'}
+
+        with patch('integrations.github_api.time.monotonic', return_value=0):
+            GithubAPIClient.from_request_user(request_user)
+        with patch('integrations.github_api.time.monotonic', return_value=61):
+            GithubAPIClient.from_request_user(request_user)
+
+        self.assertEqual(request_user.social_auth.get.call_count, 2)
+
+    @patch('integrations.github_api.GithubAPIClient._request')
+    def test_get_repository(self, request_mock):
         """Check if a repository is fetched given a provided full name.
 
-        Check if github client get_repo method is called with repository name.
-        Check if the repository object from github client is returned.
+        Check if the repository endpoint is requested with repository name.
+        Check if a repository object built from the response is returned.
         """
         repository_name = 'user/repo'
-
-        repo_mock = MagicMock()
-        repo_mock.name = repository_name
-        get_repo_mock.return_value = repo_mock
+        request_mock.return_value.json.return_value = {'full_name': repository_name}
+        request_mock.return_value.headers = {}
 
         repo = self.gh_client.get_repository(repository_name)
 
-        get_repo_mock.assert_called_once_with(repository_name)
-        assert repo == repo_mock
+        request_mock.assert_called_once_with('GET', f'/repos/{repository_name}')
+        assert repo.full_name == repository_name
 
-    @patch('github.Github.get_repo', side_effect=Exception("Repository not found."))
-    def test_get_repository_exception_raised(self, get_repo_mock):
+    @patch('integrations.github_api.GithubAPIClient._request')
+    def test_get_repository_cached(self, request_mock):
+        """Check if repository metadata is reused, per access token, without asking Github."""
+        request_mock.return_value.json.return_value = {'full_name': 'user/repo'}
+        request_mock.return_value.headers = {}
+
+        self.gh_client.get_repository('user/repo')
+        repo = self.gh_client.get_repository('User/Repo')
+        GithubAPIClient('other-token').get_repository('user/repo')
+
+        self.assertEqual(repo.full_name, 'user/repo')
+        self.assertEqual(request_mock.call_count, 2)
+
+    @patch('integrations.github_api.GithubAPIClient._request')
+    def test_get_repository_lazy(self, request_mock):
+        """Check if a lazy repository handle is returned without any request."""
+        repo = self.gh_client.get_repository('user/repo', lazy=True)
+
+        request_mock.assert_not_called()
+        self.assertEqual(repo.url, '/repos/user/repo')
+
+    @patch('integrations.github_api.GithubAPIClient._request',
+           side_effect=Exception("Repository not found."))
+    def test_get_repository_exception_raised(self, request_mock):
         """Check if exception is raised in case of a problem when fetching the repository.
 
-        Check if get_repository raises a exception when a exception is raised by github client lib.
+        Check if get_repository raises a exception when a exception is raised by the request.
         """
         repository_name = 'user/repo'
 
         with self.assertRaisesRegex(Exception, "Repository not found."):
             self.gh_client.get_repository(repository_name)
 
+    @patch('integrations.github_api.GithubAPIClient._request')
+    def test_create_push_webhook(self, request_mock):
+        """Check if a push webhook is created on the repository with the provided url and secret."""
+        request_mock.return_value.json.return_value = {'id': 1234}
+
+        webhook = self.gh_client.create_push_webhook(
+            'user/repo', 'https://example.com/api/webhooks/github/', 'secret'
+        )
+
+        request_mock.assert_called_once_with('POST', '/repos/user/repo/hooks', json={
+            'name': 'web',
+            'active': True,
+            'events': ['push'],
+            'config': {
+                'url': 'https://example.com/api/webhooks/github/',
+                'content_type': 'json',
+                'secret': 'secret',
+                'insecure_ssl': '0',
+            },
+        })
+        self.assertEqual(webhook, {'id': 1234})
+
     @patch('integrations.github_api.GithubAPIClient.get_repository')
     def test_get_commits_from_repository(self, get_repository_mock):
         """Check commits from a repository are fetched given a provided repository full name.
@@ -93,6 +267,7 @@ class TestGithubAPIClient(TestCase):
 
         commits = self.gh_client.get_commits_from_repository(repository_name)
 
+        get_repository_mock.assert_called_once_with(repository_name, lazy=True)
         repo_mock.get_commits.assert_called_once()
         self.assertCountEqual(commits, expected_commits)
 
@@ -110,3 +285,124 @@ class TestGithubAPIClient(TestCase):
         self.gh_client.get_commits_from_repository(repository_name, since_date)
 
         repo_mock.get_commits.assert_called_once_with(since=since_date)
+
+
+class TestGithubAPIClientCommitPages(TestCase):
+    def setUp(self) -> None:
+        caches['github'].clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubCommitsHandler)
+        self.server.requests = []
+        self.server.rate_limit_reset = int(time.time()) + 600
+        self.server.lock = Lock()
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.delay = 0
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        host, port = self.server.server_address
+        self.gh_client = GithubAPIClient('access-token', base_url=f'http://{host}:{port}')
+
+    def test_get_commit_pages(self):
+        """Check if commits raw data is returned one page at a time.
+
+        Check if only one request is made for each page of 100 commits.
+        """
+        pages = list(self.gh_client.get_commit_pages('user/repo'))
+
+        self.assertEqual([len(page) for page in pages], [100, 100, 50])
+        self.assertEqual([commit['sha'] for page in pages for commit in page],
+                         [str(i) for i in range(250)])
+        self.assertEqual(len(self.server.requests), 3)
+
+    @patch.object(StubCommitsHandler, 'total_commits', 1050)
+    def test_get_commit_pages_concurrently(self):
+        """Check if pages after the first one are fetched concurrently and returned in order.
+
+        Check if no more than the requested concurrency is reached and every page is
+        requested only once.
+        """
+        self.server.delay = 0.05
+        since_date = datetime(2023, 1, 5, 12, tzinfo=timezone.utc)
+
+        pages = list(self.gh_client.get_commit_pages('user/repo', since_date, concurrency=4))
+
+        self.assertEqual([commit['sha'] for page in pages for commit in page],
+                         [str(i) for i in range(1050)])
+        self.assertEqual(len(self.server.requests), 11)
+        self.assertEqual(self.server.max_in_flight, 4)
+        for request in self.server.requests:
+            query = parse_qs(urlparse(request.path).query)
+            self.assertEqual(query['since'], ['2023-01-05T12:00:00Z'])
+
+    @patch.object(StubCommitsHandler, 'total_commits', 1050)
+    def test_get_commit_pages_concurrently_stopped(self):
+        """Check if pages beyond the concurrency window aren't requested when consumption stops."""
+        pages = self.gh_client.get_commit_pages('user/repo', concurrency=3)
+
+        self.assertEqual(len(next(pages)), 100)
+        self.assertEqual(len(next(pages)), 100)
+        pages.close()
+
+        self.assertLessEqual(len(self.server.requests), 1 + 3)
+
+    def test_get_commit_pages_since_date(self):
+        """Check if since param is sent to Github on the first request."""
+        since_date = datetime(2023, 1, 5, 12, tzinfo=timezone.utc)
+
+        next(self.gh_client.get_commit_pages('user/repo', since_date))
+
+        query = parse_qs(urlparse(self.server.requests[0].path).query)
+        self.assertEqual(query['since'], ['2023-01-05T12:00:00Z'])
+        self.assertEqual(query['per_page'], ['100'])
+
+    def test_get_commit_pages_not_found(self):
+        """Check if UnknownObjectException is raised if the repository doesn't exist."""
+        with self.assertRaises(UnknownObjectException):
+            next(self.gh_client.get_commit_pages('user/invalid-repo'))
+
+    def test_get_commit_pages_bad_credentials(self):
+        """Check if BadCredentialsException is raised if the access token is invalid."""
+        gh_client = GithubAPIClient('invalid-token', base_url=self.gh_client.base_url)
+
+        with self.assertRaises(BadCredentialsException):
+            next(gh_client.get_commit_pages('user/repo'))
+
+    def test_get_commit_pages_not_modified(self):
+        """Check if unchanged pages are revalidated and served from cache.
+
+        Check if the second listing sends the cached ETags and gets the same commits.
+        """
+        first = list(self.gh_client.get_commit_pages('user/repo'))
+        second = list(self.gh_client.get_commit_pages('user/repo'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertTrue(all(
+            request.headers.get('If-None-Match') for request in self.server.requests[3:]
+        ))
+        self.assertEqual(self.gh_client.etag_cache.stats(), {'hits': 3, 'misses': 3})
+
+    def test_get_commit_pages_updates_rate_limit(self):
+        """Check if the rate limit budget is updated from the responses headers."""
+        list(self.gh_client.get_commit_pages('user/repo'))
+
+        budget = self.gh_client.rate_limit.get('access-token')
+        self.assertEqual(budget['remaining'], 4997)
+        self.assertEqual(budget['reset'], self.server.rate_limit_reset)
+
+    def test_get_commit_pages_rate_limit_exceeded(self):
+        """Check if RateLimitExhaustedException is raised when Github rate limit is exceeded.
+
+        Check if the next request is deferred without reaching Github.
+        """
+        with self.assertRaises(RateLimitExhaustedException) as context:
+            next(self.gh_client.get_commit_pages('user/limited'))
+
+        self.assertEqual(context.exception.reset_at, self.server.rate_limit_reset)
+
+        with self.assertRaises(RateLimitExhaustedException):
+            next(self.gh_client.get_commit_pages('user/repo'))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
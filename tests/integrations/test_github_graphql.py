@@ -0,0 +1,150 @@
+import json
+import os
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.cache import caches
+from github.GithubException import GithubException
+
+from integrations.github_graphql import GithubGraphQLClient
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, name)) as fixture:
+        return json.load(fixture)
+
+
+class StubGraphQLHandler(BaseHTTPRequestHandler):
+    """Answer GraphQL queries with the recorded responses, in order."""
+    def do_POST(self):  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.queries.append(body)
+
+        data = json.dumps(self.server.responses.pop(0)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-RateLimit-Remaining', '4990')
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Reset', '4102444800')
+        self.send_header('X-RateLimit-Resource', 'graphql')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGithubGraphQLClient(TestCase):
+    def setUp(self) -> None:
+        caches['github'].clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphQLHandler)
+        self.server.queries = []
+        self.server.responses = []
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        host, port = self.server.server_address
+        self.gh_client = GithubGraphQLClient('access-token', base_url=f'http://{host}:{port}')
+
+    def test_build_history_query(self):
+        """Check if each repository is aliased with its own variables."""
+        query = GithubGraphQLClient.build_history_query(2)
+
+        self.assertIn('r0: repository(owner: $owner0, name: $name0)', query)
+        self.assertIn('r1: repository(owner: $owner1, name: $name1)', query)
+        self.assertIn('history(first: 100, since: $since1, after: $after1)', query)
+        self.assertIn('fragment CommitFields on Commit', query)
+
+    def test_get_commits_history(self):
+        """Check if repositories are batched and only the ones with more pages are queried again.
+
+        Check if repositories not found are skipped.
+        """
+        self.server.responses = [
+            load_fixture('graphql_history_first_round.json'),
+            load_fixture('graphql_history_second_round.json'),
+        ]
+        since = datetime(2023, 4, 1, tzinfo=timezone.utc)
+
+        pages = list(self.gh_client.get_commits_history({
+            'user/repo': since,
+            'user/other': None,
+            'user/deleted': since,
+        }))
+
+        self.assertEqual(
+            [(name, [node['oid'][:4] for node in nodes]) for name, nodes in pages],
+            [('user/repo', ['c0bd', '9a1f']), ('user/other', ['4e5f']), ('user/repo', ['1b2c'])]
+        )
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(self.server.queries[0]['variables'], {
+            'owner0': 'user', 'name0': 'repo', 'since0': '2023-04-01T00:00:00Z', 'after0': None,
+            'owner1': 'user', 'name1': 'other', 'since1': None, 'after1': None,
+            'owner2': 'user', 'name2': 'deleted', 'since2': '2023-04-01T00:00:00Z', 'after2': None,
+        })
+        self.assertEqual(self.server.queries[1]['variables'], {
+            'owner0': 'user', 'name0': 'repo', 'since0': '2023-04-01T00:00:00Z',
+            'after0': 'c0bd1ea1a4f3b3e6f8e8d5c1c5b1b2f0e1b2d3c4 1',
+        })
+
+    def test_get_commits_history_without_new_commits(self):
+        """Check if repositories found without new commits get a single empty page."""
+        self.server.responses = [{'data': {
+            'r0': {'defaultBranchRef': {'target': {'history': {
+                'pageInfo': {'hasNextPage': False, 'endCursor': None}, 'nodes': [],
+            }}}},
+            'r1': {'defaultBranchRef': None},
+            'r2': None,
+        }}]
+
+        pages = list(self.gh_client.get_commits_history(
+            {'user/repo': None, 'user/empty': None, 'user/deleted': None}
+        ))
+
+        self.assertEqual(pages, [('user/repo', []), ('user/empty', [])])
+
+    @patch('integrations.github_graphql.REPOSITORIES_PER_QUERY', 2)
+    def test_get_commits_history_batch_size(self):
+        """Check if no more than REPOSITORIES_PER_QUERY repositories are queried at once.
+
+        Check if repositories waiting for their first page fill the batch of the next round.
+        """
+        first_round = load_fixture('graphql_history_first_round.json')
+        first_round['data'].pop('r2')
+        self.server.responses = [first_round, load_fixture('graphql_history_second_round.json')]
+
+        list(self.gh_client.get_commits_history(
+            {'user/repo': None, 'user/other': None, 'user/deleted': None}
+        ))
+
+        self.assertEqual(
+            [[query['variables'][f'name{i}'] for i in range(2)] for query in self.server.queries],
+            [['repo', 'other'], ['repo', 'deleted']]
+        )
+
+    def test_query_failed(self):
+        """Check if GithubException is raised if the query fails without any data."""
+        self.server.responses = [load_fixture('graphql_bad_query.json')]
+
+        with self.assertRaises(GithubException):
+            list(self.gh_client.get_commits_history({'user/repo': None}))
+
+    def test_query_separate_rate_limit(self):
+        """Check if GraphQL rate limit budget is tracked apart from the REST one."""
+        self.server.responses = [load_fixture('graphql_history_second_round.json')]
+
+        list(self.gh_client.get_commits_history({'user/repo': None}))
+
+        self.assertIsNone(self.gh_client.rate_limit.get('access-token'))
+        self.assertEqual(
+            self.gh_client.rate_limit.get('access-token:graphql')['remaining'], 4990
+        )
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
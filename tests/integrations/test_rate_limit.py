@@ -0,0 +1,126 @@
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.cache import caches
+
+from integrations.etag_cache import token_fingerprint
+from integrations.rate_limit import (MAX_DELAY, RateLimitBudget,
+                                     RateLimitExhaustedException)
+
+
+class TestRateLimitBudget(TestCase):
+    def setUp(self) -> None:
+        caches['github'].clear()
+        self.budget = RateLimitBudget(reserve=10, slowdown_threshold=100)
+        self.reset = int(time.time()) + 600
+
+    def rate_limit_headers(self, remaining: int, reset: int = None) -> dict:
+        return {
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Limit': '5000',
+            'X-RateLimit-Reset': str(reset or self.reset),
+        }
+
+    def test_update(self):
+        """Check if the budget is updated with the response rate limit headers."""
+        self.budget.update('token', self.rate_limit_headers(4000))
+
+        self.assertEqual(self.budget.get('token'), {'remaining': 4000, 'limit': 5000, 'reset': self.reset})
+        self.assertIsNone(self.budget.get('other-token'))
+
+    def test_update_without_headers(self):
+        """Check if responses without rate limit headers are ignored."""
+        self.budget.update('token', {})
+
+        self.assertIsNone(self.budget.get('token'))
+
+    def test_acquire(self):
+        """Check if every request is taken from the budget."""
+        self.budget.update('token', self.rate_limit_headers(4000))
+
+        self.budget.acquire('token')
+        self.budget.acquire('token')
+
+        self.assertEqual(self.budget.get('token')['remaining'], 3998)
+
+    def test_acquire_unknown_budget(self):
+        """Check if requests are allowed when the budget is not known yet."""
+        self.budget.acquire('token')
+
+        self.assertIsNone(self.budget.get('token'))
+
+    @patch('integrations.rate_limit.time.sleep')
+    def test_acquire_slowdown(self, sleep_mock):
+        """Check if requests are spread until the reset when the budget is low."""
+        self.budget.update('token', self.rate_limit_headers(51, reset=int(time.time()) + 100))
+
+        self.budget.acquire('token')
+
+        sleep_mock.assert_called_once()
+        self.assertAlmostEqual(sleep_mock.call_args.args[0], 100 / 50, delta=0.1)
+
+    @patch('integrations.rate_limit.time.sleep')
+    def test_acquire_slowdown_max_delay(self, sleep_mock):
+        """Check if the wait between requests is capped."""
+        self.budget.update('token', self.rate_limit_headers(51))
+
+        self.budget.acquire('token')
+
+        sleep_mock.assert_called_once_with(MAX_DELAY)
+
+    @patch('integrations.rate_limit.time.sleep')
+    def test_acquire_no_slowdown(self, sleep_mock):
+        """Check if requests are not delayed while the budget is high."""
+        self.budget.update('token', self.rate_limit_headers(4000))
+
+        self.budget.acquire('token')
+
+        sleep_mock.assert_not_called()
+
+    @patch('integrations.rate_limit.time.sleep')
+    def test_acquire_non_blocking(self, sleep_mock):
+        """Check if budgets which don't block raise instead of waiting when the budget is low."""
+        budget = RateLimitBudget(reserve=10, slowdown_threshold=100, blocking=False)
+        budget.update('token', self.rate_limit_headers(4000))
+        budget.acquire('token')
+
+        budget.update('token', self.rate_limit_headers(51))
+        with self.assertRaises(RateLimitExhaustedException):
+            budget.acquire('token')
+
+        sleep_mock.assert_not_called()
+
+    def test_acquire_exhausted(self):
+        """Check if RateLimitExhaustedException is raised when only the reserve is left."""
+        self.budget.update('token', self.rate_limit_headers(10))
+
+        with self.assertRaises(RateLimitExhaustedException) as context:
+            self.budget.acquire('token')
+
+        self.assertEqual(context.exception.reset_at, self.reset)
+        self.assertAlmostEqual(context.exception.retry_after, 601, delta=2)
+
+    def test_snapshot(self):
+        """Check if the budget of every token seen is listed by fingerprint."""
+        self.budget.update('token', self.rate_limit_headers(4000))
+        self.budget.update('other-token', self.rate_limit_headers(3000))
+
+        snapshot = RateLimitBudget().snapshot()
+
+        self.assertEqual(snapshot[token_fingerprint('token')]['remaining'], 4000)
+        self.assertEqual(snapshot[token_fingerprint('other-token')]['remaining'], 3000)
+
+    def test_snapshot_concurrent_workers(self):
+        """Check if tokens seen by concurrent workers are all listed, each once."""
+        budgets = [RateLimitBudget(), RateLimitBudget()]
+        for budget in budgets:
+            budget.update('token', self.rate_limit_headers(4000))
+        budgets[0].update('other-token', self.rate_limit_headers(3000))
+        budgets[1].update('third-token', self.rate_limit_headers(2000))
+
+        snapshot = RateLimitBudget().snapshot()
+
+        self.assertCountEqual(snapshot, [
+            token_fingerprint(token) for token in ('token', 'other-token', 'third-token')
+        ])
@@ -1,6 +1,7 @@
 from django.test import TestCase
 
-from repositories.adapters import CommitAdapter
+from repositories.adapters import (BaseAdapter, CommitAdapter,
+                                   GraphQLCommitAdapter, PushCommitAdapter)
 
 
 class CommitAdapterTest(TestCase):
@@ -57,3 +58,99 @@ class CommitAdapterTest(TestCase):
 
         results = [CommitAdapter.from_data(commit_data) for commit_data in data]
         self.assertCountEqual(results, expected_results)
+
+
+class PushCommitAdapterTest(TestCase):
+    def test_from_data(self):
+        data = {
+            "id": "12345",
+            "message": "commit 01",
+            "timestamp": "2023-04-14T16:00:49-03:00",
+            "url": "https://github.com/user/repo/commit/12345",
+            "author": {"name": "John Doe", "email": "john@example.com", "username": "johndoe"},
+        }
+
+        expected_result = {
+            "message": "commit 01",
+            "sha": "12345",
+            "author": "John Doe",
+            "date": "2023-04-14T16:00:49-03:00",
+        }
+
+        self.assertEqual(PushCommitAdapter.from_data(data), expected_result)
+
+
+class GraphQLCommitAdapterTest(TestCase):
+    def test_from_data(self):
+        data = [
+            {
+                "oid": "12345",
+                "message": "commit 01",
+                "url": "https://github.com/user/repo/commit/12345",
+                "authoredDate": "2023-04-14T16:00:49Z",
+                "author": {"name": "John Doe", "user": {"avatarUrl": "https://example.com/1.png"}},
+            },
+            {
+                "oid": "67890",
+                "message": "commit 02",
+                "url": "https://github.com/user/repo/commit/67890",
+                "authoredDate": "2023-04-16T12:00:49Z",
+                "author": {"name": "Jane Green", "user": None},
+            },
+        ]
+
+        expected_results = [
+            {
+                "message": "commit 01",
+                "sha": "12345",
+                "author": "John Doe",
+                "date": "2023-04-14T16:00:49Z",
+                "avatar": "https://example.com/1.png",
+            },
+            {
+                "message": "commit 02",
+                "sha": "67890",
+                "author": "Jane Green",
+                "date": "2023-04-16T12:00:49Z",
+                "avatar": None,
+            },
+        ]
+
+        results = [GraphQLCommitAdapter.from_data(commit_data) for commit_data in data]
+        self.assertCountEqual(results, expected_results)
+
+
+class BaseAdapterTest(TestCase):
+    def test_from_data_missing_paths(self):
+        """Check if missing keys, null parents and non dict parents are returned as None."""
+        data = [
+            {"sha": "12345"},
+            {"sha": "12345", "commit": None, "author": None},
+            {"sha": "12345", "commit": {"author": "John Doe"}, "author": []},
+            "not a commit",
+        ]
+
+        for commit_data in data:
+            result = CommitAdapter.from_data(commit_data)
+
+            self.assertEqual(list(result), list(CommitAdapter.fields))
+            self.assertIsNone(result["author"])
+            self.assertIsNone(result["avatar"])
+
+    def test_find(self):
+        """Check if find returns the default value when the path is missing."""
+        data = {"commit": {"author": {"name": "John Doe"}}}
+
+        self.assertEqual(BaseAdapter.find("commit.author.name", data), "John Doe")
+        self.assertEqual(BaseAdapter.find("commit.committer.name", data, default=""), "")
+        self.assertIsNone(BaseAdapter.find("commit.author.name.first", data))
+        self.assertEqual(BaseAdapter.find("a.b.c.d", {"a": {"b": {"c": {"d": 1}}}}), 1)
+
+    def test_from_many(self):
+        """Check if from_many lazily returns the same results as from_data."""
+        data = [{"id": str(i), "message": f"commit {i}"} for i in range(3)]
+
+        results = PushCommitAdapter.from_many(iter(data))
+
+        self.assertEqual(next(results), PushCommitAdapter.from_data(data[0]))
+        self.assertEqual(list(results), [PushCommitAdapter.from_data(item) for item in data[1:]])
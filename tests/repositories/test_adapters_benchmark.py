@@ -0,0 +1,76 @@
+import os
+import time
+from unittest import TestCase, skipUnless
+
+from repositories.adapters import CommitAdapter
+
+PAYLOADS = 100_000
+
+
+def legacy_from_data(data: dict) -> dict:
+    """CommitAdapter.from_data before its paths were compiled, as the baseline."""
+    fields = {
+        "message": "commit.message",
+        "sha": "sha",
+        "author": "commit.author.name",
+        "url": "url",
+        "date": "commit.author.date",
+        "avatar": "author.avatar_url"
+    }
+
+    def find(path, data):
+        rv = data
+        try:
+            for key in path.split('.'):
+                rv = rv[key]
+            return rv
+        except (KeyError, TypeError):
+            return None
+
+    return {key: find(path, data) for key, path in fields.items()}
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Set RUN_BENCHMARKS=1 to run benchmarks')
+class CommitAdapterBenchmark(TestCase):
+    """Throughput of CommitAdapter on synthetic Github commits payloads.
+
+    Run with `RUN_BENCHMARKS=1 python manage.py test tests.repositories.test_adapters_benchmark`.
+    """
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.payloads = [
+            {
+                "sha": f"{i:040x}",
+                "url": f"https://api.github.com/repos/user/repo/commits/{i:040x}",
+                "commit": {
+                    "message": f"commit {i}",
+                    "author": {"name": f"Author {i % 50}", "date": "2023-04-14T16:00:49Z"},
+                },
+                # Commits by emails not linked to a Github user have no author
+                "author": {"avatar_url": f"https://example.com/{i % 50}.png"} if i % 10 else None,
+            } for i in range(PAYLOADS)
+        ]
+
+    def measure(self, name, adapt):
+        start = time.perf_counter()
+        results = adapt(self.payloads)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), PAYLOADS)
+        print(f"\n{name}: {PAYLOADS / elapsed:,.0f} payloads/s ({elapsed * 1000:.0f}ms)")
+        return elapsed
+
+    def test_throughput(self):
+        """Check the throughput of the compiled adapter against the legacy one."""
+        legacy = self.measure(
+            'legacy from_data', lambda payloads: [legacy_from_data(data) for data in payloads]
+        )
+        from_data = self.measure(
+            'from_data', lambda payloads: [CommitAdapter.from_data(data) for data in payloads]
+        )
+        from_many = self.measure(
+            'from_many', lambda payloads: list(CommitAdapter.from_many(payloads))
+        )
+
+        print(f"Speedup: from_data {legacy / from_data:.1f}x, from_many {legacy / from_many:.1f}x")
@@ -0,0 +1,57 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from repositories.cache import CommitListCache
+
+
+class TestCommitListCache(TestCase):
+    def setUp(self) -> None:
+        caches['default'].clear()
+        self.cache = CommitListCache(timeout=60)
+
+    def test_make_key_normalized(self):
+        """Check if keys ignore params order, empty params and case insensitive filters case."""
+        key = self.cache.make_key({'repository': 'User/Repo', 'author': 'Jane', 'page': '2'})
+
+        self.assertEqual(
+            key, self.cache.make_key({'page': '2', 'author': 'jane', 'repository': 'user/repo'})
+        )
+        self.assertEqual(key, self.cache.make_key({
+            'page': '2', 'author': 'jane', 'repository': 'user/repo', 'sha': '',
+        }))
+        self.assertNotEqual(
+            key, self.cache.make_key({'page': '3', 'author': 'jane', 'repository': 'user/repo'})
+        )
+
+    def test_bump_invalidates_repository_and_global_lists(self):
+        """Check if bumping a repository changes its keys and the unfiltered ones only."""
+        repository_key = self.cache.make_key({'repository': 'user/repo'})
+        global_key = self.cache.make_key({})
+        other_key = self.cache.make_key({'repository': 'user/other'})
+
+        self.cache.bump('User/Repo')
+
+        self.assertNotEqual(self.cache.make_key({'repository': 'user/repo'}), repository_key)
+        self.assertNotEqual(self.cache.make_key({}), global_key)
+        self.assertEqual(self.cache.make_key({'repository': 'user/other'}), other_key)
+
+    def test_bump_unknown_scope(self):
+        """Check if bumping a repository never listed doesn't fail."""
+        self.cache.bump('user/new')
+
+    def test_stats(self):
+        """Check if hits, misses and the time saved by hits are counted."""
+        key = self.cache.make_key({})
+
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, {'results': []}, elapsed=0.05)
+        self.assertEqual(self.cache.get(key), {'results': []})
+        self.assertEqual(self.cache.get(key), {'results': []})
+
+        self.assertEqual(self.cache.stats(), {
+            'hits': 2,
+            'misses': 1,
+            'hit_ratio': 2 / 3,
+            'average_miss_ms': 50.0,
+            'saved_ms': 100.0,
+        })
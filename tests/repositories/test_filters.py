@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, tag
+
+from repositories.filters import CommitFilter
+from repositories.ingestion import save_commits
+from repositories.models import Commit, Repository
+
+
+class TestCommitFilter(TestCase):
+    def setUp(self) -> None:
+        self.repository = Repository.objects.create(name='User/Repo')
+        self.other_repository = Repository.objects.create(name='user/other-repo')
+        Commit.objects.bulk_create([
+            Commit(
+                message=f'Commit {i}',
+                sha=f'sha{i}',
+                author='Jane Smith' if i % 2 else 'John Doe',
+                url=f'https://github.com/user/repo/commits/sha{i}',
+                date=datetime(2023, 4, 1, tzinfo=timezone.utc) + timedelta(days=i),
+                repository=self.repository if i < 6 else self.other_repository,
+            ) for i in range(10)
+        ])
+
+    def filter(self, **params):
+        return CommitFilter(params, queryset=Commit.objects.all()).qs
+
+    def test_filter_author(self):
+        """Check if commits are filtered by author ignoring case."""
+        commits = self.filter(author='jane SMITH')
+
+        self.assertEqual(
+            list(commits.values_list('sha', flat=True)), ['sha9', 'sha7', 'sha5', 'sha3', 'sha1']
+        )
+
+    def test_filter_repository(self):
+        """Check if commits are filtered by repository name ignoring case."""
+        commits = self.filter(repository='user/repo')
+
+        self.assertEqual(commits.count(), 6)
+        self.assertFalse(commits.exclude(repository=self.repository).exists())
+        self.assertFalse(self.filter(repository='user/unknown').exists())
+
+    def test_filter_author_and_repository(self):
+        """Check if both filters can be combined."""
+        commits = self.filter(author='john doe', repository='USER/OTHER-REPO')
+
+        self.assertEqual(list(commits.values_list('sha', flat=True)), ['sha8', 'sha6'])
+
+    @tag('postgres')
+    def test_filter_search(self):
+        """Check if commits are searched by message, matching partial tokens ignoring case."""
+        Commit.objects.filter(sha='sha3').update(message='Fix PROJ-1234 pagination')
+
+        commits = self.filter(search='proj-12')
+
+        self.assertEqual(list(commits.values_list('sha', flat=True)), ['sha3'])
+        self.assertEqual(self.filter(search='commit', repository='user/other-repo').count(), 4)
+        self.assertFalse(self.filter(search='unknown').exists())
+
+    @tag('postgres')
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search is Postgres only')
+    def test_filter_search_ranked(self):
+        """Check if searched commits are ordered by relevance, matching any form of the words."""
+        save_commits(self.repository, [
+            {
+                'message': message,
+                'sha': f'search{i}',
+                'author': 'Jane Smith',
+                'url': f'https://github.com/user/repo/commits/search{i}',
+                'date': datetime(2023, 5, 1, tzinfo=timezone.utc) + timedelta(days=i),
+                'avatar': None,
+            } for i, message in enumerate((
+                'Reverting cache of commits lists, reverted twice',
+                'Revert webhook retries',
+                'Update docs',
+            ))
+        ])
+
+        commits = self.filter(search='revert')
+
+        self.assertEqual(list(commits.values_list('sha', flat=True)), ['search0', 'search1'])
+
+    @tag('postgres')
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search is Postgres only')
+    def test_search_indexes(self):
+        """Check if the full-text and trigram indexes of commits messages are created."""
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Commit._meta.db_table)
+
+        self.assertIn('commit_search_vector_idx', indexes)
+        self.assertIn('commit_upper_message_trgm_idx', indexes)
+
+    def test_filter_author_uses_index(self):
+        """Check if filtering by author reads commits from the author and date index."""
+        plan = self.filter(author='jane smith')[:10].explain()
+
+        self.assertIn('commit_upper_author_date_idx', plan)
+
+    def test_filter_repository_uses_index(self):
+        """Check if filtering by repository reads commits from the repository and date index."""
+        plan = self.filter(repository='user/repo')[:10].explain()
+
+        self.assertIn('commit_repository_date_idx', plan)
+
+    def test_list_uses_index(self):
+        """Check if listing commits reads them already ordered from the date index."""
+        plan = Commit.objects.order_by('-date', 'id')[:10].explain()
+
+        self.assertIn('commit_date_id_idx', plan)
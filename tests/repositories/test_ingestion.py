@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from repositories.ingestion import (chunked, save_commits, save_push_event,
+                                    update_sync_cursor)
+from repositories.models import Commit, Repository
+
+
+class TestChunked(TestCase):
+    def test_chunked(self):
+        """Check if iterables are split in chunks of the provided size."""
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunked([], 2)), [])
+
+
+class TestSaveCommits(TestCase):
+    def setUp(self) -> None:
+        self.repository = Repository.objects.create(name="user/repo")
+        self.commits_data = [
+            {
+                "message": f"commit {i}",
+                "sha": f"sha{i}",
+                "author": "John Doe",
+                "url": f"https://api.github.com/repos/user/repo/commits/sha{i}",
+                "date": f"2023-04-{i + 10}T16:00:49Z",
+                "avatar": "https://github.com/images/error/octocat_happy.gif",
+            } for i in range(5)
+        ]
+
+    def test_save_commits(self):
+        """Check if all commits are saved and associated with the repository."""
+        saved = save_commits(self.repository, self.commits_data)
+
+        self.assertEqual(saved, 5)
+        self.assertCountEqual(
+            Commit.objects.filter(repository=self.repository).values_list('sha', flat=True),
+            [data['sha'] for data in self.commits_data]
+        )
+
+    def test_save_commits_in_batches(self):
+        """Check if commits are written with one statement per batch."""
+        with self.assertNumQueries(2 + 3):  # savepoint/release + one insert per batch
+            save_commits(self.repository, self.commits_data, batch_size=2)
+
+        self.assertEqual(Commit.objects.count(), 5)
+
+    def test_save_commits_idempotent(self):
+        """Check if saving the same commits again doesn't duplicate them."""
+        save_commits(self.repository, self.commits_data)
+        save_commits(self.repository, self.commits_data)
+
+        self.assertEqual(Commit.objects.count(), 5)
+
+    def test_save_commits_updates_existing(self):
+        """Check if already saved commits are updated with the new data."""
+        save_commits(self.repository, self.commits_data)
+
+        self.commits_data[0]["message"] = "amended message"
+        save_commits(self.repository, self.commits_data[:1])
+
+        self.assertEqual(Commit.objects.get(sha="sha0").message, "amended message")
+        self.assertEqual(Commit.objects.count(), 5)
+
+    def test_save_commits_duplicated_in_batch(self):
+        """Check if a sha repeated inside the same batch is saved only once."""
+        saved = save_commits(self.repository, [self.commits_data[0], self.commits_data[0]])
+
+        self.assertEqual(saved, 1)
+        self.assertEqual(Commit.objects.count(), 1)
+
+    def test_save_commits_same_sha_other_repository(self):
+        """Check if the same sha can be saved for different repositories."""
+        other_repository = Repository.objects.create(name="user/fork")
+
+        save_commits(self.repository, self.commits_data)
+        save_commits(other_repository, self.commits_data)
+
+        self.assertEqual(Commit.objects.filter(repository=other_repository).count(), 5)
+        self.assertEqual(Commit.objects.count(), 10)
+
+    def test_save_commits_invalid_data(self):
+        """Check if invalid commits data raises ValidationError and nothing is saved."""
+        self.commits_data[-1]["date"] = None
+
+        with self.assertRaises(ValidationError):
+            save_commits(self.repository, self.commits_data, batch_size=2)
+
+        self.assertEqual(Commit.objects.count(), 0)
+
+    def test_update_sync_cursor(self):
+        """Check if the sync cursor points to the newest saved commit."""
+        synced_at = datetime(2023, 5, 1, tzinfo=timezone.utc)
+        save_commits(self.repository, self.commits_data)
+
+        update_sync_cursor(self.repository, synced_at)
+        self.repository.refresh_from_db()
+
+        self.assertEqual(self.repository.last_commit_sha, "sha4")
+        self.assertEqual(
+            self.repository.last_commit_date, datetime(2023, 4, 14, 16, 0, 49, tzinfo=timezone.utc)
+        )
+        self.assertEqual(self.repository.last_synced_at, synced_at)
+
+    def test_update_sync_cursor_without_commits(self):
+        """Check if only the sync date is set when the repository has no commits."""
+        synced_at = datetime(2023, 5, 1, tzinfo=timezone.utc)
+
+        update_sync_cursor(self.repository, synced_at)
+        self.repository.refresh_from_db()
+
+        self.assertEqual(self.repository.last_commit_sha, "")
+        self.assertIsNone(self.repository.last_commit_date)
+        self.assertEqual(self.repository.last_synced_at, synced_at)
+
+    def test_save_push_event(self):
+        """Check if push payload commits are saved with api url and pusher avatar."""
+        payload = {
+            "repository": {"commits_url": "https://api.github.com/repos/user/repo/commits{/sha}"},
+            "sender": {"login": "johndoe", "avatar_url": "https://example.com/avatar.png"},
+            "commits": [
+                {
+                    "id": "abc",
+                    "message": "commit abc",
+                    "timestamp": "2023-04-14T16:00:49Z",
+                    "author": {"name": "John Doe", "username": "johndoe"},
+                },
+                {
+                    "id": "def",
+                    "message": "commit def",
+                    "timestamp": "2023-04-15T16:00:49Z",
+                    "author": {"name": "Someone Else"},
+                },
+            ],
+        }
+
+        saved, truncated = save_push_event(self.repository, payload)
+
+        self.assertEqual(saved, 2)
+        self.assertFalse(truncated)
+        commit = Commit.objects.get(sha="abc")
+        self.assertEqual(commit.url, "https://api.github.com/repos/user/repo/commits/abc")
+        self.assertEqual(commit.avatar, "https://example.com/avatar.png")
+        self.assertIsNone(Commit.objects.get(sha="def").avatar)
@@ -0,0 +1,94 @@
+import os
+import resource
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from integrations.github_api import GithubAPIClient, clients_cache
+from repositories.models import Commit, Repository
+from repositories.tasks import get_last_30_days_repo_commits
+from tests.fake_github import FakeGithubServer, fake_commits
+
+# Thirty days of a busy repository, at one commit per minute
+COMMITS = 20_000
+LATENCY = 0.05
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Set RUN_BENCHMARKS=1 to run benchmarks')
+class IngestionBenchmark(TestCase):
+    """Throughput of get_last_30_days_repo_commits against a local fake Github api.
+
+    Run with `RUN_BENCHMARKS=1 python manage.py test tests.repositories.test_ingestion_benchmark`.
+    """
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.commits = fake_commits('user/repo', COMMITS)
+
+    def setUp(self) -> None:
+        caches['github'].clear()
+        clients_cache.clear()
+
+    def measure(self, name, repository, latency=LATENCY):
+        with FakeGithubServer({'user/repo': self.commits}, latency=latency) as server, \
+                patch(
+                    'repositories.tasks.GithubAPIClient.for_token',
+                    return_value=GithubAPIClient(server.access_token, base_url=server.url)
+                ), CaptureQueriesContext(connection) as queries:
+            saved_before = Commit.objects.filter(repository=repository).count()
+            start = time.perf_counter()
+            get_last_30_days_repo_commits(server.access_token, repository.id)
+            elapsed = time.perf_counter() - start
+            saved = Commit.objects.filter(repository=repository).count() - saved_before
+            requests = len(server.requests)
+
+        repository.refresh_from_db()
+        self.assertEqual(repository.status, Repository.Status.READY)
+        print(
+            f"\n{name}: {saved:,} commits in {elapsed * 1000:.0f}ms, "
+            f"{saved / elapsed:,.0f} commits/s, "
+            f"{requests} api calls ({requests / max(saved, 1):.3f}/commit), "
+            f"{len(queries)} db statements, peak RSS {peak_rss_mb():.0f}MB"
+        )
+        return saved
+
+    def test_backfill_sequential(self):
+        """Check the throughput of a backfill fetching one page at a time."""
+        repository = Repository.objects.create(name='user/repo')
+
+        with override_settings(COMMITS_FETCH_CONCURRENCY=1):
+            saved = self.measure('backfill, sequential', repository)
+
+        self.assertEqual(saved, COMMITS)
+
+    def test_backfill_concurrent(self):
+        """Check the throughput of a backfill fetching pages concurrently."""
+        repository = Repository.objects.create(name='user/repo')
+
+        saved = self.measure('backfill, concurrent', repository)
+
+        self.assertEqual(saved, COMMITS)
+
+    def test_incremental_sync(self):
+        """Check the cost of a sync after the repository was backfilled."""
+        repository = Repository.objects.create(name='user/repo')
+        self.measure('backfill', repository, latency=0)
+        newer_commits = fake_commits(
+            'user/repo', COMMITS + 10, until=datetime.now(tz=timezone.utc) + timedelta(minutes=10)
+        )[:10]
+        self.commits = newer_commits + self.commits
+
+        saved = self.measure('incremental sync', repository)
+
+        self.assertEqual(saved, 10)
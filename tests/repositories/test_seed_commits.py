@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from repositories.models import Commit, Repository
+
+
+class TestSeedCommits(TestCase):
+    def seed(self, seed=42):
+        call_command(
+            'seed_commits', repositories=20, commits=2_000, authors=50, chunk_size=300,
+            seed=seed, stdout=StringIO()
+        )
+
+    def test_seed_commits(self):
+        """Check if the requested number of repositories and commits are created."""
+        self.seed()
+
+        self.assertEqual(Repository.objects.filter(name__startswith='seed-owner-').count(), 20)
+        self.assertEqual(Commit.objects.count(), 2_000)
+        self.assertFalse(Commit.objects.filter(message='').exists())
+
+    def test_seed_commits_skewed(self):
+        """Check if commits concentrate on a few repositories and authors."""
+        self.seed()
+
+        per_repository = list(
+            Commit.objects.values('repository').annotate(total=Count('id'))
+            .order_by('-total').values_list('total', flat=True)
+        )
+        per_author = list(
+            Commit.objects.values('author').annotate(total=Count('id'))
+            .order_by('-total').values_list('total', flat=True)
+        )
+
+        self.assertGreater(per_repository[0], per_repository[-1] * 5)
+        self.assertGreater(per_author[0], 2_000 / 50 * 5)
+
+    def test_seed_commits_again(self):
+        """Check if seeding again reuses the repositories and adds more commits."""
+        self.seed()
+        self.seed(seed=7)
+
+        self.assertEqual(Repository.objects.count(), 20)
+        self.assertEqual(Commit.objects.count(), 4_000)
+
+    def test_seed_commits_without_repositories(self):
+        """Check if it fails with a usage error when no repositories or authors are requested."""
+        for options in ({'repositories': 0}, {'authors': 0}):
+            with self.assertRaises(CommandError):
+                call_command('seed_commits', commits=10, stdout=StringIO(), **options)
+
+        self.assertFalse(Commit.objects.exists())
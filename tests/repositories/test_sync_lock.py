@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from repositories.sync_lock import RepositorySyncLock
+
+
+class TestRepositorySyncLock(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.lock = RepositorySyncLock(1, timeout=60)
+
+    def test_acquire(self):
+        """Check if the lease is held by a single lock at a time, per repository."""
+        self.assertTrue(self.lock.acquire())
+        self.assertFalse(RepositorySyncLock(1).acquire())
+        self.assertTrue(RepositorySyncLock(2).acquire())
+
+    def test_release(self):
+        """Check if the lease can be taken again once released by its holder only."""
+        self.lock.acquire()
+
+        RepositorySyncLock(1).release()
+        self.assertFalse(RepositorySyncLock(1).acquire())
+
+        self.lock.release()
+        self.assertTrue(RepositorySyncLock(1).acquire())
+
+    def test_expiry(self):
+        """Check if the lease expires unless renewed by its holder's heartbeat."""
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1000):
+            self.lock.acquire()
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1050):
+            self.assertFalse(RepositorySyncLock(1).heartbeat())
+            self.assertTrue(self.lock.heartbeat())
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1100):
+            self.assertFalse(RepositorySyncLock(1).acquire())
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1111):
+            self.assertFalse(self.lock.heartbeat())
+            self.assertTrue(RepositorySyncLock(1).acquire())
+
+    def test_rerun(self):
+        """Check if reruns requested meanwhile are returned on release, and dropped on acquire."""
+        self.lock.acquire()
+        RepositorySyncLock(1).request_rerun()
+        RepositorySyncLock(1).request_rerun()
+
+        self.assertTrue(self.lock.release())
+        self.assertFalse(self.lock.release())
+
+        RepositorySyncLock(1).request_rerun()
+        self.lock.acquire()
+        self.assertFalse(self.lock.release())
+
+    def test_rerun_requested_while_released(self):
+        """Check if reruns requested before acquiring aren't lost if the holder releases them."""
+        self.lock.acquire()
+        other_lock = RepositorySyncLock(1)
+
+        other_lock.request_rerun()
+        self.assertTrue(self.lock.release())
+        self.assertTrue(other_lock.acquire())
+        self.assertFalse(other_lock.release())
+
+        self.lock.acquire()
+        self.assertFalse(self.lock.release())
+        other_lock.request_rerun()
+        self.assertTrue(other_lock.acquire())
+
+    def test_acquire_same_token(self):
+        """Check if the lease can be taken again with the holder token, e.g. on redeliveries."""
+        RepositorySyncLock(1, token='task-id').acquire()
+
+        self.assertTrue(RepositorySyncLock(1, token='task-id').acquire())
+        self.assertFalse(RepositorySyncLock(1, token='other-task-id').acquire())
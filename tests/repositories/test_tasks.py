@@ -1,16 +1,35 @@
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock, patch
+from unittest.mock import Mock, patch
 
-from django.test import TestCase
+import requests
+from celery.exceptions import Retry
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from freezegun import freeze_time
+from github.GithubException import GithubException, UnknownObjectException
 
+from githubmonitor.celery import app
+from integrations.github_api import (GithubAPIClient,
+                                     InvalidRequestUserException)
+from integrations.rate_limit import RateLimitExhaustedException
 from repositories.adapters import CommitAdapter
 from repositories.models import Commit, Repository
-from repositories.tasks import get_last_30_days_repo_commits
+from repositories.sync_lock import RepositorySyncLock
+from repositories.tasks import (abort_repository_sync, backfill_slices,
+                                finish_repository_sync,
+                                get_last_30_days_repo_commits,
+                                get_repo_commits_slice, refresh_repositories,
+                                refresh_repositories_history,
+                                register_push_webhooks, sync_since,
+                                until_known_commit, validate_repository)
+from tests.fake_github import FakeGithubServer, fake_commits
 
 
 class TestTasks(TestCase):
     def setUp(self) -> None:
+        caches['default'].clear()
         self.repository = Repository.objects.create(name="Test Repository")
         self.commits_from_api = [
             {
@@ -49,19 +68,18 @@ class TestTasks(TestCase):
     def test_get_last_30_days_repo_commits(self, gh_client_mock):
         """Check if commits are fetched using GithubAPIClient and if they are saved on db."""
         access_token = "access-token"
-        last_thirty_days = datetime.now(tz=timezone.utc) - timedelta(days=30)
+        last_thirty_days = datetime(2023, 3, 2, tzinfo=timezone.utc)
 
-        gh_client_mock.return_value.get_commits_from_repository.return_value = [
-            MagicMock(raw_data=data) for data in self.commits_from_api
-        ]
+        gh_client_mock.for_token.return_value.get_commit_pages.return_value = [self.commits_from_api]
 
         get_last_30_days_repo_commits(access_token, self.repository.id)
         saved_commits = Commit.objects.all().order_by("sha")
 
         # Check if GithubAPIClient methods were called as expected
-        gh_client_mock.assert_called_once_with(access_token)
-        gh_client_mock.return_value.get_commits_from_repository.assert_called_once_with(
-            self.repository.name, since=last_thirty_days
+        gh_client_mock.for_token.assert_called_once_with(access_token)
+        gh_client_mock.for_token.return_value.get_commit_pages.assert_called_once_with(
+            self.repository.name, since=last_thirty_days, until=None,
+            concurrency=settings.COMMITS_FETCH_CONCURRENCY
         )
 
         # Use serializer and compare saved commits with commits returned by Github api
@@ -74,3 +92,734 @@ class TestTasks(TestCase):
             self.assertEqual(commit.url, commit_data['url'])
             self.assertEqual(commit.avatar, commit_data['avatar'])
             self.assertEqual(commit.repository, self.repository)
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_idempotent(self, gh_client_mock):
+        """Check if running the task again for the same commits doesn't duplicate them."""
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = lambda *args, **kwargs: [
+            self.commits_from_api
+        ]
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.assertEqual(Commit.objects.filter(repository=self.repository).count(), 2)
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_keeps_saved_pages(self, gh_client_mock):
+        """Check if pages saved before a failure are kept on db."""
+        def pages(*args, **kwargs):
+            yield self.commits_from_api[:1]
+            raise ConnectionError("Connection lost.")
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        with self.assertRaises(ConnectionError):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.assertCountEqual(
+            Commit.objects.filter(repository=self.repository).values_list("sha", flat=True),
+            [self.commits_from_api[0]["sha"]]
+        )
+
+    @freeze_time("2023-04-20 12:00:00")
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_updates_sync_cursor(self, gh_client_mock):
+        """Check if the repository sync cursor points to the newest commit after a sync."""
+        gh_client_mock.for_token.return_value.get_commit_pages.return_value = [self.commits_from_api]
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+        self.repository.refresh_from_db()
+
+        self.assertEqual(self.repository.last_commit_sha, "67890")
+        self.assertEqual(
+            self.repository.last_commit_date, datetime(2023, 4, 16, 12, 0, 49, tzinfo=timezone.utc)
+        )
+        self.assertEqual(self.repository.last_synced_at, datetime.now(tz=timezone.utc))
+
+    @freeze_time("2023-04-20 12:00:00")
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_incremental(self, gh_client_mock):
+        """Check if a follow-up sync fetches only commits newer than the sync cursor.
+
+        Check if pages stop being consumed once the newest known commit is found.
+        """
+        self.repository.last_commit_sha = "67890"
+        self.repository.last_commit_date = datetime(2023, 4, 16, 12, 0, 49, tzinfo=timezone.utc)
+        self.repository.save()
+
+        new_commit = {
+            **self.commits_from_api[1],
+            "sha": "abcde",
+            "url": "https://api.github.com/repos/user/repo/commits/abcde",
+        }
+        consumed_pages = []
+
+        def pages(*args, **kwargs):
+            for page in ([new_commit, self.commits_from_api[1]], [self.commits_from_api[0]]):
+                consumed_pages.append(page)
+                yield page
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        gh_client_mock.for_token.return_value.get_commit_pages.assert_called_once_with(
+            self.repository.name, since=self.repository.last_commit_date, until=None,
+            concurrency=1
+        )
+        self.assertEqual(len(consumed_pages), 1)
+        self.assertCountEqual(
+            Commit.objects.filter(repository=self.repository).values_list("sha", flat=True),
+            ["abcde"]
+        )
+
+    # Retries keep the task id, and so the lock token
+    @patch('repositories.sync_lock.uuid.uuid4', return_value=Mock(hex='task-id'))
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_checkpoint(self, gh_client_mock, _uuid_mock):
+        """Check if pages saved before a transient failure are resumed from the checkpoint."""
+        def pages(*args, **kwargs):
+            yield self.commits_from_api[:1]
+            raise requests.ConnectionError("Connection reset by peer")
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        with patch.object(get_last_30_days_repo_commits, 'retry', side_effect=Retry()) as retry_mock:
+            with self.assertRaises(Retry):
+                get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.assertLessEqual(retry_mock.call_args.kwargs['countdown'], settings.SYNC_RETRY_BACKOFF)
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.SYNCING)
+        self.assertEqual(
+            self.repository.sync_checkpoint, datetime(2023, 4, 14, 16, 0, 49, tzinfo=timezone.utc)
+        )
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = None
+        gh_client_mock.for_token.return_value.get_commit_pages.return_value = [
+            self.commits_from_api[1:]
+        ]
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.assertEqual(
+            gh_client_mock.for_token.return_value.get_commit_pages.call_args.kwargs['until'],
+            datetime(2023, 4, 14, 16, 0, 49, tzinfo=timezone.utc)
+        )
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.READY)
+        self.assertIsNone(self.repository.sync_checkpoint)
+        self.assertEqual(Commit.objects.filter(repository=self.repository).count(), 2)
+
+    @override_settings(SYNC_MAX_RETRIES=0)
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_retries_exhausted(self, gh_client_mock):
+        """Check if the repository is marked as failed once transient failures use all retries."""
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = GithubException(
+            502, "Server Error", None
+        )
+
+        with self.assertRaises(GithubException):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.FAILED)
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_failed_rerun(self, gh_client_mock, get_commits_task_mock):
+        """Check if syncs requested meanwhile still run after a failed sync."""
+        def pages(*args, **kwargs):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+            raise GithubException(422, "Unprocessable Entity", None)
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        with self.assertRaises(GithubException):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+        self.assertTrue(RepositorySyncLock(self.repository.id).acquire())
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_repo_commits_slice_checkpoint(self, gh_client_mock):
+        """Check if slices are retried from the oldest page saved."""
+        def pages(*args, **kwargs):
+            yield self.commits_from_api[:1]
+            raise GithubException(503, "Service Unavailable", None)
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        with patch.object(get_repo_commits_slice, 'retry', side_effect=Retry()) as retry_mock:
+            with self.assertRaises(Retry):
+                get_repo_commits_slice(
+                    "access-token", self.repository.id,
+                    ("2023-03-01T00:00:00+00:00", "2023-04-15T00:00:00+00:00")
+                )
+
+        self.assertEqual(
+            retry_mock.call_args.kwargs['kwargs'], {'checkpoint': '2023-04-14T16:00:49+00:00'}
+        )
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = None
+        get_repo_commits_slice(
+            "access-token", self.repository.id,
+            ("2023-03-01T00:00:00+00:00", "2023-04-15T00:00:00+00:00"),
+            checkpoint='2023-04-14T16:00:49+00:00'
+        )
+        self.assertEqual(
+            gh_client_mock.for_token.return_value.get_commit_pages.call_args.kwargs['until'],
+            datetime(2023, 4, 14, 16, 0, 49, tzinfo=timezone.utc)
+        )
+
+    def test_until_known_commit(self):
+        """Check if pages are truncated right before the known commit."""
+        pages = [[{"sha": "3"}, {"sha": "2"}], [{"sha": "1"}, {"sha": "0"}], [{"sha": "-1"}]]
+
+        self.assertEqual(
+            list(until_known_commit(pages, "1")), [[{"sha": "3"}, {"sha": "2"}], []]
+        )
+        self.assertEqual(list(until_known_commit(pages, "")), pages)
+
+    def test_sync_since_stable_for_the_day(self):
+        """Check if the backfill window start is the same all day long.
+
+        Requests of a same day are the same, so they keep their ETags.
+        """
+        morning = datetime(2023, 4, 1, 8, 15, tzinfo=timezone.utc)
+        since = sync_since(self.repository, morning)
+
+        self.assertEqual(since, datetime(2023, 3, 2, tzinfo=timezone.utc))
+        self.assertEqual(sync_since(self.repository, morning + timedelta(hours=15)), since)
+
+    def test_backfill_slices(self):
+        """Check if a backfill window is split into slices, newest first."""
+        until = datetime(2023, 4, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(backfill_slices(until - timedelta(days=70), until, 30), [
+            (until - timedelta(days=30), until),
+            (until - timedelta(days=60), until - timedelta(days=30)),
+            (until - timedelta(days=70), until - timedelta(days=60)),
+        ])
+        self.assertEqual(
+            backfill_slices(until - timedelta(days=30), until, 30),
+            [(until - timedelta(days=30), until)]
+        )
+
+    @freeze_time("2023-04-01 12:00:00")
+    @patch('repositories.tasks.chord')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_sliced_backfill(self, gh_client_mock, chord_mock):
+        """Check if backfills longer than a slice are fetched by a chord of slice tasks."""
+        self.repository.backfill_days = 90
+        self.repository.save()
+        now = datetime.now(tz=timezone.utc)
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        slices = chord_mock.call_args.args[0]
+        self.assertEqual([task.args[2] for task in slices], [
+            ((now - timedelta(days=30)).isoformat(), now.isoformat()),
+            ((now - timedelta(days=60)).isoformat(), (now - timedelta(days=30)).isoformat()),
+            (datetime(2023, 1, 1, tzinfo=timezone.utc).isoformat(),
+             (now - timedelta(days=60)).isoformat()),
+        ])
+        self.assertEqual(slices[0].task, get_repo_commits_slice.name)
+        self.assertEqual([task.options['priority'] for task in slices], [0, 1, 2])
+        lock_token = caches['default'].get(f'repositories:sync_lock:{self.repository.id}')
+        lock_args = (self.repository.id, "access-token", lock_token)
+        callback = chord_mock.return_value.call_args.args[0]
+        self.assertEqual((callback.task, callback.args), (finish_repository_sync.name, lock_args))
+        self.assertEqual(callback.options['link_error'], [abort_repository_sync.si(*lock_args)])
+        gh_client_mock.for_token.return_value.get_commit_pages.assert_not_called()
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.SYNCING)
+
+    def test_finish_repository_sync(self):
+        """Check if the sync cursor points to the newest commit and repository is ready."""
+        self.repository.commit_set.create(
+            sha="12345", message="commit", author="John Doe", url="https://example.com",
+            date=datetime(2023, 4, 14, tzinfo=timezone.utc)
+        )
+
+        finish_repository_sync(self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.last_commit_sha, "12345")
+        self.assertIsNotNone(self.repository.last_synced_at)
+        self.assertEqual(self.repository.status, Repository.Status.READY)
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    def test_finish_repository_sync_releases_lock(self, get_commits_task_mock):
+        """Check if the lock handed over by a sliced sync is released, syncing again if asked."""
+        lock = RepositorySyncLock(self.repository.id)
+        lock.acquire()
+        RepositorySyncLock(self.repository.id).request_rerun()
+
+        finish_repository_sync(self.repository.id, "access-token", lock.token)
+
+        self.assertTrue(RepositorySyncLock(self.repository.id).acquire())
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    def test_abort_repository_sync(self, get_commits_task_mock):
+        """Check if the lock of a sliced sync is released if any slice failed."""
+        lock = RepositorySyncLock(self.repository.id)
+        lock.acquire()
+        RepositorySyncLock(self.repository.id).request_rerun()
+
+        abort_repository_sync(self.repository.id, "access-token", lock.token)
+
+        self.assertTrue(RepositorySyncLock(self.repository.id).acquire())
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_already_syncing(self, gh_client_mock):
+        """Check if a sync started while the repository syncs only asks for a sync after it."""
+        lock = RepositorySyncLock(self.repository.id)
+        lock.acquire()
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        gh_client_mock.for_token.return_value.get_commit_pages.assert_not_called()
+        self.assertTrue(lock.release())
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_rerun(self, gh_client_mock, get_commits_task_mock):
+        """Check if syncs started meanwhile are collapsed into a single sync after this one."""
+        def pages(*args, **kwargs):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+            yield self.commits_from_api
+
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = pages
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        gh_client_mock.for_token.return_value.get_commit_pages.assert_called_once()
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+        self.assertTrue(RepositorySyncLock(self.repository.id).acquire())
+
+    def test_finish_repository_sync_failed(self):
+        """Check if repositories which failed on a slice aren't marked as ready."""
+        self.repository.set_status(Repository.Status.FAILED, "Repository not found on Github.")
+
+        finish_repository_sync(self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.FAILED)
+        self.assertIsNone(self.repository.last_synced_at)
+
+    @freeze_time("2023-04-20 12:00:00")
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_get_last_30_days_repo_commits_rate_limit_exhausted(self, gh_client_mock):
+        """Check if the task is deferred until the rate limit budget is reset."""
+        reset_at = datetime.now(tz=timezone.utc).timestamp() + 120
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = RateLimitExhaustedException(reset_at)
+
+        with patch.object(get_last_30_days_repo_commits, 'retry', side_effect=Retry()) as retry_mock:
+            with self.assertRaises(Retry):
+                get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.assertEqual(retry_mock.call_args.kwargs['countdown'], 121)
+        self.assertFalse(RepositorySyncLock(self.repository.id).acquire())
+        self.repository.refresh_from_db()
+        self.assertIsNone(self.repository.last_synced_at)
+
+
+class TestRefreshTasks(TestCase):
+    def setUp(self) -> None:
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="johndoe")
+        self.repositories = [
+            Repository.objects.create(
+                name=f"user/repo-{i}", created_by=self.user, status=Repository.Status.READY
+            ) for i in range(2)
+        ]
+        Repository.objects.create(name="user/orphan", status=Repository.Status.READY)
+        Repository.objects.create(name="user/pending", created_by=self.user)
+        Repository.objects.create(
+            name="user/not-found", created_by=self.user, status=Repository.Status.FAILED
+        )
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.apply_async')
+    @patch('repositories.tasks.GithubAPIClient.from_request_user')
+    def test_refresh_repositories_rest(self, from_request_user_mock, get_commits_task_mock):
+        """Check if each repository with an owner is refreshed by its own task with REST api.
+
+        Check if repositories being registered or which never synced are left out.
+        Check if tasks are sent to the refresh queue.
+        """
+        from_request_user_mock.return_value.access_token = "access-token"
+
+        refresh_repositories()
+
+        from_request_user_mock.assert_called_once_with(self.user)
+        self.assertCountEqual(
+            [call.args[0] for call in get_commits_task_mock.call_args_list],
+            [("access-token", repository.id) for repository in self.repositories]
+        )
+        self.assertTrue(all(
+            call.kwargs == {'queue': 'refresh'} for call in get_commits_task_mock.call_args_list
+        ))
+
+    @override_settings(GITHUB_API_BACKEND='graphql')
+    @patch('repositories.tasks.refresh_repositories_history.delay')
+    @patch('repositories.tasks.GithubAPIClient.from_request_user')
+    def test_refresh_repositories_graphql(self, from_request_user_mock, refresh_task_mock):
+        """Check if repositories of the same user are refreshed together with GraphQL api."""
+        from_request_user_mock.return_value.access_token = "access-token"
+
+        refresh_repositories()
+
+        refresh_task_mock.assert_called_once()
+        access_token, repository_ids = refresh_task_mock.call_args.args
+        self.assertEqual(access_token, "access-token")
+        self.assertCountEqual(repository_ids, [repository.id for repository in self.repositories])
+
+    @override_settings(GITHUB_API_BACKEND='graphql', REPOSITORIES_PER_REFRESH_TASK=1)
+    @patch('repositories.tasks.refresh_repositories_history.delay')
+    @patch('repositories.tasks.GithubAPIClient.from_request_user')
+    def test_refresh_repositories_graphql_chunked(self, from_request_user_mock, refresh_task_mock):
+        """Check if no more than REPOSITORIES_PER_REFRESH_TASK repositories go on each task."""
+        from_request_user_mock.return_value.access_token = "access-token"
+
+        refresh_repositories()
+
+        chunks = [call.args[1] for call in refresh_task_mock.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
+        self.assertCountEqual(
+            [repository_id for chunk in chunks for repository_id in chunk],
+            [repository.id for repository in self.repositories]
+        )
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.apply_async')
+    @patch('repositories.tasks.GithubAPIClient.from_request_user')
+    def test_refresh_repositories_without_token(self, from_request_user_mock, get_commits_task_mock):
+        """Check if repositories of users without Github token are skipped."""
+        from_request_user_mock.side_effect = InvalidRequestUserException()
+
+        refresh_repositories()
+
+        get_commits_task_mock.assert_not_called()
+
+    @freeze_time("2023-04-20 12:00:00")
+    @patch('repositories.tasks.GithubGraphQLClient')
+    def test_refresh_repositories_history(self, gh_client_mock):
+        """Check if commits of every repository are saved and their sync cursors updated.
+
+        Check if commits already saved are left out.
+        """
+        known = self.repositories[1]
+        known.last_commit_sha = "known"
+        known.last_commit_date = datetime(2023, 4, 15, tzinfo=timezone.utc)
+        known.save()
+
+        def node(oid, date):
+            return {
+                "oid": oid, "message": f"commit {oid}", "authoredDate": date,
+                "author": {"name": "John Doe", "user": None},
+            }
+
+        gh_client_mock.for_token.return_value.get_commits_history.return_value = [
+            ("user/repo-0", [node("a", "2023-04-18T00:00:00Z"), node("b", "2023-04-17T00:00:00Z")]),
+            ("user/repo-1", [node("c", "2023-04-19T00:00:00Z"), node("known", "2023-04-15T00:00:00Z")]),
+            ("user/repo-0", [node("d", "2023-04-16T00:00:00Z")]),
+        ]
+
+        refresh_repositories_history("access-token", [repository.id for repository in self.repositories])
+
+        gh_client_mock.for_token.assert_called_once_with("access-token")
+        self.assertEqual(gh_client_mock.for_token.return_value.get_commits_history.call_args.args[0], {
+            "user/repo-0": datetime(2023, 3, 21, tzinfo=timezone.utc),
+            "user/repo-1": datetime(2023, 4, 15, tzinfo=timezone.utc),
+        })
+        self.assertCountEqual(
+            Commit.objects.values_list("repository__name", "sha"),
+            [("user/repo-0", "a"), ("user/repo-0", "b"), ("user/repo-0", "d"), ("user/repo-1", "c")]
+        )
+        self.assertEqual(
+            Commit.objects.get(sha="c").url, "https://api.github.com/repos/user/repo-1/commits/c"
+        )
+        for repository in self.repositories:
+            repository.refresh_from_db()
+        self.assertEqual(self.repositories[0].last_commit_sha, "a")
+        self.assertEqual(self.repositories[1].last_commit_sha, "c")
+        self.assertEqual(
+            self.repositories[0].last_synced_at, datetime(2023, 4, 20, 12, tzinfo=timezone.utc)
+        )
+
+    @patch('repositories.tasks.GithubGraphQLClient')
+    def test_refresh_repositories_history_not_found(self, gh_client_mock):
+        """Check if only repositories found on Github have their sync cursors updated.
+
+        Check if repositories not found are marked as failed.
+        """
+        gh_client_mock.for_token.return_value.get_commits_history.return_value = [
+            ("user/repo-0", []),
+        ]
+
+        refresh_repositories_history("access-token", [repository.id for repository in self.repositories])
+
+        for repository in self.repositories:
+            repository.refresh_from_db()
+        self.assertEqual(self.repositories[0].status, Repository.Status.READY)
+        self.assertIsNotNone(self.repositories[0].last_synced_at)
+        self.assertEqual(self.repositories[1].status, Repository.Status.FAILED)
+        self.assertEqual(self.repositories[1].status_detail, "Repository not found on Github.")
+        self.assertIsNone(self.repositories[1].last_synced_at)
+        self.assertTrue(RepositorySyncLock(self.repositories[1].id).acquire())
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.apply_async')
+    @patch('repositories.tasks.GithubGraphQLClient')
+    def test_refresh_repositories_history_already_syncing(self, gh_client_mock, get_commits_task_mock):
+        """Check if repositories already syncing are refreshed with REST api instead."""
+        RepositorySyncLock(self.repositories[1].id).acquire()
+        gh_client_mock.for_token.return_value.get_commits_history.return_value = []
+
+        refresh_repositories_history("access-token", [repository.id for repository in self.repositories])
+
+        self.assertEqual(
+            list(gh_client_mock.for_token.return_value.get_commits_history.call_args.args[0]),
+            ["user/repo-0"]
+        )
+        get_commits_task_mock.assert_called_once_with(
+            ("access-token", self.repositories[1].id), queue='refresh'
+        )
+        self.assertTrue(RepositorySyncLock(self.repositories[0].id).acquire())
+
+    @override_settings(GITHUB_WEBHOOK_SECRET='')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_register_push_webhooks_without_secret(self, gh_client_mock):
+        """Check if webhooks aren't registered when no webhook secret is set."""
+        register_push_webhooks(
+            "access-token", [self.repositories[0].id], "https://example.com/api/webhooks/github/"
+        )
+
+        gh_client_mock.for_token.return_value.create_push_webhook.assert_not_called()
+        self.repositories[0].refresh_from_db()
+        self.assertIsNone(self.repositories[0].webhook_id)
+
+    @override_settings(GITHUB_WEBHOOK_SECRET='webhook-secret')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_register_push_webhooks(self, gh_client_mock):
+        """Check if webhooks are registered on repositories without one, skipping failures."""
+        self.repositories[1].webhook_id = 1
+        self.repositories[1].save()
+        forbidden = Repository.objects.create(name="user/forbidden", created_by=self.user)
+
+        def create_push_webhook(name, url, secret):
+            if name == forbidden.name:
+                raise UnknownObjectException(404, None, None)
+            return {"id": 1234}
+
+        gh_client_mock.for_token.return_value.create_push_webhook.side_effect = create_push_webhook
+
+        register_push_webhooks(
+            "access-token",
+            [repository.id for repository in (*self.repositories, forbidden)],
+            "https://example.com/api/webhooks/github/"
+        )
+
+        gh_client_mock.for_token.return_value.create_push_webhook.assert_any_call(
+            "user/repo-0",
+            "https://example.com/api/webhooks/github/",
+            settings.GITHUB_WEBHOOK_SECRET
+        )
+        self.assertEqual(gh_client_mock.for_token.return_value.create_push_webhook.call_count, 2)
+        self.assertEqual(
+            dict(Repository.objects.filter(
+                name__in=["user/repo-0", "user/repo-1", "user/forbidden"]
+            ).values_list("name", "webhook_id")),
+            {"user/repo-0": 1234, "user/repo-1": 1, "user/forbidden": None}
+        )
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='webhook-secret')
+class TestRepositoryRegistration(TestCase):
+    def setUp(self) -> None:
+        caches['default'].clear()
+        self.repository = Repository.objects.create(name="user/repo")
+        self.webhook_url = "https://example.com/api/webhooks/github/"
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository(self, gh_client_mock, get_commits_task_mock):
+        """Check if a repository found on Github gets a webhook and its commits fetched."""
+        gh_client_mock.for_token.return_value.create_push_webhook.return_value = {"id": 1234}
+
+        validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.repository.refresh_from_db()
+        gh_client_mock.for_token.return_value.get_repository.assert_called_once_with("user/repo")
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+        self.assertEqual(self.repository.webhook_id, 1234)
+        self.assertEqual(self.repository.status, Repository.Status.VALIDATING)
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository_webhook_forbidden(self, gh_client_mock, get_commits_task_mock):
+        """Check if commits are still fetched when the user can't register webhooks."""
+        gh_client_mock.for_token.return_value.create_push_webhook.side_effect = UnknownObjectException(
+            404, None, None
+        )
+
+        validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.repository.refresh_from_db()
+        self.assertIsNone(self.repository.webhook_id)
+        get_commits_task_mock.assert_called_once_with("access-token", self.repository.id)
+
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository_not_found(self, gh_client_mock, get_commits_task_mock):
+        """Check if a repository not found on Github is marked as failed, without syncing."""
+        gh_client_mock.for_token.return_value.get_repository.side_effect = UnknownObjectException(
+            404, None, None
+        )
+
+        validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.FAILED)
+        self.assertEqual(self.repository.status_detail, "Repository not found on Github.")
+        get_commits_task_mock.assert_not_called()
+
+    @freeze_time("2023-04-20 12:00:00")
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository_rate_limit_exhausted(self, gh_client_mock):
+        """Check if the validation is deferred until the rate limit budget is reset."""
+        reset_at = datetime.now(tz=timezone.utc).timestamp() + 60
+        gh_client_mock.for_token.return_value.get_repository.side_effect = RateLimitExhaustedException(
+            reset_at
+        )
+
+        with patch.object(validate_repository, 'retry', side_effect=Retry()) as retry_mock:
+            with self.assertRaises(Retry):
+                validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.assertEqual(retry_mock.call_args.kwargs['countdown'], 61)
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.VALIDATING)
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository_server_error(self, gh_client_mock):
+        """Check if the validation is retried with backoff on Github server errors."""
+        gh_client_mock.for_token.return_value.get_repository.side_effect = GithubException(
+            502, "Bad Gateway", None
+        )
+
+        with patch.object(validate_repository, 'retry', side_effect=Retry()) as retry_mock:
+            with self.assertRaises(Retry):
+                validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.assertLessEqual(retry_mock.call_args.kwargs['countdown'], settings.SYNC_RETRY_BACKOFF)
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.VALIDATING)
+
+    @override_settings(SYNC_MAX_RETRIES=0)
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_validate_repository_connection_error(self, gh_client_mock, get_commits_task_mock):
+        """Check if the repository is marked as failed once connection errors use all retries."""
+        gh_client_mock.for_token.return_value.get_repository.side_effect = requests.ConnectionError(
+            "Connection reset by peer"
+        )
+
+        with self.assertRaises(requests.ConnectionError):
+            validate_repository("access-token", self.repository.id, self.webhook_url)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.FAILED)
+        self.assertEqual(
+            self.repository.status_detail, "Could not validate repository: Connection reset by peer"
+        )
+        get_commits_task_mock.assert_not_called()
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_sync_ready(self, gh_client_mock):
+        """Check if the repository is ready once its commits are fetched."""
+        gh_client_mock.for_token.return_value.get_commit_pages.return_value = []
+
+        get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.READY)
+
+    @patch('repositories.tasks.GithubAPIClient')
+    def test_sync_failed(self, gh_client_mock):
+        """Check if the repository is marked as failed when its commits can't be fetched."""
+        gh_client_mock.for_token.return_value.get_commit_pages.side_effect = GithubException(
+            409, "Git Repository is empty.", None
+        )
+
+        with self.assertRaises(GithubException):
+            get_last_30_days_repo_commits("access-token", self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.status, Repository.Status.FAILED)
+        self.assertTrue(self.repository.status_detail.startswith("Could not fetch commits:"))
+
+
+class TestTasksWithFakeGithub(TestCase):
+    def setUp(self) -> None:
+        caches['default'].clear()
+        caches['github'].clear()
+        self.repository = Repository.objects.create(name='user/repo')
+        self.server = FakeGithubServer({'user/repo': fake_commits('user/repo', 250)}).__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        patcher = patch(
+            'repositories.tasks.GithubAPIClient.for_token',
+            return_value=GithubAPIClient(self.server.access_token, base_url=self.server.url)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_repo_commits_slice(self):
+        """Check if only commits within the slice are fetched from Github and saved on db."""
+        commits = self.server.repositories['user/repo']
+        until = datetime.strptime(
+            commits[100]['commit']['author']['date'], '%Y-%m-%dT%H:%M:%SZ'
+        ).replace(tzinfo=timezone.utc)
+
+        get_repo_commits_slice(
+            self.server.access_token, self.repository.id,
+            ((until - timedelta(minutes=49)).isoformat(), until.isoformat())
+        )
+
+        self.assertCountEqual(
+            Commit.objects.filter(repository=self.repository).values_list('sha', flat=True),
+            [commit['sha'] for commit in commits[100:150]]
+        )
+
+    def test_get_last_30_days_repo_commits(self):
+        """Check if all pages of commits are fetched from Github and saved on db."""
+        get_last_30_days_repo_commits(self.server.access_token, self.repository.id)
+
+        self.repository.refresh_from_db()
+        self.assertEqual(Commit.objects.filter(repository=self.repository).count(), 250)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.repository.status, Repository.Status.READY)
+        self.assertEqual(self.repository.last_commit_sha, fake_commits('user/repo', 250)[0]['sha'])
+
+
+class TestTaskRouting(TestCase):
+    def route(self, task):
+        return app.amqp.router.route({}, task.name)
+
+    def test_task_routes(self):
+        """Check if tasks are routed to the interactive, refresh or backfill queues."""
+        routes = {
+            validate_repository: 'interactive',
+            get_last_30_days_repo_commits: 'interactive',
+            finish_repository_sync: 'interactive',
+            abort_repository_sync: 'interactive',
+            refresh_repositories: 'refresh',
+            refresh_repositories_history: 'refresh',
+            get_repo_commits_slice: 'backfill',
+        }
+
+        for task, queue in routes.items():
+            self.assertEqual(self.route(task)['queue'].name, queue, task.name)
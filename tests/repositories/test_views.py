@@ -1,18 +1,29 @@
+import hashlib
+import hmac
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from github.GithubException import UnknownObjectException
 
-from repositories.models import Commit, Repository
-from repositories.serializers import CommitSerializer, RepositorySerializer
+from integrations.rate_limit import RateLimitExhaustedException
+from repositories.ingestion import save_commits
+from repositories.models import MAX_BACKFILL_DAYS, Commit, Repository
+from repositories.serializers import (CommitSerializer,
+                                      RepositoryStatusSerializer)
+from repositories.views import BULK_JOB_OWNER_KEY
 
 
 class TestCommitsView(TestCase):
     def setUp(self):
+        caches['default'].clear()
         self.user = User.objects.create_superuser(username='test_user', password='test')
         self.repository = Repository.objects.create(name='Test Repository')
         self.commits = self.create_random_commits(number_commits=20, repository=self.repository)
@@ -149,6 +160,81 @@ class TestCommitsView(TestCase):
         self.assertEqual(response.data["total_pages"], 2)
         self.assertEqual(response.data["page"], 2)
 
+    def test_commits_list_cursor_pagination(self):
+        """Check if the requested commits are returned paginated by cursor.
+
+        Check if commits are not counted in cursor mode.
+        Check if following the next cursor returns the remaining commits.
+        """
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/commits/?pagination=cursor')
+
+        all_commits = Commit.objects.order_by('-date', 'id')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], CommitSerializer(all_commits[:10], many=True).data)
+        self.assertNotIn("count", response.data)
+        self.assertNotIn("total_pages", response.data)
+        self.assertIsNone(response.data["previous"])
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], CommitSerializer(all_commits[10:], many=True).data)
+        self.assertIsNone(response.data["next"])
+        self.assertIn("pagination=cursor", response.data["previous"])
+
+    def test_commits_list_cursor_pagination_filter(self):
+        """Check if filters are kept on cursor pagination."""
+        repository = Repository.objects.create(name='Unique Repository')
+        commits = self.create_random_commits(number_commits=2, repository=repository)
+
+        self.client.force_login(self.user)
+        response = self.client.get(f'/api/commits/?pagination=cursor&repository={repository.name}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.data["results"], CommitSerializer(commits, many=True).data)
+        self.assertIsNone(response.data["next"])
+
+    def test_commits_list_cached(self):
+        """Check if a repeated request is served from cache, ignoring filters case."""
+        self.client.force_login(self.user)
+        first = self.client.get('/api/commits/?repository=Test Repository')
+
+        with self.assertNumQueries(2):  # session and user
+            second = self.client.get('/api/commits/?repository=test repository')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_commits_list_cache_invalidated(self):
+        """Check if saving commits of a repository invalidates its cached lists."""
+        other_repository = Repository.objects.create(name='Other Repository')
+        self.client.force_login(self.user)
+        self.client.get('/api/commits/')
+        self.client.get('/api/commits/?repository=Test Repository')
+        self.client.get('/api/commits/?repository=Other Repository')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_commits(self.repository, [{
+                'message': 'New commit',
+                'sha': 'abcdef',
+                'author': 'Jane Smith',
+                'url': 'https://github.com/user/repo/commits/abcdef',
+                'date': '2023-04-14T16:00:49Z',
+            }])
+
+        self.assertEqual(self.client.get('/api/commits/')['X-Cache'], 'MISS')
+        response = self.client.get('/api/commits/?repository=Test Repository')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 21)
+        response = self.client.get('/api/commits/?repository=Other Repository')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(other_repository.commit_set.count(), 0)
+
     def tearDown(self):
         for commit in self.commits:
             commit.delete()
@@ -167,10 +253,13 @@ class TestRepositoriesView(TestCase):
 
         self.assertEqual(response.status_code, 403)
 
-    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('repositories.tasks.validate_repository.delay')
     @patch('integrations.github_api.GithubAPIClient.from_request_user')
-    def test_repository_create(self, from_request_user_mock, get_commits_task_mock):
-        """Check if repository is created and celery task to fetch commits is setup."""
+    def test_repository_create(self, from_request_user_mock, validate_task_mock):
+        """Check if repository is created as pending and celery task to validate it is setup.
+
+        Check if Github isn't reached during the request.
+        """
         access_token = 'access-token'
         repository_fullname = 'user/repo'
         gh_client_mock = from_request_user_mock.return_value
@@ -185,41 +274,550 @@ class TestRepositoriesView(TestCase):
         )
 
         repository = Repository.objects.first()
-        serializer = RepositorySerializer(repository)
+        serializer = RepositoryStatusSerializer(repository)
 
-        gh_client_mock.get_repository.assert_called_once_with(repository_fullname)
-        get_commits_task_mock.assert_called_once_with(access_token, repository.id)
-        self.assertEqual(response.status_code, 201)
+        gh_client_mock.get_repository.assert_not_called()
+        validate_task_mock.assert_called_once_with(
+            access_token, repository.id, 'http://testserver/api/webhooks/github/'
+        )
+        self.assertEqual(response.status_code, 202)
         self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response['Location'], f'/api/repositories/{repository.id}/status/')
+        self.assertEqual(repository.created_by, self.user)
+
+    @patch('repositories.tasks.validate_repository.delay')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_repository_create_backfill_days(self, from_request_user_mock, validate_task_mock):
+        """Check if the repository backfill window can be set on creation, up to its limit."""
+        self.client.force_login(self.user)
+
+        for backfill_days, status_code in ((365, 202), (0, 400), (MAX_BACKFILL_DAYS + 1, 400)):
+            response = self.client.post(
+                '/api/repositories/',
+                json.dumps({'name': f'user/repo-{backfill_days}', 'backfill_days': backfill_days}),
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, status_code)
+
+        self.assertEqual(Repository.objects.get().backfill_days, 365)
+
+    @patch('repositories.tasks.validate_repository.delay')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_repository_create_failed(self, from_request_user_mock, validate_task_mock):
+        """Check if a repository which failed is checked again when sent again.
+
+        Check if repositories in any other state are still rejected as duplicated.
+        """
+        from_request_user_mock.return_value.access_token = 'access-token'
+        failed = Repository.objects.create(
+            name='user/repo', status=Repository.Status.FAILED,
+            status_detail='Repository not found on Github.'
+        )
+        Repository.objects.create(name='user/ready', status=Repository.Status.READY)
 
-    def test_repository_create_invalid_data(self):
-        """Check if it returns 400 when invalid data is sent."""
         self.client.force_login(self.user)
         response = self.client.post(
-            '/api/repositories/',
-            json.dumps({}),
-            content_type='application/json',
-            follow=True
+            '/api/repositories/', json.dumps({'name': 'user/repo'}), content_type='application/json'
+        )
+
+        failed.refresh_from_db()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['id'], failed.id)
+        self.assertEqual(failed.status, Repository.Status.PENDING)
+        self.assertEqual(failed.status_detail, '')
+        self.assertEqual(failed.created_by, self.user)
+        validate_task_mock.assert_called_once_with(
+            'access-token', failed.id, 'http://testserver/api/webhooks/github/'
+        )
+
+        response = self.client.post(
+            '/api/repositories/', json.dumps({'name': 'user/ready'}), content_type='application/json'
         )
 
         self.assertEqual(response.status_code, 400)
+        self.assertEqual(Repository.objects.count(), 2)
+
+    def test_repository_create_invalid_data(self):
+        """Check if it returns 400 when invalid data is sent."""
+        self.client.force_login(self.user)
+        for data in ({}, []):
+            response = self.client.post(
+                '/api/repositories/',
+                json.dumps(data),
+                content_type='application/json',
+                follow=True
+            )
+
+            self.assertEqual(response.status_code, 400)
+
+    def test_repository_status(self):
+        """Check if the repository registration state is returned."""
+        repository = Repository.objects.create(
+            name='user/repo', status=Repository.Status.FAILED,
+            status_detail='Repository not found on Github.'
+        )
+
+        self.client.force_login(self.user)
+        response = self.client.get(f'/api/repositories/{repository.id}/status/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'id': repository.id,
+            'name': 'user/repo',
+            'status': 'failed',
+            'status_detail': 'Repository not found on Github.',
+            'backfill_days': 30,
+            'last_synced_at': None,
+        })
+
+    def test_repository_status_not_found(self):
+        """Check if it returns 404 when the repository doesn't exist."""
+        self.client.force_login(self.user)
+        response = self.client.get('/api/repositories/1234/status/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def tearDown(self):
+        self.user.delete()
+
 
+class TestRepositoriesBulkView(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='test_user', password='test')
+        Repository.objects.create(name='user/existing')
+
+    @staticmethod
+    def get_repository(repo_fullname):
+        if repo_fullname == 'user/invalid-repo':
+            raise UnknownObjectException(404, None, None)
+        if repo_fullname == 'user/limited':
+            raise RateLimitExhaustedException(datetime.now().timestamp() + 60)
+        return MagicMock()
+
+    @patch('repositories.views.group')
+    @patch('repositories.views.register_push_webhooks.delay')
     @patch('integrations.github_api.GithubAPIClient.from_request_user')
-    def test_repository_create_not_found(self, from_request_user_mock):
-        """Check if it returns 404 when the repository is not found on Github"""
+    def test_repositories_bulk_create(self, from_request_user_mock, webhooks_task_mock, group_mock):
+        """Check if repositories found on Github are created and their commits fetched by a group.
+
+        Check if each name is reported by its outcome.
+        """
         gh_client_mock = from_request_user_mock.return_value
-        gh_client_mock.get_repository.side_effect = UnknownObjectException(None, None, None)
-        from_request_user_mock.return_value = gh_client_mock
+        gh_client_mock.access_token = 'access-token'
+        gh_client_mock.get_repository.side_effect = self.get_repository
+        group_mock.return_value.apply_async.return_value.id = 'job-id'
+        names = ['user/repo-0', 'user/existing', 'user/invalid-repo', 'user/limited',
+                 'user/repo-1', 'user/repo-0']
 
         self.client.force_login(self.user)
         response = self.client.post(
-            '/api/repositories/',
-            json.dumps({'name': 'user/invalid-repo'}),
+            '/api/repositories/bulk/', json.dumps({'names': names}), content_type='application/json'
+        )
+
+        repositories = Repository.objects.filter(name__in=['user/repo-0', 'user/repo-1'])
+        repository_ids = [repository.id for repository in repositories]
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {
+            'created': ['user/repo-0', 'user/repo-1'],
+            'existing': ['user/existing'],
+            'not_found': ['user/invalid-repo'],
+            'rate_limited': ['user/limited'],
+            'failed': [],
+            'job_id': 'job-id',
+        })
+        self.assertEqual(gh_client_mock.get_repository.call_count, 4)
+        self.assertTrue(all(repository.created_by == self.user for repository in repositories))
+        webhooks_task_mock.assert_called_once_with(
+            'access-token', repository_ids, 'http://testserver/api/webhooks/github/'
+        )
+        signatures = list(group_mock.call_args.args[0])
+        self.assertCountEqual(
+            [signature.args for signature in signatures],
+            [('access-token', repository_id) for repository_id in repository_ids]
+        )
+        self.assertTrue(all(signature.options['queue'] == 'backfill' for signature in signatures))
+        group_mock.return_value.apply_async.return_value.save.assert_called_once()
+        self.assertEqual(caches['default'].get(BULK_JOB_OWNER_KEY.format('job-id')), self.user.id)
+
+    @patch('repositories.views.group')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_repositories_bulk_create_nothing_new(self, from_request_user_mock, group_mock):
+        """Check if no job is started when no repository is created."""
+        self.client.force_login(self.user)
+        response = self.client.post(
+            '/api/repositories/bulk/',
+            json.dumps({'names': ['user/existing']}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['job_id'])
+        from_request_user_mock.return_value.get_repository.assert_not_called()
+        group_mock.assert_not_called()
+
+    def test_repositories_bulk_create_invalid_data(self):
+        """Check if it returns 400 when no names or too many names are sent."""
+        self.client.force_login(self.user)
+        for names in ([], [f'user/repo-{i}' for i in range(1001)]):
+            response = self.client.post(
+                '/api/repositories/bulk/',
+                json.dumps({'names': names}),
+                content_type='application/json'
+            )
+
+            self.assertEqual(response.status_code, 400)
+
+    @patch('repositories.views.GroupResult.restore')
+    def test_repositories_job(self, restore_mock):
+        """Check if the job progress is summarized by its tasks states."""
+        restore_mock.return_value.id = 'job-id'
+        states = ('SUCCESS', 'SUCCESS', 'FAILURE', 'PROGRESS', 'PENDING')
+        restore_mock.return_value.results = [MagicMock(state=state) for state in states]
+        caches['default'].set(BULK_JOB_OWNER_KEY.format('job-id'), self.user.id)
+
+        self.client.force_login(self.user)
+        response = self.client.get('/api/repositories/jobs/job-id/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'id': 'job-id',
+            'total': 5,
+            'completed': 2,
+            'failed': 1,
+            'in_progress': 1,
+            'ready': False,
+        })
+
+    @patch('repositories.views.GroupResult.restore')
+    def test_repositories_job_not_found(self, restore_mock):
+        """Check if it returns 404 when the job is unknown."""
+        restore_mock.return_value = None
+
+        self.client.force_login(self.user)
+        response = self.client.get('/api/repositories/jobs/unknown/')
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('repositories.views.GroupResult.restore')
+    def test_repositories_job_other_user(self, restore_mock):
+        """Check if it returns 404 for jobs started by another user."""
+        other_user = User.objects.create_user(username='other_user', password='test')
+        caches['default'].set(BULK_JOB_OWNER_KEY.format('job-id'), other_user.id)
+
+        self.client.force_login(self.user)
+        response = self.client.get('/api/repositories/jobs/job-id/')
+
+        self.assertEqual(response.status_code, 404)
+        restore_mock.assert_not_called()
+
+
+class TestStatsView(TestCase):
+    def setUp(self):
+        caches['github'].clear()
+        self.user = User.objects.create_user(username='test_user', password='test')
+        self.admin = User.objects.create_superuser(username='test_admin', password='test')
+
+    def test_stats_not_admin(self):
+        """Check if only admins can see caches and Github api usage."""
+        self.client.force_login(self.user)
+        response = self.client.get('/api/stats/')
+
+        self.assertEqual(response.status_code, 403)
+
+    @patch('repositories.cache.CommitListCache.stats')
+    @patch('integrations.rate_limit.RateLimitBudget.snapshot')
+    @patch('integrations.etag_cache.ConditionalRequestCache.stats')
+    def test_stats(self, stats_mock, snapshot_mock, commits_stats_mock):
+        """Check if caches counters, rate limit budgets and queues latency are returned."""
+        stats_mock.return_value = {'hits': 3, 'misses': 1}
+        snapshot_mock.return_value = {'abc': {'remaining': 10, 'limit': 5000, 'reset': 1}}
+        commits_stats_mock.return_value = {'hits': 2, 'misses': 2}
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['commits_cache'], {'hits': 2, 'misses': 2})
+        self.assertEqual(response.data['conditional_cache'], {'hits': 3, 'misses': 1})
+        self.assertEqual(response.data['rate_limit'], snapshot_mock.return_value)
+        self.assertEqual(list(response.data['queues']), ['backfill', 'interactive', 'refresh'])
+
+    def tearDown(self):
+        self.user.delete()
+        self.admin.delete()
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='webhook-secret')
+class TestGithubWebhookView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user', password='test')
+        self.repository = Repository.objects.create(name='user/repo', created_by=self.user)
+        self.payload = {
+            'ref': 'refs/heads/main',
+            'before': 'aaaaa',
+            'after': '67890',
+            'repository': {
+                'full_name': 'user/repo',
+                'default_branch': 'main',
+                'commits_url': 'https://api.github.com/repos/user/repo/commits{/sha}',
+            },
+            'sender': {
+                'login': 'johndoe',
+                'avatar_url': 'https://github.com/images/error/octocat_happy.gif',
+            },
+            'commits': [
+                {
+                    'id': '12345',
+                    'message': 'commit 01',
+                    'timestamp': '2023-04-14T16:00:49-03:00',
+                    'url': 'https://github.com/user/repo/commit/12345',
+                    'author': {'name': 'John Doe', 'username': 'johndoe'},
+                },
+                {
+                    'id': '67890',
+                    'message': 'commit 02',
+                    'timestamp': '2023-04-16T12:00:49-03:00',
+                    'url': 'https://github.com/user/repo/commit/67890',
+                    'author': {'name': 'Jane Green', 'username': 'janegreen'},
+                },
+            ],
+        }
+
+    def post_webhook(self, payload: dict, event: str = 'push', secret: str = None):
+        body = json.dumps(payload).encode()
+        signature = hmac.new(
+            (secret or settings.GITHUB_WEBHOOK_SECRET).encode(), body, hashlib.sha256
+        ).hexdigest()
+
+        return self.client.post(
+            '/api/webhooks/github/',
+            body,
             content_type='application/json',
-            follow=True
+            HTTP_X_GITHUB_EVENT=event,
+            HTTP_X_HUB_SIGNATURE_256=f'sha256={signature}',
         )
 
+    def test_webhook_invalid_signature(self):
+        """Check if payloads not signed with the webhook secret are rejected."""
+        response = self.post_webhook(self.payload, secret='invalid-secret')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Commit.objects.exists())
+
+    @override_settings(GITHUB_WEBHOOK_SECRET='')
+    def test_webhook_without_secret(self):
+        """Check if payloads are rejected when no webhook secret is set, even if signed."""
+        response = self.post_webhook(self.payload)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Commit.objects.exists())
+
+    def test_webhook_ping(self):
+        """Check if events other than push are acknowledged and ignored."""
+        response = self.post_webhook({'zen': 'Keep it logically awesome.'}, event='ping')
+
+        self.assertEqual(response.status_code, 204)
+
+    def test_webhook_push(self):
+        """Check if pushed commits are saved without calling Github api."""
+        response = self.post_webhook(self.payload)
+
+        commits = {commit.sha: commit for commit in Commit.objects.filter(repository=self.repository)}
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'saved': 2})
+        self.assertEqual(commits['12345'].message, 'commit 01')
+        self.assertEqual(commits['12345'].author, 'John Doe')
+        self.assertEqual(commits['12345'].url, 'https://api.github.com/repos/user/repo/commits/12345')
+        self.assertEqual(commits['12345'].avatar, 'https://github.com/images/error/octocat_happy.gif')
+        self.assertEqual(commits['12345'].date, datetime(2023, 4, 14, 19, 0, 49, tzinfo=timezone.utc))
+        self.assertIsNone(commits['67890'].avatar)
+
+    def test_webhook_push_unknown_repository(self):
+        """Check if it returns 404 for pushes to repositories not monitored."""
+        self.payload['repository']['full_name'] = 'user/other-repo'
+
+        response = self.post_webhook(self.payload)
+
         self.assertEqual(response.status_code, 404)
 
+    def test_webhook_push_other_branch(self):
+        """Check if pushes to branches other than the default one are ignored."""
+        self.payload['ref'] = 'refs/heads/feature'
+
+        response = self.post_webhook(self.payload)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Commit.objects.exists())
+
+    def test_webhook_push_updates_sync_cursor(self):
+        """Check if the sync cursor moves to the pushed commits when they follow the last sync."""
+        self.repository.last_commit_sha = 'aaaaa'
+        self.repository.last_synced_at = datetime(2023, 4, 1, tzinfo=timezone.utc)
+        self.repository.save()
+
+        self.post_webhook(self.payload)
+        self.repository.refresh_from_db()
+
+        self.assertEqual(self.repository.last_commit_sha, '67890')
+
+    def test_webhook_push_keeps_sync_cursor_on_gap(self):
+        """Check if the sync cursor is kept when commits may be missing since last sync."""
+        self.repository.last_commit_sha = 'bbbbb'
+        self.repository.last_synced_at = datetime(2023, 4, 1, tzinfo=timezone.utc)
+        self.repository.save()
+
+        self.post_webhook(self.payload)
+        self.repository.refresh_from_db()
+
+        self.assertEqual(self.repository.last_commit_sha, 'bbbbb')
+
+    @patch('repositories.ingestion.PUSH_PAYLOAD_COMMITS_LIMIT', 2)
+    @patch('repositories.tasks.get_last_30_days_repo_commits.delay')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_webhook_push_truncated(self, from_request_user_mock, get_commits_task_mock):
+        """Check if a backfill is scheduled when the payload commits list is truncated."""
+        from_request_user_mock.return_value.access_token = 'access-token'
+
+        response = self.post_webhook(self.payload)
+
+        self.assertEqual(response.status_code, 200)
+        from_request_user_mock.assert_called_once_with(self.user)
+        get_commits_task_mock.assert_called_once_with('access-token', self.repository.id)
+
+    def tearDown(self):
+        self.user.delete()
+
+
+class TestQueryBudgets(TestCase):
+    """Check that every endpoint runs a constant number of queries, regardless of the data size."""
+    def setUp(self):
+        caches['default'].clear()
+        caches['github'].clear()
+        self.user = User.objects.create_superuser(username='test_user', password='test')
+        self.repositories = [
+            Repository.objects.create(name=f'user/repo-{i}', created_by=self.user) for i in range(5)
+        ]
+        for repository in self.repositories:
+            TestCommitsView.create_random_commits(number_commits=10, repository=repository)
+        self.client.force_login(self.user)
+
+    def test_commits_list_budget(self):
+        """Check the queries budget of commits list: session, user, count and page."""
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/commits/')
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len({commit['repository'] for commit in response.data['results']}), 5)
+
+    def test_commits_list_cursor_budget(self):
+        """Check the queries budget of commits list by cursor: session, user and page."""
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/commits/?pagination=cursor')
+
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_commits_list_filters_budget(self):
+        """Check the queries budget of filtered commits list: repositories ids lookup added."""
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/commits/?repository=user/repo-1&author=jane smith 1')
+
+        self.assertEqual(len(response.data['results']), 1)
+
+    @patch('repositories.tasks.validate_repository.delay')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_repository_create_budget(self, from_request_user_mock, validate_task_mock):
+        """Check the queries budget of repository creation: failed repository lookup, unique
+        name check and insert."""
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                '/api/repositories/',
+                json.dumps({'name': 'user/new-repo'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 202)
+
+    def test_repository_status_budget(self):
+        """Check the queries budget of repository status: session, user and repository."""
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/repositories/{self.repositories[0].id}/status/')
+
+        self.assertEqual(response.status_code, 200)
+
+    @patch('repositories.views.group')
+    @patch('repositories.views.register_push_webhooks.delay')
+    @patch('integrations.github_api.GithubAPIClient.from_request_user')
+    def test_repositories_bulk_create_budget(self, from_request_user_mock, webhooks_task_mock,
+                                             group_mock):
+        """Check the queries budget of bulk repositories creation: existing names lookup,
+        insert and created ids lookup."""
+        group_mock.return_value.apply_async.return_value.id = 'job-id'
+
+        with self.assertNumQueries(2 + 3):
+            response = self.client.post(
+                '/api/repositories/bulk/',
+                json.dumps({'names': [f'user/new-repo-{i}' for i in range(50)]}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 50)
+
+    @patch('repositories.views.GroupResult.restore')
+    def test_repositories_job_budget(self, restore_mock):
+        """Check the queries budget of a bulk registration job: only session and user."""
+        restore_mock.return_value.id = 'job-id'
+        restore_mock.return_value.results = [MagicMock(state='SUCCESS') for _ in range(50)]
+        caches['default'].set(BULK_JOB_OWNER_KEY.format('job-id'), self.user.id)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/repositories/jobs/job-id/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_stats_budget(self):
+        """Check the queries budget of stats: only session and user."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/stats/')
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(GITHUB_WEBHOOK_SECRET='webhook-secret')
+    def test_github_webhook_budget(self):
+        """Check the queries budget of a push webhook: repository lookup and commits upsert."""
+        body = json.dumps({
+            'ref': 'refs/heads/main',
+            'before': 'aaaaa',
+            'repository': {
+                'full_name': 'user/repo-0',
+                'default_branch': 'main',
+                'commits_url': 'https://api.github.com/repos/user/repo-0/commits{/sha}',
+            },
+            'commits': [
+                {
+                    'id': f'sha{i}',
+                    'message': f'commit {i}',
+                    'timestamp': '2023-04-14T16:00:49Z',
+                    'author': {'name': 'John Doe'},
+                } for i in range(50)
+            ],
+        }).encode()
+        signature = hmac.new(settings.GITHUB_WEBHOOK_SECRET.encode(), body, hashlib.sha256)
+
+        self.client.logout()
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                '/api/webhooks/github/',
+                body,
+                content_type='application/json',
+                HTTP_X_GITHUB_EVENT='push',
+                HTTP_X_HUB_SIGNATURE_256=f'sha256={signature.hexdigest()}',
+            )
+
+        self.assertEqual(response.data, {'saved': 50})
+
     def tearDown(self):
         self.user.delete()